@@ -0,0 +1,119 @@
+from collections import OrderedDict
+from dataclasses import fields
+from threading import Lock
+from time import monotonic
+from typing import Dict, Iterable, Optional, Tuple
+
+from agno.agent import Agent
+
+from agents.operator import AgentType, get_agent
+from agents.settings import agent_settings
+
+# Fields shared by every run bound from a template. Storage and knowledge are
+# stateless per call and own the database engines, so copying them would
+# rebuild table metadata and re-inspect the schema on every request.
+SHARED_FIELDS = {"storage", "knowledge"}
+# Run state that never carries over from the template
+EXCLUDED_FIELDS = {"agent_session", "session_name"}
+
+
+class AgentPool:
+    """Pre-built agent templates keyed by (agent_id, model_id), bound per run.
+
+    Building an agent creates its model, tools, storage and knowledge base,
+    and the storages inspect the database schema on construction. The pool
+    builds each (agent_id, model_id) template once and hands out a fresh
+    Agent per run that shares the template's storage and knowledge but gets
+    its own copy of the model, tools and memory, so concurrent runs never
+    share mutable run state. Templates unused for ``idle_seconds`` are
+    dropped, and at most ``max_size`` are kept (least recently used first).
+    """
+
+    def __init__(
+        self,
+        max_size: int = agent_settings.agent_pool_max_size,
+        idle_seconds: float = agent_settings.agent_pool_idle_seconds,
+    ):
+        self.max_size = max_size
+        self.idle_seconds = idle_seconds
+        self._templates: OrderedDict[Tuple[AgentType, str], Tuple[Agent, float]] = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self,
+        agent_id: AgentType,
+        model_id: str,
+        user_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+    ) -> Agent:
+        """Return an agent for one run, bound to ``user_id`` and ``session_id``."""
+        return bind_agent(self.template(agent_id, model_id), user_id=user_id, session_id=session_id)
+
+    def template(self, agent_id: AgentType, model_id: str) -> Agent:
+        key = (agent_id, model_id)
+        now = monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            if key in self._templates:
+                self.hits += 1
+                template, _ = self._templates[key]
+                self._templates[key] = (template, now)
+                self._templates.move_to_end(key)
+                return template
+            self.misses += 1
+
+        # Built outside the lock; a concurrent miss for the same key just builds twice
+        template = get_agent(model_id=model_id, agent_id=agent_id)
+        with self._lock:
+            self._templates[key] = (template, monotonic())
+            self._templates.move_to_end(key)
+            while len(self._templates) > self.max_size:
+                self._templates.popitem(last=False)
+        return template
+
+    def warm_up(self, model_ids: Iterable[str], agent_ids: Iterable[AgentType] = AgentType) -> None:
+        """Build templates ahead of the first request."""
+        for agent_id in agent_ids:
+            for model_id in model_ids:
+                self.template(agent_id, model_id)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "templates": len(self._templates),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _evict_idle(self, now: float) -> None:
+        if self.idle_seconds <= 0:
+            return
+        for key, (_, last_used) in list(self._templates.items()):
+            if now - last_used > self.idle_seconds:
+                del self._templates[key]
+
+
+def bind_agent(template: Agent, user_id: Optional[str] = None, session_id: Optional[str] = None) -> Agent:
+    """Create a run-scoped Agent from ``template`` without rebuilding its storage or knowledge."""
+    values = {}
+    for f in fields(template):
+        value = getattr(template, f.name)
+        if f.name in EXCLUDED_FIELDS or value is None:
+            continue
+        values[f.name] = value if f.name in SHARED_FIELDS else template._deep_copy_field(f.name, value)
+
+    values.update(user_id=user_id, session_id=session_id, additional_context=get_user_context(user_id))
+    return template.__class__(**values)
+
+
+def get_user_context(user_id: Optional[str]) -> str:
+    """The per-user context the agent factories add to their instructions."""
+    if not user_id:
+        return ""
+    return f"<context>You are interacting with the user: {user_id}</context>"
+
+
+# Shared pool for the API routes
+agent_pool = AgentPool()
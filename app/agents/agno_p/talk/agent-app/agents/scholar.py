@@ -3,11 +3,11 @@ from typing import Optional
 
 from agno.agent import Agent
 from agno.models.openai import OpenAIChat
-from agno.storage.agent.postgres import PostgresAgentStorage
 from agno.tools.duckduckgo import DuckDuckGoTools
 
 from agents.settings import agent_settings
-from db.session import db_url
+from db.session import db_engine
+from db.storage import AsyncPostgresStorage
 
 
 def get_scholar(
@@ -37,7 +37,7 @@ def get_scholar(
         # Tools available to the agent
         tools=[DuckDuckGoTools()],
         # Storage for the agent
-        storage=PostgresAgentStorage(table_name="scholar_sessions", db_url=db_url),
+        storage=AsyncPostgresStorage(table_name="scholar_sessions", db_engine=db_engine),
         # Description of the agent
         description=dedent("""\
             You are Scholar, a cutting-edge Answer Engine built to deliver precise, context-rich, and engaging responses.
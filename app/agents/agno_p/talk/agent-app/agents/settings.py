@@ -12,6 +12,13 @@ class AgentSettings(BaseSettings):
     default_max_completion_tokens: int = 16000
     default_temperature: float = 0
 
+    # Agent templates kept by the API's agent pool
+    agent_pool_max_size: int = 16
+    # Drop templates unused for this many seconds (0 keeps them forever)
+    agent_pool_idle_seconds: float = 1800
+    # Build templates for every agent and model on startup
+    agent_pool_warm_up: bool = True
+
 
 # Create an TeamSettings object
 agent_settings = AgentSettings()
@@ -0,0 +1,126 @@
+import asyncio
+from typing import Optional, Union
+
+from agno.agent import Agent
+from agno.memory.v2.memory import Memory
+from agno.models.message import Message
+from agno.run.response import RunEvent, RunResponse
+from agno.run.team import TeamRunResponse
+from agno.team import Team
+from fastapi import Request
+
+from db.storage import deferred_session_writes, flush_session
+from utils.log import logger
+
+
+async def wait_for_disconnect(request: Request) -> None:
+    """
+    Return once the client of ``request`` has disconnected.
+
+    This reads the request's ASGI ``receive`` channel, so it must only run
+    once the body has been read, as it has for the parsed body of a route.
+    After that the server has nothing left to deliver but ``http.disconnect``,
+    which it repeats to every caller: StreamingResponse, which listens for the
+    disconnect itself, still sees it.
+    """
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+
+async def run_until_disconnected(
+    entity: Union[Agent, Team], message: str, request: Request
+) -> Optional[Union[RunResponse, TeamRunResponse]]:
+    """
+    Run an agent or team without streaming, cancelling the run if the client disconnects first.
+
+    Args:
+        entity: The agent or team to run
+        message: User message to process
+        request: The request being answered
+
+    Returns:
+        The run response, or None if the client disconnected and the run was cancelled
+
+    Raises:
+        SessionWriteError: The session of the run, finished or cancelled, could not be written
+    """
+
+    async def run() -> Union[RunResponse, TeamRunResponse]:
+        # The session is written by flush_session below, or by save_cancelled_run
+        with deferred_session_writes():
+            return await entity.arun(message, stream=False)
+
+    run_task = asyncio.create_task(run())
+    disconnect_task = asyncio.create_task(wait_for_disconnect(request))
+    try:
+        await asyncio.wait({run_task, disconnect_task}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        disconnect_task.cancel()
+        if not run_task.done():
+            logger.info(f"Client disconnected, cancelling run of {entity.name}")
+            run_task.cancel()
+            try:
+                await run_task
+            except asyncio.CancelledError:
+                await save_cancelled_run(entity, message)
+    if run_task.cancelled():
+        return None
+    # Written even if the run failed, as the sync storage would have: a new session is stored when the run starts
+    await flush_session(entity)
+    return run_task.result()
+
+
+async def save_cancelled_run(entity: Union[Agent, Team], message: Optional[str] = None) -> None:
+    """
+    Record a run that was cancelled part way, and those of team members it was waiting on, and write the session.
+
+    A cancelled run is added to the session like a finished one, with event
+    RunCancelled. Its messages are the user message and whatever answer was
+    generated so far, so the next run of the session sees both. Finished tool
+    calls stay on the run's ``tools``; unfinished ones are dropped, because the
+    model API rejects a history with a tool call and no result.
+
+    Args:
+        entity: The agent or team whose run was cancelled
+        message: User message of the run, used when the run has not built its own yet
+
+    Raises:
+        SessionWriteError: The session could not be written
+    """
+    with deferred_session_writes():
+        record_cancelled_run(entity, message)
+        # Also written if there was no run to record: a new session is stored when the run starts
+        await flush_session(entity)
+
+
+def record_cancelled_run(entity: Union[Agent, Team], message: Optional[str] = None) -> None:
+    """Add the cancelled run of ``entity`` and of its team members to their sessions; see ``save_cancelled_run``."""
+    if isinstance(entity, Team):
+        for member in entity.members:
+            # Members can be shared between teams; only record runs made for this session
+            if member.team_session_id is not None and member.team_session_id == entity.session_id:
+                record_cancelled_run(member)
+
+    run_response = entity.run_response
+    if run_response is None or run_response.session_id is None or not isinstance(entity.memory, Memory):
+        return
+    session_id = run_response.session_id
+    if any(run.run_id == run_response.run_id for run in (entity.memory.runs or {}).get(session_id, [])):
+        # The run was already recorded when the cancellation reached it
+        return
+
+    # Agents keep the messages of their current run; async team runs do not
+    run_messages = entity.run_messages if isinstance(entity, Agent) else None
+    user_message = run_messages.user_message if run_messages is not None else None
+    if user_message is None and message is not None:
+        user_message = Message(role="user", content=message)
+
+    run_response.messages = [user_message] if user_message is not None else []
+    if run_response.content:
+        run_response.messages.append(Message(role="assistant", content=str(run_response.content)))
+    run_response.tools = [tool for tool in run_response.tools or [] if tool.result is not None] or None
+    run_response.event = RunEvent.run_cancelled.value
+
+    entity.memory.add_run(session_id, run_response)
+    entity.write_to_storage(session_id=session_id, user_id=entity.user_id)
+    logger.info(f"Saved cancelled run {run_response.run_id} of {entity.name}")
@@ -1,8 +1,29 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
 
+from agents.pool import agent_pool
+from agents.settings import agent_settings
+from api.routes.agents import Model
 from api.routes.v1_router import v1_router
 from api.settings import api_settings
+from utils.log import logger
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build the pooled agent templates before serving the first request"""
+    if agent_settings.agent_pool_warm_up:
+        try:
+            # Building storages inspects the database; keep it off the event loop
+            await asyncio.to_thread(agent_pool.warm_up, [model.value for model in Model])
+            logger.info(f"Agent pool warmed up: {agent_pool.stats()}")
+        except Exception as e:
+            # Templates are built lazily on first use instead
+            logger.warning(f"Agent pool warm-up failed: {e}")
+    yield
 
 
 def create_app() -> FastAPI:
@@ -15,6 +36,7 @@ def create_app() -> FastAPI:
         docs_url="/docs" if api_settings.docs_enabled else None,
         redoc_url="/redoc" if api_settings.docs_enabled else None,
         openapi_url="/openapi.json" if api_settings.docs_enabled else None,
+        lifespan=lifespan,
     )
 
     # Add v1 router
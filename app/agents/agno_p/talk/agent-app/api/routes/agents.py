@@ -1,12 +1,17 @@
 from enum import Enum
-from typing import AsyncGenerator, List, Optional
+from typing import List, Optional
+from uuid import uuid4
 
 from agno.agent import Agent
-from fastapi import APIRouter, HTTPException, status
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 
-from agents.operator import AgentType, get_agent, get_available_agents
+from agents.operator import AgentType, get_available_agents
+from agents.pool import agent_pool
+from api.cancellation import run_until_disconnected
+from api.streaming import SSE_HEADERS, stream_run
+from db.storage import prime_session
 from utils.log import logger
 
 ######################################################
@@ -32,25 +37,6 @@ async def list_agents():
     return get_available_agents()
 
 
-async def chat_response_streamer(agent: Agent, message: str) -> AsyncGenerator:
-    """
-    Stream agent responses chunk by chunk.
-
-    Args:
-        agent: The agent instance to interact with
-        message: User message to process
-
-    Yields:
-        Text chunks from the agent response
-    """
-    run_response = await agent.arun(message, stream=True)
-    async for chunk in run_response:
-        # chunk.content only contains the text response from the Agent.
-        # For advanced use cases, we should yield the entire chunk
-        # that contains the tool calls and intermediate steps.
-        yield chunk.content
-
-
 class RunRequest(BaseModel):
     """Request model for an running an agent"""
 
@@ -62,7 +48,7 @@ class RunRequest(BaseModel):
 
 
 @agents_router.post("/{agent_id}/runs", status_code=status.HTTP_200_OK)
-async def run_agent(agent_id: AgentType, body: RunRequest):
+async def run_agent(agent_id: AgentType, body: RunRequest, request: Request):
     """
     Sends a message to a specific agent and returns the response.
 
@@ -71,27 +57,36 @@ async def run_agent(agent_id: AgentType, body: RunRequest):
         body: Request parameters including the message
 
     Returns:
-        Either a streaming response or the complete agent response
+        Either an SSE stream of run events (see api.streaming) or the complete agent response
     """
     logger.debug(f"RunRequest: {body}")
 
     try:
-        agent: Agent = get_agent(
-            model_id=body.model.value,
+        # Bound from a pooled template instead of building storage and tools per request
+        agent: Agent = agent_pool.get(
             agent_id=agent_id,
+            model_id=body.model.value,
             user_id=body.user_id,
-            session_id=body.session_id,
+            # Known up front so the session can be loaded before the run
+            session_id=body.session_id or str(uuid4()),
         )
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Agent not found: {str(e)}")
 
+    # Load the session asynchronously; arun would otherwise read it on the event loop
+    await prime_session(agent, new=body.session_id is None)
+
     if body.stream:
         return StreamingResponse(
-            chat_response_streamer(agent, body.message),
+            stream_run(agent, body.message, request),
             media_type="text/event-stream",
+            headers=SSE_HEADERS,
         )
     else:
-        response = await agent.arun(body.message, stream=False)
+        response = await run_until_disconnected(agent, body.message, request)
+        if response is None:
+            # The client went away and the run was cancelled; nobody reads this
+            return Response(status_code=499)
         # response.content only contains the text response from the Agent.
         # For advanced use cases, we should yield the entire response
         # that contains the tool calls and intermediate steps.
@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 
+from db.session import get_pool_stats
 from utils.dttm import current_utc_str
 
 ######################################################
@@ -19,3 +20,16 @@ def get_health():
         "path": "/health",
         "utc": current_utc_str(),
     }
+
+
+@status_router.get("/health/db")
+def get_db_health():
+    """Report utilization of the shared database connection pool"""
+
+    return {
+        "status": "success",
+        "router": "status",
+        "path": "/health/db",
+        "pool": get_pool_stats(),
+        "utc": current_utc_str(),
+    }
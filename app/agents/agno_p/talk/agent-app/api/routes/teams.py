@@ -1,12 +1,16 @@
 from enum import Enum
-from typing import AsyncGenerator, List, Optional
+from typing import List, Optional
+from uuid import uuid4
 
 from agno.team import Team
-from fastapi import APIRouter, HTTPException, status
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 from teams.operator import TeamType, get_available_teams, get_team
 
+from api.cancellation import run_until_disconnected
+from api.streaming import SSE_HEADERS, stream_run
+from db.storage import prime_session
 from utils.log import logger
 
 ######################################################
@@ -31,23 +35,6 @@ async def list_teams():
     return get_available_teams()
 
 
-async def chat_response_streamer(team: Team, message: str) -> AsyncGenerator:
-    """
-    Stream team responses chunk by chunk.
-    Args:
-        team: The team instance to interact with
-        message: User message to process
-    Yields:
-        Text chunks from the team response
-    """
-    run_response = await team.arun(message, stream=True)
-    async for chunk in run_response:
-        # chunk.content only contains the text response from the Agent.
-        # For advanced use cases, we should yield the entire chunk
-        # that contains the tool calls and intermediate steps.
-        yield chunk.content
-
-
 class RunRequest(BaseModel):
     """Request model for an running an team"""
 
@@ -59,14 +46,14 @@ class RunRequest(BaseModel):
 
 
 @teams_router.post("/{team_id}/runs", status_code=status.HTTP_200_OK)
-async def run_team(team_id: TeamType, body: RunRequest):
+async def run_team(team_id: TeamType, body: RunRequest, request: Request):
     """
     Sends a message to a specific team and returns the response.
     Args:
         team_id: The ID of the team to interact with
         body: Request parameters including the message
     Returns:
-        Either a streaming response or the complete team response
+        Either an SSE stream of run events (see api.streaming) or the complete team response
     """
     logger.debug(f"RunRequest: {body}")
 
@@ -75,18 +62,26 @@ async def run_team(team_id: TeamType, body: RunRequest):
             model_id=body.model.value,
             team_id=team_id,
             user_id=body.user_id,
-            session_id=body.session_id,
+            # Known up front so the session can be loaded before the run
+            session_id=body.session_id or str(uuid4()),
         )
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Team not found: {str(e)}")
 
+    # Load the session asynchronously; arun would otherwise read it on the event loop
+    await prime_session(team, new=body.session_id is None)
+
     if body.stream:
         return StreamingResponse(
-            chat_response_streamer(team, body.message),
+            stream_run(team, body.message, request),
             media_type="text/event-stream",
+            headers=SSE_HEADERS,
         )
     else:
-        response = await team.arun(body.message, stream=False)
+        response = await run_until_disconnected(team, body.message, request)
+        if response is None:
+            # The client went away and the run was cancelled; nobody reads this
+            return Response(status_code=499)
         # response.content only contains the text response from the Agent.
         # For advanced use cases, we should yield the entire response
         # that contains the tool calls and intermediate steps.
@@ -22,6 +22,10 @@ class ApiSettings(BaseSettings):
     # Set to False to disable docs at /docs and /redoc
     docs_enabled: bool = True
 
+    # Seconds without an event before a run stream sends an SSE heartbeat
+    # comment. Keeps proxies from closing idle streams during long tool calls.
+    stream_heartbeat_seconds: float = 15
+
     # Cors origin list to allow requests from.
     # This list is set using the set_cors_origin_list validator
     # which uses the runtime_env variable to set the
@@ -0,0 +1,188 @@
+import asyncio
+import json
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, AsyncIterator, Dict, List, Set, Union
+
+from agno.agent import Agent
+from agno.models.response import ToolExecution
+from agno.run.response import RunEvent, RunResponse
+from agno.run.team import TeamRunResponse
+from agno.team import Team
+from fastapi import Request
+
+from api.cancellation import save_cancelled_run, wait_for_disconnect
+from api.settings import api_settings
+from db.storage import SessionWriteError, deferred_session_writes, flush_session
+from utils.log import logger
+
+# Headers for run streams: never cached, and not buffered by nginx
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+# SSE comment line; ignored by EventSource clients
+HEARTBEAT = ": heartbeat\n\n"
+# Events buffered for a slow client before the run waits for it
+STREAM_QUEUE_SIZE = 64
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Frame ``data`` as one SSE event with a single-line JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def format_tool(tool: ToolExecution, completed: bool = False) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {
+        "tool_call_id": tool.tool_call_id,
+        "tool_name": tool.tool_name,
+        "tool_args": tool.tool_args,
+    }
+    if completed:
+        payload.update(
+            result=tool.result,
+            error=bool(tool.tool_call_error),
+            time=tool.metrics.time if tool.metrics is not None else None,
+        )
+    return payload
+
+
+def format_member_response(team: Team, response: Union[RunResponse, TeamRunResponse]) -> Dict[str, Any]:
+    member_id = response.team_id if isinstance(response, TeamRunResponse) else response.agent_id
+    names = {getattr(m, "agent_id", None) or getattr(m, "team_id", None): m.name for m in team.members}
+    return {
+        "member_id": member_id,
+        "name": names.get(member_id),
+        "run_id": response.run_id,
+        "content": response.content,
+        "tools": [tool.tool_name for tool in response.tools or []],
+        "metrics": response.metrics,
+    }
+
+
+async def run_events(entity: Union[Agent, Team], message: str) -> AsyncIterator[str]:
+    """
+    Run an agent or team and yield the run as SSE events.
+
+    Events, in order: ``run_started``; then ``content`` deltas, ``tool_started``
+    and ``tool_completed`` as they happen, and ``member_response`` whenever a
+    team member finishes; then ``metrics`` and ``done`` once the run completes.
+
+    Args:
+        entity: The agent or team to run
+        message: User message to process
+
+    Yields:
+        SSE-framed events
+    """
+    tools_started: Set[str] = set()
+    tools_completed: Set[str] = set()
+    members_sent = 0
+
+    def new_member_responses() -> List[Union[RunResponse, TeamRunResponse]]:
+        nonlocal members_sent
+        # Members run inside the team's tool calls; their responses are collected on the team run
+        member_responses = getattr(entity.run_response, "member_responses", None) or []
+        new, members_sent = member_responses[members_sent:], len(member_responses)
+        return new
+
+    # Closed explicitly so a cancelled run drops its model stream right away
+    async with aclosing(await entity.arun(message, stream=True, stream_intermediate_steps=True)) as run_response:
+        async for chunk in run_response:
+            if chunk.event == RunEvent.run_started:
+                yield format_sse("run_started", {"run_id": chunk.run_id, "session_id": chunk.session_id})
+            elif chunk.event == RunEvent.run_response:
+                if chunk.content:
+                    yield format_sse("content", {"content": chunk.content})
+            elif chunk.event in (RunEvent.tool_call_started, RunEvent.tool_call_completed):
+                # Tool events carry every tool call of the run so far
+                for tool in chunk.tools or []:
+                    key = tool.tool_call_id or tool.tool_name
+                    if key not in tools_started:
+                        tools_started.add(key)
+                        yield format_sse("tool_started", format_tool(tool))
+                    finished = tool.result is not None or tool.tool_call_error
+                    if chunk.event == RunEvent.tool_call_completed and finished and key not in tools_completed:
+                        tools_completed.add(key)
+                        yield format_sse("tool_completed", format_tool(tool, completed=True))
+                if chunk.event == RunEvent.tool_call_completed:
+                    for member_response in new_member_responses():
+                        yield format_sse("member_response", format_member_response(entity, member_response))
+
+    for member_response in new_member_responses():
+        yield format_sse("member_response", format_member_response(entity, member_response))
+
+    # The run only recorded its session; done is sent once it is written
+    await flush_session(entity)
+    final_response = entity.run_response
+    yield format_sse("metrics", final_response.metrics or {})
+    yield format_sse(
+        "done", {"run_id": final_response.run_id, "session_id": final_response.session_id, "status": "completed"}
+    )
+
+
+async def stream_run(entity: Union[Agent, Team], message: str, request: Request) -> AsyncGenerator[str, None]:
+    """
+    Stream a run as SSE events with heartbeats, cancelling the run when the client goes away.
+
+    The run is consumed by its own task, so heartbeats keep flowing while it
+    waits on the model or a tool. A second task waits for the client to
+    disconnect (see ``wait_for_disconnect``); as soon as it does, or the
+    response is closed or cancelled by the server, the run task is cancelled
+    instead of being left to finish with no one listening. What it generated until then is saved to the
+    session (see ``save_cancelled_run``).
+
+    Args:
+        entity: The agent or team to run
+        message: User message to process
+        request: The request being answered, used to detect a disconnect
+
+    Yields:
+        SSE-framed events and heartbeat comments; the stream ends after ``done`` or ``error``
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+
+    async def produce() -> None:
+        # Finished, failed or cancelled, the run's session is written by flush_session below
+        with deferred_session_writes():
+            try:
+                async with aclosing(run_events(entity, message)) as events:
+                    async for event in events:
+                        await queue.put(event)
+            except asyncio.CancelledError:
+                try:
+                    await save_cancelled_run(entity, message)
+                except SessionWriteError as write_error:
+                    logger.error(str(write_error))
+                raise
+            except Exception as e:
+                logger.error(f"Run of {entity.name} failed: {e}")
+                await queue.put(format_sse("error", {"error": str(e)}))
+                # Keep what the failed run stored, e.g. a session it created
+                try:
+                    await flush_session(entity)
+                except SessionWriteError as write_error:
+                    logger.error(str(write_error))
+        await queue.put(None)
+
+    heartbeat_seconds = api_settings.stream_heartbeat_seconds
+    run_task = asyncio.create_task(produce())
+    disconnect_task = asyncio.create_task(wait_for_disconnect(request))
+    next_event = asyncio.ensure_future(queue.get())
+    try:
+        while True:
+            done, _ = await asyncio.wait(
+                {next_event, disconnect_task}, timeout=heartbeat_seconds, return_when=asyncio.FIRST_COMPLETED
+            )
+            if disconnect_task in done:
+                return
+            if not done:
+                yield HEARTBEAT
+                continue
+            event = next_event.result()
+            if event is None:
+                return
+            next_event = asyncio.ensure_future(queue.get())
+            yield event
+    finally:
+        disconnect_task.cancel()
+        next_event.cancel()
+        if not run_task.done():
+            logger.info(f"Client disconnected, cancelling run of {entity.name}")
+            run_task.cancel()
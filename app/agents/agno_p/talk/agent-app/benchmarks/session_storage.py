@@ -0,0 +1,143 @@
+"""Session storage benchmark: concurrent run throughput, sync PostgresStorage vs AsyncPostgresStorage.
+
+Replays the storage traffic of an agent run (read the session, wait for the
+model, upsert the grown session) from many concurrent runs on one event
+loop, first through agno's PostgresStorage ("before") and then through
+AsyncPostgresStorage as the /runs routes use it ("after": prime, deferred
+upsert, flush), and reports runs/s, run latency and how long the event loop
+was blocked. Uses the database configured for the app:
+
+    python -m benchmarks.session_storage --concurrency 1 16 64 --runs 400
+    python -m benchmarks.session_storage --session-kb 512 --model-ms 200
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from typing import Dict, List
+
+from agno.storage.postgres import PostgresStorage
+from agno.storage.session.agent import AgentSession
+
+from db.session import db_engine, get_pool_stats
+from db.storage import AsyncPostgresStorage, deferred_session_writes
+
+TABLE_NAME = "bench_sessions"
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def make_session(session_id: str, kb: int) -> AgentSession:
+    # Session memory grows with every run; model it as stored messages
+    message = {"role": "assistant", "content": "x" * 1000}
+    return AgentSession(
+        session_id=session_id,
+        agent_id="bench",
+        user_id="bench",
+        memory={"runs": [], "messages": [message] * kb},
+        agent_data={"name": "bench"},
+        session_data={},
+    )
+
+
+async def monitor_loop(stats: Dict[str, float], interval: float = 0.005, threshold: float = 0.002) -> None:
+    """Add up how late a periodic wakeup fires; lag above ``threshold`` means the loop was blocked."""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - expected)
+        stats["max_lag"] = max(stats["max_lag"], lag)
+        if lag > threshold:
+            stats["blocked"] += lag
+
+
+async def run_level(storage: PostgresStorage, concurrency: int, runs: int, sessions: int, model_ms: float) -> Dict:
+    latencies: List[float] = []
+    counter = itertools.count()
+    loop_stats = {"max_lag": 0.0, "blocked": 0.0}
+
+    async def worker() -> None:
+        while (n := next(counter)) < runs:
+            session_id = f"bench-{n % sessions}"
+            start = time.perf_counter()
+            if isinstance(storage, AsyncPostgresStorage):
+                await storage.prime(session_id)
+            session = storage.read(session_id=session_id)
+            # Streaming from the model; the loop is free unless storage blocks it
+            await asyncio.sleep(model_ms / 1000)
+            session.memory["runs"] = session.memory.get("runs", [])[-9:] + [{"run": n}]
+            if isinstance(storage, AsyncPostgresStorage):
+                # As the /runs routes do: the run ends once flush_session has written its session
+                with deferred_session_writes():
+                    storage.upsert(session)
+                    await storage.flush(session_id)
+            else:
+                storage.upsert(session)
+            latencies.append(time.perf_counter() - start)
+
+    monitor = asyncio.create_task(monitor_loop(loop_stats))
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    monitor.cancel()
+
+    return {
+        "concurrency": concurrency,
+        "runs_per_second": runs / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "loop_blocked_ms": loop_stats["blocked"] * 1000,
+        "loop_max_lag_ms": loop_stats["max_lag"] * 1000,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--runs", type=int, default=400, help="runs per level")
+    parser.add_argument("--sessions", type=int, default=32, help="distinct sessions the runs spread over")
+    parser.add_argument("--session-kb", type=int, default=128, help="approximate stored session size")
+    parser.add_argument("--model-ms", type=float, default=100, help="simulated model time per run")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    storages = {
+        "before": PostgresStorage(table_name=TABLE_NAME, db_engine=db_engine),
+        "after": AsyncPostgresStorage(table_name=TABLE_NAME),
+    }
+    seed = storages["before"]
+    seed.drop()
+    seed.create()
+    for n in range(args.sessions):
+        seed.upsert(make_session(f"bench-{n}", args.session_kb))
+
+    results = []
+    for concurrency in args.concurrency:
+        for name, storage in storages.items():
+            result = {"storage": name, **await run_level(storage, concurrency, args.runs, args.sessions, args.model_ms)}
+            results.append(result)
+            print(
+                f"{name:<6} c={concurrency:>4} runs/s={result['runs_per_second']:>7.1f}"
+                f" p50={result['p50_ms']:>7.1f}ms p99={result['p99_ms']:>7.1f}ms"
+                f" loop_blocked={result['loop_blocked_ms']:>7.0f}ms"
+                f" max_lag={result['loop_max_lag_ms']:>6.1f}ms",
+                flush=True,
+            )
+
+    seed.drop()
+    print(f"pool: {get_pool_stats()}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
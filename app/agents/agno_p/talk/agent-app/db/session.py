@@ -1,17 +1,76 @@
-from typing import Generator
+from threading import Lock
+from typing import Dict, Generator
 
+from sqlalchemy import event
 from sqlalchemy.engine import Engine, create_engine
 from sqlalchemy.orm import Session, sessionmaker
 
 from db.settings import db_settings
 
-# Create SQLAlchemy Engine using a database URL
+# Create SQLAlchemy Engine using a database URL.
+# This is the only engine in the app: pass it as db_engine to every agno
+# storage and vector db so they share one connection pool.
 db_url: str = db_settings.get_db_url()
-db_engine: Engine = create_engine(db_url, pool_pre_ping=True)
+db_engine: Engine = create_engine(
+    db_url,
+    pool_size=db_settings.db_pool_size,
+    max_overflow=db_settings.db_max_overflow,
+    pool_timeout=db_settings.db_pool_timeout,
+    pool_recycle=db_settings.db_pool_recycle,
+    pool_pre_ping=db_settings.db_pool_pre_ping,
+)
 
 # Create a SessionLocal class
 SessionLocal: sessionmaker[Session] = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
 
+# Checkout counters for sizing the pool
+_pool_lock = Lock()
+_pool_counters: Dict[str, int] = {"checked_out": 0, "peak_checked_out": 0, "checkouts": 0, "connects": 0}
+
+
+@event.listens_for(db_engine, "connect")
+def _on_connect(dbapi_connection, connection_record) -> None:
+    with _pool_lock:
+        _pool_counters["connects"] += 1
+
+
+@event.listens_for(db_engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+    with _pool_lock:
+        _pool_counters["checkouts"] += 1
+        _pool_counters["checked_out"] += 1
+        _pool_counters["peak_checked_out"] = max(_pool_counters["peak_checked_out"], _pool_counters["checked_out"])
+
+
+@event.listens_for(db_engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record) -> None:
+    with _pool_lock:
+        _pool_counters["checked_out"] -= 1
+
+
+def get_pool_stats() -> Dict[str, int]:
+    """
+    Utilization of the shared connection pool in this process.
+
+    Returns:
+        Dict[str, int]: Configured limits, current usage and counters since startup.
+    """
+    pool = db_engine.pool
+    with _pool_lock:
+        counters = dict(_pool_counters)
+    return {
+        "pool_size": db_settings.db_pool_size,
+        "max_overflow": db_settings.db_max_overflow,
+        "max_connections": db_settings.db_pool_size + db_settings.db_max_overflow,
+        # Connections currently open, idle in the pool and lent out
+        "open": pool.checkedin() + pool.checkedout(),
+        "idle": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "peak_checked_out": counters["peak_checked_out"],
+        "checkouts": counters["checkouts"],
+        "connects": counters["connects"],
+    }
+
 
 def get_db() -> Generator[Session, None, None]:
     """
@@ -17,6 +17,16 @@ class DbSettings(BaseSettings):
     db_pass: Optional[str] = None
     db_database: Optional[str] = None
     db_driver: str = "postgresql+psycopg"
+    # Connection pool shared by the API and every agent, team and workflow storage.
+    # Each uvicorn worker holds up to db_pool_size + db_max_overflow connections.
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    # Seconds to wait for a connection before raising
+    db_pool_timeout: float = 30
+    # Replace connections older than this many seconds (-1 disables)
+    db_pool_recycle: int = 1800
+    # Test connections on checkout so server-side disconnects don't surface as errors
+    db_pool_pre_ping: bool = True
     # Create/Upgrade database on startup using alembic
     migrate_db: bool = False
 
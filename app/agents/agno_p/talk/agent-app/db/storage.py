@@ -0,0 +1,163 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from agno.storage.postgres import PostgresStorage
+from agno.storage.session import Session
+from sqlalchemy.dialects import postgresql
+
+from db.session import db_engine
+
+# A primed session is only served to a read this soon after prime()
+PRIME_TTL_SECONDS = 10
+
+# Set by deferred_session_writes() for the runs whose sessions flush_session writes
+_deferring_writes: ContextVar[bool] = ContextVar("deferring_session_writes", default=False)
+
+
+class SessionWriteError(Exception):
+    """A session could not be written to storage."""
+
+
+class AsyncPostgresStorage(PostgresStorage):
+    """
+    PostgresStorage for agent, team and workflow sessions that keeps database I/O off the event loop.
+
+    agno calls ``read()`` and ``upsert()`` synchronously from inside ``arun``, so
+    with the plain storage every run blocks the loop on a SELECT and an
+    INSERT ... ON CONFLICT plus a re-read. Here:
+
+    - ``prime()`` reads a session in a worker thread before the run; the
+      run's first ``read()`` of that session is served from memory.
+    - Inside ``deferred_session_writes()``, ``upsert()`` only records the
+      session and returns it. The caller then awaits ``flush()`` (see
+      ``flush_session``), which writes it in a worker thread with the same
+      INSERT ... ON CONFLICT as PostgresStorage.upsert, without the re-read,
+      and raises ``SessionWriteError`` if that fails. A run that upserts a
+      session more than once is written once.
+
+    Everywhere else ``upsert()`` writes through, as PostgresStorage does.
+    Both threads and the rest of the app use the one shared connection pool.
+    """
+
+    # Primed sessions per table. Shared by every instance (and copy) for the
+    # same table, so the storage a run reads through sees the prime.
+    _primed_by_table: Dict[str, Dict[str, Tuple[float, Optional[Session]]]] = {}
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        kwargs.setdefault("db_engine", db_engine)
+        super().__init__(*args, **kwargs)
+        self._primed = AsyncPostgresStorage._primed_by_table.setdefault(f"{self.schema}.{self.table_name}", {})
+        # Sessions upserted in deferred_session_writes() and not written yet, by session id
+        self._unsaved: Dict[str, Session] = {}
+
+    async def prime(self, session_id: str, new: bool = False) -> None:
+        """
+        Load ``session_id`` so the next ``read()`` of it does not touch the database.
+
+        Args:
+            session_id: Session the next run will read
+            new: The session id was just generated, so there is nothing to load
+        """
+        now = time.monotonic()
+        # Drop primes whose run never read them (e.g. it failed first)
+        for stale in [k for k, (primed_at, _) in self._primed.items() if now - primed_at > PRIME_TTL_SECONDS]:
+            del self._primed[stale]
+        session = None if new else await asyncio.to_thread(super().read, session_id)
+        self._primed[session_id] = (now, session)
+
+    def read(self, session_id: str, user_id: Optional[str] = None) -> Optional[Session]:
+        primed = self._primed.pop(session_id, None)
+        if primed is not None and not user_id and time.monotonic() - primed[0] <= PRIME_TTL_SECONDS:
+            return primed[1]
+        return super().read(session_id=session_id, user_id=user_id)
+
+    def upsert(self, session: Session, create_and_retry: bool = True) -> Optional[Session]:
+        if not _deferring_writes.get():
+            return super().upsert(session, create_and_retry=create_and_retry)
+        # Written by flush(); a later upsert of the same session replaces this one
+        self._unsaved[session.session_id] = session
+        return session
+
+    async def flush(self, session_id: str) -> None:
+        """
+        Write the last session upserted for ``session_id``, if it has not been written yet.
+
+        Raises:
+            SessionWriteError: The write failed; the session stays unsaved
+        """
+        session = self._unsaved.get(session_id)
+        if session is None:
+            return
+        try:
+            await asyncio.to_thread(self._write, session)
+        except Exception as e:
+            raise SessionWriteError(f"Could not write session {session_id} to {self.table.name}: {e}") from e
+        # A newer version upserted while this one was written is left for the next flush
+        if self._unsaved.get(session_id) is session:
+            del self._unsaved[session_id]
+
+    def _write(self, session: Session) -> None:
+        # The same INSERT ... ON CONFLICT as PostgresStorage.upsert, over the columns of agno's table,
+        # but raising on failure and without reading the row back
+        if self.auto_upgrade_schema and not self._schema_up_to_date:
+            self.upgrade_schema()
+        values = {
+            column.name: getattr(session, column.name)
+            for column in self.table.columns
+            if column.name not in ("session_id", "created_at", "updated_at")
+        }
+        stmt = postgresql.insert(self.table).values(session_id=session.session_id, **values)
+        # Refer to the inserted row instead of binding every value, some of them large JSON, a second time
+        updates = {name: stmt.excluded[name] for name in values}
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["session_id"], set_=dict(updates, updated_at=int(time.time()))
+        )
+        try:
+            with self.Session() as sess, sess.begin():
+                sess.execute(stmt)
+        except Exception:
+            # Same as the sync path: create a missing table and retry once
+            if self.table_exists():
+                raise
+            self.create()
+            with self.Session() as sess, sess.begin():
+                sess.execute(stmt)
+
+
+@contextmanager
+def deferred_session_writes() -> Iterator[None]:
+    """
+    Hold back the session upserts of runs made in this block until ``flush_session`` writes them.
+
+    Only for callers that flush every run they start, finished, failed or cancelled.
+    Upserts made elsewhere, e.g. by the Playground or the Streamlit pages, are written right away.
+    """
+    token = _deferring_writes.set(True)
+    try:
+        yield
+    finally:
+        _deferring_writes.reset(token)
+
+
+async def prime_session(entity: Any, new: bool = False) -> None:
+    """Prime the storage of an Agent, Team or Workflow for its next run, if it supports it."""
+    storage = getattr(entity, "storage", None)
+    if isinstance(storage, AsyncPostgresStorage) and entity.session_id:
+        await storage.prime(entity.session_id, new=new)
+
+
+async def flush_session(entity: Any) -> None:
+    """
+    Write the sessions an Agent, Team or Workflow run recorded, including those of team members.
+
+    Raises:
+        SessionWriteError: A session could not be written
+    """
+    for member in getattr(entity, "members", None) or []:
+        await flush_session(member)
+    storage = getattr(entity, "storage", None)
+    if isinstance(storage, AsyncPostgresStorage) and entity.session_id:
+        await storage.flush(entity.session_id)
@@ -3,12 +3,12 @@ from typing import Optional
 
 from agno.agent import Agent
 from agno.models.openai import OpenAIChat
-from agno.storage.postgres import PostgresStorage
 from agno.team.team import Team
 from agno.tools.duckduckgo import DuckDuckGoTools
 from agno.tools.yfinance import YFinanceTools
 
-from db.session import db_url
+from db.session import db_engine
+from db.storage import AsyncPostgresStorage
 from teams.settings import team_settings
 
 finance_agent = Agent(
@@ -54,7 +54,7 @@ finance_agent = Agent(
         - Note market uncertainties
         - Mention relevant regulatory concerns
     """),
-    storage=PostgresStorage(table_name="finance_agent", db_url=db_url, auto_upgrade_schema=True),
+    storage=AsyncPostgresStorage(table_name="finance_agent", db_engine=db_engine, auto_upgrade_schema=True),
     add_history_to_messages=True,
     num_history_responses=5,
     add_datetime_to_instructions=True,
@@ -76,7 +76,7 @@ web_agent = Agent(
     ],
     show_tool_calls=True,
     markdown=True,
-    storage=PostgresStorage(table_name="web_agent", db_url=db_url, auto_upgrade_schema=True),
+    storage=AsyncPostgresStorage(table_name="web_agent", db_engine=db_engine, auto_upgrade_schema=True),
 )
 
 
@@ -107,9 +107,9 @@ def get_finance_researcher_team(
         success_criteria="A good financial research report.",
         enable_agentic_context=True,
         expected_output="A good financial research report.",
-        storage=PostgresStorage(
+        storage=AsyncPostgresStorage(
             table_name="finance_researcher_team",
-            db_url=db_url,
+            db_engine=db_engine,
             mode="team",
             auto_upgrade_schema=True,
         ),
@@ -2,10 +2,10 @@ from typing import Optional
 
 from agno.agent import Agent
 from agno.models.openai import OpenAIChat
-from agno.storage.postgres import PostgresStorage
 from agno.team.team import Team
 
-from db.session import db_url
+from db.session import db_engine
+from db.storage import AsyncPostgresStorage
 from teams.settings import team_settings
 
 japanese_agent = Agent(
@@ -99,9 +99,9 @@ def get_multi_language_team(
         markdown=True,
         show_tool_calls=True,
         show_members_responses=True,
-        storage=PostgresStorage(
+        storage=AsyncPostgresStorage(
             table_name="multi_language_team",
-            db_url=db_url,
+            db_engine=db_engine,
             mode="team",
             auto_upgrade_schema=True,
         ),
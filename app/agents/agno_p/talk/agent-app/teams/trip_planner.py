@@ -3,11 +3,11 @@ from typing import Optional
 
 from agno.agent import Agent
 from agno.models.openai import OpenAIChat
-from agno.storage.postgres import PostgresStorage
 from agno.team.team import Team
 from agno.tools.duckduckgo import DuckDuckGoTools
 
-from db.session import db_url
+from db.session import db_engine
+from db.storage import AsyncPostgresStorage
 from teams.settings import team_settings
 
 # Destination Research Agent
@@ -57,7 +57,7 @@ destination_researcher = Agent(
         - Consider different travel styles (budget, luxury, adventure, family)
         - Include practical tips for first-time visitors
     """),
-    storage=PostgresStorage(table_name="destination_researcher", db_url=db_url, auto_upgrade_schema=True),
+    storage=AsyncPostgresStorage(table_name="destination_researcher", db_engine=db_engine, auto_upgrade_schema=True),
     add_history_to_messages=True,
     num_history_responses=3,
     add_datetime_to_instructions=True,
@@ -112,7 +112,7 @@ accommodation_specialist = Agent(
         - Provide backup options for different budgets
         - Include booking tips and insider advice
     """),
-    storage=PostgresStorage(table_name="accommodation_specialist", db_url=db_url, auto_upgrade_schema=True),
+    storage=AsyncPostgresStorage(table_name="accommodation_specialist", db_engine=db_engine, auto_upgrade_schema=True),
     add_history_to_messages=True,
     num_history_responses=3,
     add_datetime_to_instructions=True,
@@ -172,7 +172,7 @@ itinerary_planner = Agent(
         - Include local insider tips and hidden gems
         - Build in flexibility for spontaneous discoveries
     """),
-    storage=PostgresStorage(table_name="itinerary_planner", db_url=db_url, auto_upgrade_schema=True),
+    storage=AsyncPostgresStorage(table_name="itinerary_planner", db_engine=db_engine, auto_upgrade_schema=True),
     add_history_to_messages=True,
     num_history_responses=3,
     add_datetime_to_instructions=True,
@@ -237,7 +237,7 @@ budget_advisor = Agent(
         - Consider local economic factors
         - Balance cost savings with experience quality
     """),
-    storage=PostgresStorage(table_name="budget_advisor", db_url=db_url, auto_upgrade_schema=True),
+    storage=AsyncPostgresStorage(table_name="budget_advisor", db_engine=db_engine, auto_upgrade_schema=True),
     add_history_to_messages=True,
     num_history_responses=3,
     add_datetime_to_instructions=True,
@@ -292,9 +292,9 @@ def get_trip_planner_team(
         success_criteria="A comprehensive and well-organized trip plan that addresses all aspects of travel planning.",
         enable_agentic_context=True,
         expected_output="Detailed trip plans with destination insights, accommodation recommendations, day-by-day itineraries, and budget information.",
-        storage=PostgresStorage(
+        storage=AsyncPostgresStorage(
             table_name="trip_planner_team",
-            db_url=db_url,
+            db_engine=db_engine,
             mode="team",
             auto_upgrade_schema=True,
         ),
@@ -0,0 +1,30 @@
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import text
+
+from db.session import db_engine
+from db.storage import AsyncPostgresStorage
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def database():
+    """The app's database; tests that need it are skipped when it is not running."""
+    try:
+        with db_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception as e:
+        pytest.skip(f"Database not available: {e}")
+    return db_engine
+
+
+@pytest.fixture
+def storage(database):
+    storage = AsyncPostgresStorage(table_name=f"test_sessions_{uuid4().hex[:8]}")
+    yield storage
+    storage.drop()
@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+from agno.agent import Agent
+from agno.memory.v2.memory import Memory
+from agno.models.openai import OpenAIChat
+from agno.models.response import ToolExecution
+from agno.run.response import RunResponse
+
+from api.cancellation import run_until_disconnected, save_cancelled_run, wait_for_disconnect
+from db.storage import SessionWriteError
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeRequest:
+    def __init__(self, *messages):
+        self.messages = list(messages)
+        self.disconnected = asyncio.Event()
+
+    async def receive(self):
+        if self.messages:
+            return self.messages.pop(0)
+        await self.disconnected.wait()
+        return {"type": "http.disconnect"}
+
+
+def make_agent(storage) -> Agent:
+    # The model is never called; runs are scripted by replacing arun
+    return Agent(
+        name="Sage",
+        agent_id="sage",
+        model=OpenAIChat(id="gpt-4o", api_key="test"),
+        memory=Memory(),
+        storage=storage,
+        session_id="s1",
+        user_id="ada",
+    )
+
+
+def partial_run() -> RunResponse:
+    return RunResponse(
+        run_id="r1",
+        session_id="s1",
+        agent_id="sage",
+        content="Half an ans",
+        tools=[
+            ToolExecution(tool_call_id="c1", tool_name="search", result="found"),
+            ToolExecution(tool_call_id="c2", tool_name="search"),
+        ],
+    )
+
+
+def stored_runs(storage):
+    session = storage.read("s1")
+    return session.memory["runs"] if session is not None else None
+
+
+async def test_cancelled_run_is_written_to_the_session(storage):
+    agent = make_agent(storage)
+    agent.run_response = partial_run()
+
+    await save_cancelled_run(agent, "What is the answer?")
+
+    [run] = stored_runs(storage)
+    assert run["event"] == "RunCancelled"
+    assert [(m["role"], m["content"]) for m in run["messages"]] == [
+        ("user", "What is the answer?"),
+        ("assistant", "Half an ans"),
+    ]
+    # The unfinished tool call is dropped
+    assert [tool["tool_call_id"] for tool in run["tools"]] == ["c1"]
+
+
+async def test_failed_write_of_a_cancelled_run_raises(storage, monkeypatch):
+    def fail(session):
+        raise RuntimeError("database down")
+
+    monkeypatch.setattr(storage, "_write", fail)
+    agent = make_agent(storage)
+    agent.run_response = partial_run()
+
+    with pytest.raises(SessionWriteError, match="database down"):
+        await save_cancelled_run(agent, "What is the answer?")
+
+
+async def test_disconnect_cancels_and_saves_the_run(storage):
+    agent = make_agent(storage)
+    request = FakeRequest()
+    started = asyncio.Event()
+
+    async def arun(message, stream=False):
+        agent.run_response = partial_run()
+        started.set()
+        await asyncio.Event().wait()
+
+    agent.arun = arun
+    running = asyncio.create_task(run_until_disconnected(agent, "What is the answer?", request))
+    await started.wait()
+    request.disconnected.set()
+
+    assert await asyncio.wait_for(running, timeout=1) is None
+    assert [run["event"] for run in stored_runs(storage)] == ["RunCancelled"]
+
+
+async def test_finished_run_is_returned_and_written(storage):
+    agent = make_agent(storage)
+
+    async def arun(message, stream=False):
+        response = RunResponse(run_id="r1", session_id="s1", agent_id="sage", content="42")
+        agent.memory.add_run("s1", response)
+        agent.write_to_storage(session_id="s1", user_id="ada")
+        return response
+
+    agent.arun = arun
+
+    response = await run_until_disconnected(agent, "What is the answer?", FakeRequest())
+
+    assert response.content == "42"
+    assert [run["content"] for run in stored_runs(storage)] == ["42"]
+
+
+async def test_wait_for_disconnect_skips_other_messages():
+    request = FakeRequest({"type": "http.request", "body": b"", "more_body": False})
+    waiting = asyncio.create_task(wait_for_disconnect(request))
+    await asyncio.sleep(0)
+    assert not waiting.done()
+
+    request.disconnected.set()
+
+    await asyncio.wait_for(waiting, timeout=1)
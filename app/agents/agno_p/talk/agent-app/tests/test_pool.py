@@ -0,0 +1,116 @@
+import pytest
+from agno.agent import Agent
+from agno.memory.v2.memory import Memory
+from agno.models.openai import OpenAIChat
+
+import agents.pool
+from agents.operator import AgentType
+from agents.pool import AgentPool, bind_agent
+
+
+class Shared:
+    """Stands in for the storage and knowledge base, which own database engines."""
+
+
+def build_agent(model_id: str = "gpt-4o", agent_id=None, **kwargs) -> Agent:
+    return Agent(
+        name=agent_id.value,
+        agent_id=agent_id.value,
+        model=OpenAIChat(id=model_id, api_key="test"),
+        memory=Memory(),
+        storage=Shared(),
+        knowledge=Shared(),
+        instructions=["Be brief."],
+    )
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    built = []
+
+    def get_agent(model_id, agent_id):
+        built.append((agent_id, model_id))
+        return build_agent(model_id=model_id, agent_id=agent_id)
+
+    monkeypatch.setattr(agents.pool, "get_agent", get_agent)
+    return built
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000.0]
+    monkeypatch.setattr(agents.pool, "monotonic", lambda: now[0])
+    return now
+
+
+def test_templates_are_built_once(builds):
+    pool = AgentPool(max_size=4, idle_seconds=0)
+
+    first = pool.get(AgentType.SAGE, "gpt-4o", user_id="ada", session_id="s1")
+    second = pool.get(AgentType.SAGE, "gpt-4o", user_id="bob", session_id="s2")
+
+    assert builds == [(AgentType.SAGE, "gpt-4o")]
+    assert first is not second
+    assert pool.stats() == {"templates": 1, "max_size": 4, "hits": 1, "misses": 1}
+
+
+def test_least_recently_used_template_is_dropped(builds):
+    pool = AgentPool(max_size=2, idle_seconds=0)
+    pool.template(AgentType.SAGE, "gpt-4o")
+    pool.template(AgentType.SCHOLAR, "gpt-4o")
+    pool.template(AgentType.SAGE, "gpt-4o")
+
+    pool.template(AgentType.TRIP_ADVISOR, "gpt-4o")
+    pool.template(AgentType.SAGE, "gpt-4o")
+    pool.template(AgentType.SCHOLAR, "gpt-4o")
+
+    assert builds == [
+        (AgentType.SAGE, "gpt-4o"),
+        (AgentType.SCHOLAR, "gpt-4o"),
+        (AgentType.TRIP_ADVISOR, "gpt-4o"),
+        (AgentType.SCHOLAR, "gpt-4o"),
+    ]
+
+
+def test_idle_templates_are_dropped(builds, clock):
+    pool = AgentPool(max_size=4, idle_seconds=60)
+    pool.template(AgentType.SAGE, "gpt-4o")
+    pool.template(AgentType.SCHOLAR, "gpt-4o")
+
+    clock[0] += 45
+    pool.template(AgentType.SAGE, "gpt-4o")
+    clock[0] += 45
+    pool.template(AgentType.SAGE, "gpt-4o")
+
+    assert pool.stats()["templates"] == 1
+    assert builds == [(AgentType.SAGE, "gpt-4o"), (AgentType.SCHOLAR, "gpt-4o")]
+
+
+def test_warm_up_builds_every_agent_and_model(builds):
+    pool = AgentPool(max_size=10, idle_seconds=0)
+
+    pool.warm_up(["gpt-4o", "gpt-4o-mini"])
+
+    assert len(builds) == 2 * len(AgentType)
+    assert pool.stats()["misses"] == 2 * len(AgentType)
+
+
+def test_bound_agents_share_storage_but_not_run_state():
+    template = build_agent(agent_id=AgentType.SAGE)
+
+    agent = bind_agent(template, user_id="ada", session_id="s1")
+    other = bind_agent(template, user_id="bob", session_id="s2")
+
+    assert agent.storage is template.storage and agent.knowledge is template.knowledge
+    assert agent.model is not template.model and agent.model is not other.model
+    assert agent.memory is not template.memory and agent.memory is not other.memory
+    assert agent.instructions == template.instructions and agent.instructions is not template.instructions
+    assert (agent.user_id, agent.session_id) == ("ada", "s1")
+    assert agent.additional_context == "<context>You are interacting with the user: ada</context>"
+    assert template.session_id is None and template.user_id is None
+
+
+def test_anonymous_runs_get_no_user_context():
+    agent = bind_agent(build_agent(agent_id=AgentType.SAGE))
+
+    assert agent.additional_context == ""
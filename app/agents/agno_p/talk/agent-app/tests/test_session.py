@@ -0,0 +1,32 @@
+from sqlalchemy import text
+
+from db.session import db_engine, get_db, get_pool_stats
+from db.settings import db_settings
+
+
+def test_pool_stats_track_checkouts(database):
+    before = get_pool_stats()
+
+    with db_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        during = get_pool_stats()
+    after = get_pool_stats()
+
+    assert during["checked_out"] == before["checked_out"] + 1
+    assert during["peak_checked_out"] >= during["checked_out"]
+    assert during["checkouts"] == before["checkouts"] + 1
+    assert after["checked_out"] == before["checked_out"]
+    assert after["idle"] >= 1
+    assert after["max_connections"] == db_settings.db_pool_size + db_settings.db_max_overflow
+
+
+def test_get_db_returns_its_connection_to_the_pool(database):
+    checked_out = get_pool_stats()["checked_out"]
+    sessions = get_db()
+
+    db = next(sessions)
+    db.execute(text("SELECT 1"))
+    assert get_pool_stats()["checked_out"] == checked_out + 1
+    sessions.close()
+
+    assert get_pool_stats()["checked_out"] == checked_out
@@ -0,0 +1,153 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from agno.storage.postgres import PostgresStorage
+from agno.storage.session.agent import AgentSession
+
+from db.storage import SessionWriteError, deferred_session_writes, flush_session, prime_session
+
+pytestmark = pytest.mark.anyio
+
+
+def make_session(session_id: str, runs: int = 1) -> AgentSession:
+    return AgentSession(
+        session_id=session_id,
+        agent_id="sage",
+        user_id="ada",
+        memory={"runs": [{"run_id": str(n)} for n in range(runs)]},
+        agent_data={"name": "Sage"},
+        session_data={"session_name": "test"},
+        extra_data=None,
+    )
+
+
+def stored(storage, session_id: str):
+    """The session as another process sees it: through a plain PostgresStorage."""
+    return PostgresStorage(table_name=storage.table_name, db_engine=storage.db_engine).read(session_id)
+
+
+@pytest.fixture
+def deferred():
+    with deferred_session_writes():
+        yield
+
+
+async def test_deferred_upsert_writes_only_on_flush(storage, deferred):
+    session = make_session("s1")
+
+    assert storage.upsert(session) is session
+    assert stored(storage, "s1") is None
+
+    await storage.flush("s1")
+
+    row = stored(storage, "s1")
+    assert (row.agent_id, row.user_id, row.memory, row.agent_data) == (
+        "sage",
+        "ada",
+        session.memory,
+        session.agent_data,
+    )
+    assert row.created_at is not None
+
+
+async def test_flush_writes_the_latest_upsert(storage, deferred):
+    storage.upsert(make_session("s1", runs=1))
+    storage.upsert(make_session("s1", runs=2))
+
+    await storage.flush("s1")
+    await storage.flush("s1")
+
+    assert len(stored(storage, "s1").memory["runs"]) == 2
+
+
+async def test_failed_write_raises_and_keeps_the_session(storage, deferred):
+    storage.create()
+    broken = make_session("s1")
+    broken.memory = {"not json": object()}
+    storage.upsert(broken)
+
+    with pytest.raises(SessionWriteError, match="s1"):
+        await storage.flush("s1")
+    assert stored(storage, "s1") is None
+
+    # A later upsert of the session replaces the one that failed
+    storage.upsert(make_session("s1"))
+    await storage.flush("s1")
+    assert stored(storage, "s1") is not None
+
+
+async def test_flush_creates_a_missing_table(storage, deferred):
+    assert not storage.table_exists()
+    storage.upsert(make_session("s1"))
+
+    await storage.flush("s1")
+
+    assert stored(storage, "s1") is not None
+
+
+async def test_upsert_during_a_flush_is_not_lost(storage, deferred):
+    storage.create()
+    storage.upsert(make_session("s1", runs=1))
+
+    flushing = asyncio.create_task(storage.flush("s1"))
+    await asyncio.sleep(0)
+    storage.upsert(make_session("s1", runs=3))
+    await flushing
+    await storage.flush("s1")
+
+    assert len(stored(storage, "s1").memory["runs"]) == 3
+
+
+async def test_primed_session_is_read_from_memory(storage):
+    storage.upsert(make_session("s1"))
+    await storage.prime("s1")
+    storage.drop()
+
+    # Served from the prime even though the table is gone, and only once
+    assert storage.read("s1").memory == make_session("s1").memory
+    assert storage.read("s1") is None
+
+
+async def test_prime_of_a_new_session_skips_the_read(storage):
+    await storage.prime("new", new=True)
+
+    assert storage.read("new") is None
+
+
+async def test_upsert_writes_right_away_unless_deferred(storage):
+    # As for runs made by the Playground and the Streamlit pages, which never flush
+    written = storage.upsert(make_session("s1"))
+
+    assert written is not None and written.created_at is not None
+    assert stored(storage, "s1") is not None
+    assert storage._unsaved == {}
+
+
+async def test_deferral_ends_with_its_block(storage):
+    storage.create()
+    with deferred_session_writes():
+        storage.upsert(make_session("s1"))
+    storage.upsert(make_session("s2"))
+
+    assert stored(storage, "s1") is None
+    assert stored(storage, "s2") is not None
+
+
+async def test_flush_session_covers_team_members(storage, deferred):
+    storage.upsert(make_session("team"))
+    storage.upsert(make_session("member"))
+    member = SimpleNamespace(storage=storage, session_id="member")
+    team = SimpleNamespace(storage=storage, session_id="team", members=[member])
+
+    await flush_session(team)
+
+    assert stored(storage, "team") is not None
+    assert stored(storage, "member") is not None
+
+
+async def test_helpers_ignore_other_storages():
+    entity = SimpleNamespace(storage=None, session_id="s1")
+
+    await prime_session(entity)
+    await flush_session(entity)
@@ -0,0 +1,174 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from agno.models.response import ToolExecution
+from agno.run.response import RunEvent, RunResponse
+from agno.run.team import TeamRunResponse
+
+from api.settings import api_settings
+from api.streaming import HEARTBEAT, format_sse, run_events, stream_run
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeEntity:
+    """Plays a scripted run; each step is a chunk to yield, or a callable to await in between."""
+
+    def __init__(self, *steps, run_response=None, members=()):
+        self.name = "fake"
+        self.storage = None
+        self.memory = None
+        self.session_id = "s1"
+        self.members = list(members)
+        self.run_response = run_response or RunResponse(run_id="r1", session_id="s1", metrics={"time": [1.0]})
+        self.steps = steps
+        self.cancelled = False
+
+    async def arun(self, message, stream=False, stream_intermediate_steps=False):
+        async def chunks():
+            try:
+                for step in self.steps:
+                    if callable(step):
+                        await step()
+                    else:
+                        yield step
+            except asyncio.CancelledError:
+                self.cancelled = True
+                raise
+
+        return chunks()
+
+
+class FakeRequest:
+    def __init__(self):
+        self.disconnected = asyncio.Event()
+
+    async def receive(self):
+        await self.disconnected.wait()
+        return {"type": "http.disconnect"}
+
+
+def chunk(event: RunEvent, **fields) -> RunResponse:
+    return RunResponse(event=event.value, run_id="r1", session_id="s1", **fields)
+
+
+def parse_sse(frames):
+    """Split SSE frames into (event, data) pairs; heartbeat comments become ("heartbeat", None)."""
+    events = []
+    for frame in frames:
+        assert frame.endswith("\n\n")
+        if frame == HEARTBEAT:
+            events.append(("heartbeat", None))
+            continue
+        event_line, data_line = frame[:-2].split("\n")
+        assert event_line.startswith("event: ") and data_line.startswith("data: ")
+        events.append((event_line[len("event: ") :], json.loads(data_line[len("data: ") :])))
+    return events
+
+
+async def collect(stream):
+    return [frame async for frame in stream]
+
+
+def test_format_sse_keeps_the_payload_on_one_line():
+    frame = format_sse("content", {"content": "line one\nline two"})
+
+    assert frame == 'event: content\ndata: {"content": "line one\\nline two"}\n\n'
+
+
+async def test_run_events_in_order():
+    search = ToolExecution(tool_call_id="c1", tool_name="search", tool_args={"q": "x"})
+    searched = ToolExecution(tool_call_id="c1", tool_name="search", tool_args={"q": "x"}, result="found")
+    entity = FakeEntity(
+        chunk(RunEvent.run_started),
+        chunk(RunEvent.run_response, content="Hel"),
+        chunk(RunEvent.tool_call_started, tools=[search]),
+        chunk(RunEvent.tool_call_completed, tools=[searched]),
+        chunk(RunEvent.run_response, content=""),
+        chunk(RunEvent.run_response, content="lo"),
+    )
+
+    events = parse_sse(await collect(run_events(entity, "hi")))
+
+    assert [name for name, _ in events] == [
+        "run_started",
+        "content",
+        "tool_started",
+        "tool_completed",
+        "content",
+        "metrics",
+        "done",
+    ]
+    assert events[0][1] == {"run_id": "r1", "session_id": "s1"}
+    assert events[3][1]["result"] == "found" and events[3][1]["error"] is False
+    assert events[-1][1] == {"run_id": "r1", "session_id": "s1", "status": "completed"}
+
+
+async def test_member_responses_follow_the_tool_call_that_ran_them():
+    team_run = TeamRunResponse(run_id="r1", session_id="s1")
+    member = SimpleNamespace(agent_id="m1", name="Member")
+
+    async def member_finishes():
+        team_run.member_responses.append(RunResponse(agent_id="m1", run_id="m-r1", content="answer"))
+
+    entity = FakeEntity(
+        chunk(RunEvent.run_started),
+        chunk(RunEvent.tool_call_started, tools=[ToolExecution(tool_call_id="c1", tool_name="ask")]),
+        member_finishes,
+        chunk(RunEvent.tool_call_completed, tools=[ToolExecution(tool_call_id="c1", tool_name="ask", result="ok")]),
+        chunk(RunEvent.run_response, content="done"),
+        run_response=team_run,
+        members=[member],
+    )
+
+    events = parse_sse(await collect(run_events(entity, "hi")))
+
+    assert [name for name, _ in events] == [
+        "run_started",
+        "tool_started",
+        "tool_completed",
+        "member_response",
+        "content",
+        "metrics",
+        "done",
+    ]
+    assert events[3][1]["name"] == "Member" and events[3][1]["content"] == "answer"
+
+
+async def test_heartbeats_while_the_run_is_idle(monkeypatch):
+    monkeypatch.setattr(api_settings, "stream_heartbeat_seconds", 0.01)
+    entity = FakeEntity(chunk(RunEvent.run_started), lambda: asyncio.sleep(0.05))
+
+    events = parse_sse(await collect(stream_run(entity, "hi", FakeRequest())))
+
+    assert events[0][0] == "run_started"
+    assert ("heartbeat", None) in events
+    assert [name for name, _ in events if name != "heartbeat"] == ["run_started", "metrics", "done"]
+
+
+async def test_failed_run_ends_with_an_error_event():
+    async def fail():
+        raise RuntimeError("model unavailable")
+
+    entity = FakeEntity(chunk(RunEvent.run_started), fail)
+
+    events = parse_sse(await collect(stream_run(entity, "hi", FakeRequest())))
+
+    assert events[-1] == ("error", {"error": "model unavailable"})
+
+
+async def test_disconnect_cancels_the_run_before_the_next_heartbeat(monkeypatch):
+    monkeypatch.setattr(api_settings, "stream_heartbeat_seconds", 60)
+    request = FakeRequest()
+    entity = FakeEntity(chunk(RunEvent.run_started), lambda: asyncio.Event().wait())
+    stream = stream_run(entity, "hi", request)
+
+    assert parse_sse([await stream.__anext__()])[0][0] == "run_started"
+    request.disconnected.set()
+    with pytest.raises(StopAsyncIteration):
+        await asyncio.wait_for(stream.__anext__(), timeout=1)
+    await asyncio.sleep(0)
+
+    assert entity.cancelled
@@ -4,14 +4,14 @@ from typing import Dict, Iterator, Optional
 
 from agno.agent import Agent
 from agno.models.openai import OpenAIChat
-from agno.storage.postgres import PostgresStorage
 from agno.tools.duckduckgo import DuckDuckGoTools
 from agno.tools.newspaper4k import Newspaper4kTools
 from agno.utils.log import logger
 from agno.workflow import RunEvent, RunResponse, Workflow
 from pydantic import BaseModel, Field
 
-from db.session import db_url
+from db.session import db_engine
+from db.storage import AsyncPostgresStorage
 from workflows.settings import workflow_settings
 
 
@@ -342,9 +342,9 @@ def write_blog_post(self, topic: str, scraped_articles: Dict[str, ScrapedArticle
 def get_blog_post_generator(debug_mode: bool = False) -> BlogPostGenerator:
     return BlogPostGenerator(
         workflow_id="generate-blog-post-on",
-        storage=PostgresStorage(
+        storage=AsyncPostgresStorage(
             table_name="blog_post_generator_workflows",
-            db_url=db_url,
+            db_engine=db_engine,
             auto_upgrade_schema=True,
             mode="workflow",
         ),
@@ -3,12 +3,12 @@ from typing import Iterator
 
 from agno.agent import Agent, RunResponse
 from agno.models.openai import OpenAIChat
-from agno.storage.postgres import PostgresStorage
 from agno.tools.yfinance import YFinanceTools
 from agno.utils.log import logger
 from agno.workflow import Workflow
 
-from db.session import db_url
+from db.session import db_engine
+from db.storage import AsyncPostgresStorage
 from workflows.settings import workflow_settings
 
 
@@ -144,9 +144,9 @@ class InvestmentReportGenerator(Workflow):
 def get_investment_report_generator(debug_mode: bool = False) -> InvestmentReportGenerator:
     return InvestmentReportGenerator(
         workflow_id="generate-investment-report",
-        storage=PostgresStorage(
+        storage=AsyncPostgresStorage(
             table_name="investment_report_generator_workflows",
-            db_url=db_url,
+            db_engine=db_engine,
             auto_upgrade_schema=True,
             mode="workflow",
         ),
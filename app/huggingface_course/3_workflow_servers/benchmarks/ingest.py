@@ -0,0 +1,174 @@
+"""Webhook ingestion benchmark: events/sec, ack latency and zero-loss check.
+
+Starts webhook_server.py against a throwaway store and log directory, posts
+events from many concurrent clients, stops the server and checks that every
+acknowledged event reached the store:
+
+    uv run python -m benchmarks.ingest --concurrency 1 16 128 --events 2000
+    uv run python -m benchmarks.ingest --crash  # SIGKILL the server, then replay the log
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import aiohttp
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run_level(
+    session: aiohttp.ClientSession, url: str, concurrency: int, events: int
+) -> tuple[dict, set[str]]:
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    acked: set[str] = set()
+    counter = itertools.count()
+
+    async def worker() -> None:
+        while (n := next(counter)) < events:
+            event_id = f"c{concurrency}-{n}"
+            payload = {
+                "action": event_id,
+                "workflow_job": {"name": f"bench-{n % 8}", "status": "completed"},
+                "repository": {"full_name": "bench/repo"},
+                "sender": {"login": "bench"},
+            }
+            start = time.perf_counter()
+            async with session.post(
+                url, json=payload, headers={"X-GitHub-Event": "workflow_job"}
+            ) as response:
+                await response.read()
+                latencies.append(time.perf_counter() - start)
+                statuses[response.status] = statuses.get(response.status, 0) + 1
+                if response.status in (200, 202):
+                    acked.add(event_id)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "events": events,
+        "statuses": statuses,
+        "events_per_second": events / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": max(latencies) * 1000,
+    }, acked
+
+
+async def wait_ready(session: aiohttp.ClientSession, url: str, timeout: float = 30) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            async with session.get(url) as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("webhook server did not start")
+
+
+async def replay(env: dict) -> None:
+    """Recover the log the way a restarted server would, then flush the indexer."""
+    os.environ.update(env)
+    sys.path.insert(0, str(APP_DIR))
+    from event_log import EventLog
+    from event_store import EventStore
+
+    log = EventLog(EventStore(env["EVENTS_DB_PATH"], retention=0), env["EVENTS_LOG_DIR"])
+    await log.start()
+    await log.stop()
+
+
+def stored_actions(db_path: str) -> set[str]:
+    db = sqlite3.connect(db_path)
+    try:
+        return {
+            json.loads(payload)["action"]
+            for (payload,) in db.execute("SELECT payload FROM events")
+        }
+    finally:
+        db.close()
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 128])
+    parser.add_argument("--events", type=int, default=2000, help="events per level")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--crash", action="store_true", help="SIGKILL instead of a clean stop")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="pr-agent-ingest-bench-")
+    env = {
+        "EVENTS_DB_PATH": f"{workdir}/events.sqlite3",
+        "EVENTS_LOG_DIR": f"{workdir}/log",
+        "EVENTS_RETENTION": "0",
+        "WEBHOOK_HOST": "127.0.0.1",
+        "WEBHOOK_PORT": str(args.port),
+    }
+    server = subprocess.Popen(
+        [sys.executable, "webhook_server.py"],
+        cwd=APP_DIR,
+        env={**os.environ, **env},
+        stdout=subprocess.DEVNULL,
+    )
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    results = []
+    acked: set[str] = set()
+    try:
+        connector = aiohttp.TCPConnector(limit=max(args.concurrency) + 8)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            await wait_ready(session, f"{base_url}/webhook/stats")
+            for concurrency in args.concurrency:
+                result, level_acked = await run_level(
+                    session, f"{base_url}/webhook/github", concurrency, args.events
+                )
+                results.append(result)
+                acked |= level_acked
+                print(
+                    f"c={result['concurrency']:>4} events/s={result['events_per_second']:>8.0f}"
+                    f" p50={result['p50_ms']:>6.1f}ms p99={result['p99_ms']:>6.1f}ms"
+                    f" max={result['max_ms']:>6.1f}ms statuses={result['statuses']}",
+                    flush=True,
+                )
+    finally:
+        server.send_signal(signal.SIGKILL if args.crash else signal.SIGINT)
+        server.wait()
+
+    if args.crash:
+        await replay(env)
+
+    lost = acked - stored_actions(env["EVENTS_DB_PATH"])
+    print(f"acked={len(acked)} lost={len(lost)}")
+    if args.output:
+        Path(args.output).write_text(
+            json.dumps({"levels": results, "acked": len(acked), "lost": len(lost)}, indent=2)
+        )
+    return 1 if lost else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,107 @@
+"""Run server.py over stdio while recording event-loop lag, peak RSS and an optional profile.
+
+Used by benchmarks.tools as the server command. The stats file holds the pid
+from startup and is rewritten with the measurements on exit (stdin closed
+or SIGTERM):
+
+    python -m benchmarks.instrumented_server --stats stats.json --cprofile server.prof
+"""
+
+import argparse
+import asyncio
+import cProfile
+import json
+import os
+import resource
+import signal
+import sys
+import time
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+
+class LoopMonitor:
+    """Measures how late a periodic wakeup fires, i.e. how long the loop was blocked.
+
+    Every lag above ``threshold`` counts towards ``blocked_ms``; a tool that
+    does blocking I/O or heavy CPU work on the loop shows up there and in
+    ``max_lag_ms`` regardless of what the client sees.
+    """
+
+    def __init__(self, interval: float = 0.01, threshold: float = 0.005):
+        self.interval = interval
+        self.threshold = threshold
+        self.samples = 0
+        self.blocked = 0.0
+        self.stalls = 0
+        self.max_lag = 0.0
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.samples += 1
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.threshold:
+                self.blocked += lag
+                self.stalls += 1
+
+    def stats(self) -> dict:
+        return {
+            "loop_samples": self.samples,
+            "loop_blocked_ms": self.blocked * 1000,
+            "loop_stalls": self.stalls,
+            "loop_max_lag_ms": self.max_lag * 1000,
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stats", required=True, help="write stats as JSON to this file")
+    parser.add_argument("--cprofile", help="write a cProfile dump of the event loop thread here")
+    parser.add_argument("--lag-interval", type=float, default=0.01)
+    parser.add_argument("--lag-threshold", type=float, default=0.005)
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(APP_DIR))
+    import server
+
+    monitor = LoopMonitor(args.lag_interval, args.lag_threshold)
+    profiler = cProfile.Profile() if args.cprofile else None
+    started = time.perf_counter()
+    # Written early so the harness can attach py-spy by pid
+    Path(args.stats).write_text(json.dumps({"pid": os.getpid()}))
+
+    async def serve() -> None:
+        watcher = asyncio.create_task(monitor.run())
+        if profiler is not None:
+            profiler.enable()
+        try:
+            await server.run_stdio()
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            watcher.cancel()
+
+    # The MCP stdio client terminates the server instead of waiting for it
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        asyncio.run(serve())
+    finally:
+        if profiler is not None:
+            profiler.dump_stats(args.cprofile)
+        stats = {
+            "pid": os.getpid(),
+            "uptime_s": time.perf_counter() - started,
+            # ru_maxrss is in KiB on Linux
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            **monitor.stats(),
+        }
+        Path(args.stats).write_text(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""MCP tool benchmark: per-tool latency over stdio, peak RSS and event-loop blocking.
+
+Generates a synthetic git repository (or reuses one), then for each
+concurrency level starts a fresh server.py over stdio, as an MCP client
+would, and keeps that many tool calls in flight until --calls have been
+made. Latency is measured at the client; RSS and loop lag inside the server:
+
+    uv run python -m benchmarks.tools --files 2000 --commits 50 --churn 200
+    uv run python -m benchmarks.tools --concurrency 1 8 32 --cold --cprofile /tmp/prof
+    uv run python -m benchmarks.tools --repo ~/src/big-repo --base main --py-spy /tmp/spy
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from benchmarks.ingest import percentile
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+COMMIT_PREFIXES = ["feat", "fix", "refactor", "docs", "test", "perf"]
+
+
+def git(repo: Path, *args: str) -> None:
+    subprocess.run(
+        ["git", *args],
+        cwd=repo,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        env={
+            **os.environ,
+            "GIT_AUTHOR_NAME": "bench",
+            "GIT_AUTHOR_EMAIL": "bench@example.com",
+            "GIT_COMMITTER_NAME": "bench",
+            "GIT_COMMITTER_EMAIL": "bench@example.com",
+        },
+    )
+
+
+def make_repo(path: Path, files: int, commits: int, churn: int, lines: int, seed: int) -> None:
+    """``files`` files of ``lines`` lines on main; ``commits`` commits on HEAD touching ``churn`` files."""
+    rng = random.Random(seed)
+    path.mkdir(parents=True, exist_ok=True)
+    git(path, "init", "-q", "-b", "main")
+
+    names = [f"src/pkg{i % 32:02d}/module_{i:05d}.py" for i in range(files)]
+    for name in names:
+        target = path / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text("".join(f"value_{n} = {rng.random():.6f}\n" for n in range(lines)))
+    git(path, "add", "-A")
+    git(path, "commit", "-q", "-m", "Initial import")
+
+    git(path, "checkout", "-q", "-b", "feature")
+    touched = rng.sample(names, min(churn, len(names)))
+    per_commit = max(1, len(touched) // max(commits, 1))
+    for n in range(commits):
+        for name in touched[n * per_commit : (n + 1) * per_commit] or touched[-1:]:
+            target = path / name
+            content = target.read_text().splitlines(keepends=True)
+            # Rewrite about a tenth of the file, in one or two hunks
+            for _ in range(max(1, lines // 10)):
+                content[rng.randrange(len(content))] = f"changed_{n} = {rng.random():.6f}\n"
+            target.write_text("".join(content))
+        new_file = path / "src" / "added" / f"new_{n:04d}.py"
+        new_file.parent.mkdir(parents=True, exist_ok=True)
+        new_file.write_text("".join(f"added_{i} = {i}\n" for i in range(lines // 4)))
+        git(path, "add", "-A")
+        git(path, "commit", "-q", "-m", f"{COMMIT_PREFIXES[n % len(COMMIT_PREFIXES)]}: change set {n}")
+
+
+def workload(repo: str, base: str) -> list[tuple[str, dict]]:
+    """One round of the calls a PR-writing agent makes; cursors are followed separately."""
+    return [
+        ("analyze_file_changes", {"working_directory": repo, "base_branch": base}),
+        (
+            "analyze_file_changes[no_diff]",
+            {"working_directory": repo, "base_branch": base, "include_diff": False},
+        ),
+        (
+            "suggest_template",
+            {"changes_summary": "benchmark change set", "working_directory": repo, "base_branch": base},
+        ),
+        ("get_pr_templates", {}),
+        ("get_workflow_status", {}),
+        ("get_recent_actions_events", {"limit": 10}),
+    ]
+
+
+def tool_name(label: str) -> str:
+    return label.split("[")[0]
+
+
+async def run_level(
+    args: argparse.Namespace, repo: str, concurrency: int, workdir: Path
+) -> dict:
+    stats_path = workdir / f"server-c{concurrency}.json"
+    command = [sys.executable, "-m", "benchmarks.instrumented_server", "--stats", str(stats_path)]
+    if args.cprofile:
+        command += ["--cprofile", str(Path(args.cprofile) / f"server-c{concurrency}.prof")]
+
+    env = {
+        **os.environ,
+        "EVENTS_DB_PATH": str(workdir / "events.sqlite3"),
+        "EVENTS_LOG_DIR": str(workdir / "events_log"),
+        "EVENTS_SOCKET_PATH": str(workdir / "events.sock"),
+    }
+    if args.cold:
+        env["PR_AGENT_CACHE_SIZE"] = "0"
+        env["GIT_CHANGES_CACHE_SIZE"] = "0"
+    params = StdioServerParameters(
+        command=command[0], args=command[1:], env=env, cwd=str(APP_DIR)
+    )
+
+    latencies: dict[str, list[float]] = {}
+    errors: dict[str, int] = {}
+    calls = itertools.count()
+    plan = itertools.cycle(workload(repo, args.base))
+
+    async def call(session: ClientSession, label: str, arguments: dict) -> dict | None:
+        start = time.perf_counter()
+        result = await session.call_tool(tool_name(label), arguments)
+        latencies.setdefault(label, []).append(time.perf_counter() - start)
+        text = result.content[0].text if result.content else ""
+        try:
+            payload = json.loads(text)
+        except ValueError:
+            payload = None
+        if result.isError or (isinstance(payload, dict) and "error" in payload):
+            errors[label] = errors.get(label, 0) + 1
+            return None
+        return payload if isinstance(payload, dict) else None
+
+    async def worker(session: ClientSession) -> None:
+        while next(calls) < args.calls:
+            label, arguments = next(plan)
+            payload = await call(session, label, arguments)
+            # Page through the rest of the diff the way a client would
+            pages = 0
+            while payload and payload.get("next_cursor") and pages < args.max_pages:
+                pages += 1
+                payload = await call(
+                    session,
+                    "analyze_file_changes[cursor]",
+                    {**arguments, "cursor": payload["next_cursor"]},
+                )
+
+    spy = None
+    errlog = open(workdir / f"server-c{concurrency}.log", "w")
+    async with stdio_client(params, errlog=errlog) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            if args.py_spy:
+                pid = json.loads(stats_path.read_text())["pid"]
+                spy = subprocess.Popen(
+                    [
+                        "py-spy", "record", "--pid", str(pid), "--nonblocking",
+                        "-o", str(Path(args.py_spy) / f"server-c{concurrency}.svg"),
+                    ],
+                    stdout=subprocess.DEVNULL,
+                )
+            start = time.perf_counter()
+            await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+            elapsed = time.perf_counter() - start
+            if spy is not None:
+                spy.send_signal(signal.SIGINT)
+                spy.wait()
+
+    errlog.close()
+
+    # The server writes its measurements after stdio_client terminates it
+    server_stats: dict = {}
+    for _ in range(50):
+        try:
+            server_stats = json.loads(stats_path.read_text())
+        except ValueError:
+            # Caught mid-write
+            server_stats = {}
+        if "peak_rss_mb" in server_stats:
+            break
+        await asyncio.sleep(0.1)
+
+    return {
+        "concurrency": concurrency,
+        "calls": sum(len(values) for values in latencies.values()),
+        "calls_per_second": sum(len(values) for values in latencies.values()) / elapsed,
+        "tools": {
+            label: {
+                "calls": len(values),
+                "errors": errors.get(label, 0),
+                "p50_ms": percentile(values, 0.50) * 1000,
+                "p95_ms": percentile(values, 0.95) * 1000,
+                "p99_ms": percentile(values, 0.99) * 1000,
+                "max_ms": max(values) * 1000,
+            }
+            for label, values in sorted(latencies.items())
+        },
+        "server": server_stats,
+    }
+
+
+def print_level(result: dict) -> None:
+    server = result["server"]
+    print(
+        f"c={result['concurrency']:>3} calls={result['calls']} "
+        f"calls/s={result['calls_per_second']:.0f} "
+        f"peak_rss={server.get('peak_rss_mb', float('nan')):.0f}MB "
+        f"loop_blocked={server.get('loop_blocked_ms', float('nan')):.0f}ms "
+        f"max_lag={server.get('loop_max_lag_ms', float('nan')):.1f}ms",
+        flush=True,
+    )
+    for label, tool in result["tools"].items():
+        print(
+            f"    {label:<32} n={tool['calls']:>5} err={tool['errors']:>3}"
+            f" p50={tool['p50_ms']:>8.1f}ms p95={tool['p95_ms']:>8.1f}ms"
+            f" p99={tool['p99_ms']:>8.1f}ms max={tool['max_ms']:>8.1f}ms",
+            flush=True,
+        )
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repo", help="benchmark an existing repository instead of a synthetic one")
+    parser.add_argument("--base", default="main", help="base branch to compare HEAD against")
+    parser.add_argument("--files", type=int, default=500, help="files in the synthetic repo")
+    parser.add_argument("--commits", type=int, default=20, help="commits between base and HEAD")
+    parser.add_argument("--churn", type=int, default=100, help="files modified between base and HEAD")
+    parser.add_argument("--lines", type=int, default=200, help="lines per synthetic file")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--calls", type=int, default=200, help="workload calls per level")
+    parser.add_argument("--max-pages", type=int, default=5, help="diff pages to follow per call")
+    parser.add_argument("--cold", action="store_true", help="disable the server's result caches")
+    parser.add_argument("--cprofile", help="directory for per-level cProfile dumps")
+    parser.add_argument("--py-spy", help="directory for per-level py-spy flame graphs")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    if args.py_spy and shutil.which("py-spy") is None:
+        parser.error("--py-spy needs py-spy on PATH (pip install py-spy)")
+    for directory in (args.cprofile, args.py_spy):
+        if directory:
+            Path(directory).mkdir(parents=True, exist_ok=True)
+
+    workdir = Path(tempfile.mkdtemp(prefix="pr-agent-tools-bench-"))
+    repo = args.repo
+    if repo is None:
+        repo = str(workdir / "repo")
+        start = time.perf_counter()
+        make_repo(Path(repo), args.files, args.commits, args.churn, args.lines, args.seed)
+        print(
+            f"repo: {args.files} files, {args.commits} commits, {args.churn} changed files"
+            f" ({time.perf_counter() - start:.1f}s to generate)",
+            flush=True,
+        )
+
+    results = []
+    for concurrency in args.concurrency:
+        result = await run_level(args, repo, concurrency, workdir)
+        results.append(result)
+        print_level(result)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({"repo": repo, "levels": results}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
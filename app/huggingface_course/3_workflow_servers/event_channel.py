@@ -0,0 +1,205 @@
+import asyncio
+import json
+import os
+from collections import deque
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from event_store import EventStore
+
+EVENTS_SOCKET_PATH = os.getenv(
+    "EVENTS_SOCKET_PATH", str(Path(__file__).parent / ".cache" / "events.sock")
+)
+
+# First line sent to a subscriber, once it is registered for new events
+SUBSCRIBED = b'{"subscribed": true}\n'
+# Longest event line a subscriber reads; webhook payloads can run well past 64 KB
+MAX_EVENT_BYTES = 16 * 2**20
+
+
+class EventPublisher:
+    """Fans committed events out to local subscribers over a Unix socket.
+
+    Each subscriber gets its own bounded backlog, so one slow reader cannot
+    hold up ingestion; a subscriber that falls ``max_backlog`` events behind
+    is disconnected and resynchronises from the store when it reconnects.
+    Events are published when they are committed to the log, before they are
+    indexed, so a new subscriber is first sent ``SUBSCRIBED`` and then the
+    last ``replay`` events, which may not have reached the store yet.
+    Co-hosted consumers can skip the socket and register a callback with
+    ``EventLog.listeners`` directly.
+    """
+
+    def __init__(
+        self, path: str = EVENTS_SOCKET_PATH, max_backlog: int = 1000, replay: int = 1000
+    ):
+        self.path = path
+        self.max_backlog = max_backlog
+        self._server: asyncio.AbstractServer | None = None
+        self._subscribers: set[asyncio.Queue] = set()
+        self._recent: deque[bytes] = deque(maxlen=replay)
+
+    async def start(self) -> None:
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        # A socket left behind by a crashed process would block the bind
+        Path(self.path).unlink(missing_ok=True)
+        self._server = await asyncio.start_unix_server(self._serve, path=self.path)
+
+    async def stop(self) -> None:
+        if self._server is None:
+            return
+        self._server.close()
+        for queue in list(self._subscribers):
+            self._disconnect(queue)
+        await self._server.wait_closed()
+        self._server = None
+        Path(self.path).unlink(missing_ok=True)
+
+    def publish(self, events: list[dict]) -> None:
+        lines = [(json.dumps(event) + "\n").encode() for event in events]
+        self._recent.extend(lines)
+        data = b"".join(lines)
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(data)
+            except asyncio.QueueFull:
+                self._disconnect(queue)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        queue: asyncio.Queue[bytes | None] = asyncio.Queue(maxsize=self.max_backlog)
+        # Registering and taking the replay happen in one step, so every event
+        # is either replayed or queued, never neither
+        self._subscribers.add(queue)
+        writer.write(SUBSCRIBED + b"".join(self._recent))
+        try:
+            await writer.drain()
+            while (data := await queue.get()) is not None:
+                writer.write(data)
+                await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self._subscribers.discard(queue)
+            writer.close()
+
+    def _disconnect(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+
+class WorkflowStatusView:
+    """Latest status per workflow, kept up to date one event at a time.
+
+    ``apply`` is idempotent and only moves a workflow forward in time, so
+    replaying the store after a reconnect and receiving the same events over
+    the socket can overlap safely.
+    """
+
+    def __init__(self):
+        self._status: dict[str, dict] = {}
+
+    def load(self, events: list[dict]) -> list[str]:
+        return [name for event in events if (name := self.apply(event))]
+
+    def apply(self, event: dict) -> str | None:
+        """Fold ``event`` in; return the workflow name if its status changed."""
+        workflow_run = event.get("workflow_run") or {}
+        if not isinstance(workflow_run, dict):
+            return None
+        name = workflow_run.get("name")
+        if not name:
+            return None
+        timestamp = event.get("timestamp", "")
+        current = self._status.get(name)
+        if current is not None and current["timestamp"] >= timestamp:
+            return None
+        self._status[name] = {
+            "status": workflow_run.get("status", "unknown"),
+            "conclusion": workflow_run.get("conclusion", "unknown"),
+            "timestamp": timestamp,
+            "repository": event.get("repository", "unknown"),
+            "html_url": workflow_run.get("html_url", ""),
+        }
+        return name
+
+    def snapshot(self, workflow_name: str | None = None) -> dict[str, dict]:
+        if workflow_name:
+            status = self._status.get(workflow_name)
+            return {workflow_name: status} if status else {}
+        return dict(self._status)
+
+
+class EventSubscriber:
+    """Keeps a ``WorkflowStatusView`` in sync with the webhook server's socket.
+
+    On every (re)connect the subscriber waits until the publisher has
+    registered it, then refreshes the view from the store, so events
+    published while disconnected are not missed. Lines that are not a JSON
+    object are logged and skipped; any other error is logged and followed
+    by a reconnect, so the view never silently stops updating. ``on_change``
+    is awaited with the names of workflows whose status moved.
+    """
+
+    def __init__(
+        self,
+        store: EventStore,
+        view: WorkflowStatusView,
+        on_change: Callable[[list[str]], Awaitable[None]],
+        path: str = EVENTS_SOCKET_PATH,
+        max_retry_delay: float = 30.0,
+    ):
+        self.store = store
+        self.view = view
+        self.on_change = on_change
+        self.path = path
+        self.max_retry_delay = max_retry_delay
+        self.connected = False
+
+    async def run(self) -> None:
+        delay = 0.5
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(
+                    self.path, limit=MAX_EVENT_BYTES
+                )
+            except OSError:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_retry_delay)
+                continue
+
+            delay = 0.5
+            self.connected = True
+            try:
+                # Reload only once registered, or events published in between
+                # would be in neither the store nor the socket
+                if await reader.readline() != SUBSCRIBED:
+                    # Closed before registering us, e.g. while shutting down
+                    await asyncio.sleep(delay)
+                    continue
+                events = await asyncio.to_thread(self.store.latest_per_workflow)
+                await self._changed(self.view.load(events))
+                while line := await reader.readline():
+                    try:
+                        event = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        print(f"[Event Channel Error] Skipping malformed event: {e}")
+                        continue
+                    if not isinstance(event, dict):
+                        print(f"[Event Channel Error] Skipping non-object event: {line[:80]!r}")
+                        continue
+                    await self._changed(self.view.load([event]))
+            except (ConnectionError, OSError):
+                pass
+            except Exception as e:
+                # E.g. a line over MAX_EVENT_BYTES; the reconnect reloads from the store
+                print(f"[Event Channel Error] Reconnecting after {type(e).__name__}: {e}")
+                await asyncio.sleep(delay)
+            finally:
+                self.connected = False
+                writer.close()
+
+    async def _changed(self, names: list[str]) -> None:
+        if names:
+            await self.on_change(list(dict.fromkeys(names)))
@@ -0,0 +1,260 @@
+import asyncio
+import itertools
+import json
+import os
+from pathlib import Path
+from typing import Callable
+
+from event_store import EventStore
+
+EVENTS_LOG_DIR = os.getenv(
+    "EVENTS_LOG_DIR", str(Path(__file__).parent / ".cache" / "events_log")
+)
+
+ACTIVE_SUFFIX = ".active"
+SEALED_SUFFIX = ".ndjson"
+
+
+class Backpressure(Exception):
+    """Raised by ``EventLog.append`` when too many events are waiting to be written."""
+
+
+class EventLog:
+    """Append-only NDJSON segment log with group commit, feeding an ``EventStore``.
+
+    ``append`` queues an event and resolves once it is fsynced. A single
+    writer task drains the queue, writes everything that arrived within
+    ``commit_interval`` (up to ``max_batch``) in one ``write`` and one
+    ``fsync``, so a burst of webhooks costs one disk flush instead of one per
+    request. Acks wait at most ``ack_timeout``; past that the event is still
+    queued and ``append`` returns ``False``. A full queue raises
+    ``Backpressure`` instead of growing without bound.
+
+    Segments are written as ``<seq>.active`` and atomically renamed to
+    ``<seq>.ndjson`` once they reach ``segment_bytes``. Rotation runs after
+    the batch that filled the segment is acked; if it fails, the error is
+    logged, writing carries on in the same segment and the next commit tries
+    again. Committed batches are
+    applied to the store together with the log position they end at; sealed
+    segments behind that position are deleted (compaction), and anything
+    after it is replayed on ``start``, so a crash between fsync and indexing
+    loses nothing. Callables in ``listeners`` receive each batch right after
+    it is committed; an exception from one is logged and ignored.
+    """
+
+    def __init__(
+        self,
+        store: EventStore,
+        directory: str = EVENTS_LOG_DIR,
+        commit_interval: float = 0.002,
+        max_batch: int = 512,
+        max_pending: int = 10_000,
+        segment_bytes: int = 8 * 2**20,
+        ack_timeout: float = 0.5,
+    ):
+        self.store = store
+        self.directory = Path(directory)
+        self.commit_interval = commit_interval
+        self.max_batch = max_batch
+        self.segment_bytes = segment_bytes
+        self.ack_timeout = ack_timeout
+
+        self._queue: asyncio.Queue[tuple[str, asyncio.Future]] = asyncio.Queue(
+            maxsize=max_pending
+        )
+        self._index_queue: asyncio.Queue[tuple[list[dict], tuple[int, int]]] = (
+            asyncio.Queue()
+        )
+        self._writer: asyncio.Task | None = None
+        self._indexer: asyncio.Task | None = None
+        self._segment = None
+        self._segment_seq = 0
+        self.listeners: list[Callable[[list[dict]], None]] = []
+
+        self.committed = 0
+        self.commits = 0
+        self.rejected = 0
+
+    async def start(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        await asyncio.to_thread(self._recover)
+        self._writer = asyncio.create_task(self._write_loop())
+        self._indexer = asyncio.create_task(self._index_loop())
+
+    async def stop(self) -> None:
+        if self._writer is None:
+            return
+        await self._queue.join()
+        await self._index_queue.join()
+        for task in (self._writer, self._indexer):
+            task.cancel()
+        await asyncio.gather(self._writer, self._indexer, return_exceptions=True)
+        self._writer = self._indexer = None
+        self._segment.close()
+        self._segment = None
+
+    async def append(self, event: dict) -> bool:
+        """Queue ``event``; True once it is durable, False if the ack budget ran out."""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((json.dumps(event) + "\n", future))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise Backpressure("Too many events waiting to be written") from None
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.ack_timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def stats(self) -> dict:
+        return {
+            "committed": self.committed,
+            "commits": self.commits,
+            "rejected": self.rejected,
+            "pending": self._queue.qsize(),
+            "segment": self._segment_seq,
+        }
+
+    async def _write_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.commit_interval
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    if (timeout := deadline - loop.time()) <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+            try:
+                data = "".join(line for line, _ in batch).encode()
+                position = await asyncio.to_thread(self._commit, data)
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                    # Nobody may be awaiting it any more; don't warn about that
+                    future.exception()
+            else:
+                self.committed += len(batch)
+                self.commits += 1
+                for _, future in batch:
+                    if not future.done():
+                        future.set_result(None)
+                events = [json.loads(line) for line, _ in batch]
+                self._index_queue.put_nowait((events, position))
+                for listener in self.listeners:
+                    # A failing listener must not stop the writer or the others
+                    try:
+                        listener(events)
+                    except Exception as e:
+                        print(f"[Event Log Error] Listener {listener!r} failed: {e}")
+                if position[1] >= self.segment_bytes:
+                    # The batch is durable whatever happens here
+                    try:
+                        await asyncio.to_thread(self._rotate)
+                    except Exception as e:
+                        print(
+                            f"[Event Log Error] Failed to rotate segment {self._segment_seq}: {e}"
+                        )
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _index_loop(self) -> None:
+        while True:
+            events, position = await self._index_queue.get()
+            try:
+                # Batches must land in order or the checkpoint would skip one
+                for attempt in itertools.count():
+                    try:
+                        await asyncio.to_thread(self.store.append_many, events, position)
+                        break
+                    except Exception as e:
+                        print(f"[Event Log Error] Failed to index events: {e}")
+                        await asyncio.sleep(min(2**attempt, 30))
+                await asyncio.to_thread(self._compact, position[0])
+            finally:
+                self._index_queue.task_done()
+
+    def _commit(self, data: bytes) -> tuple[int, int]:
+        """Write and fsync one batch; return the (segment, offset) it ends at."""
+        start = self._segment.tell()
+        try:
+            self._segment.write(data)
+            self._segment.flush()
+            os.fsync(self._segment.fileno())
+        except OSError:
+            # Drop the partial batch so the segment stays line-aligned
+            self._segment.truncate(start)
+            raise
+        return (self._segment_seq, self._segment.tell())
+
+    def _rotate(self) -> None:
+        """Seal the active segment and start the next; on failure the active one stays open."""
+        next_path = self._path(self._segment_seq + 1, ACTIVE_SUFFIX)
+        next_segment = open(next_path, "ab")
+        try:
+            os.replace(
+                self._path(self._segment_seq, ACTIVE_SUFFIX),
+                self._path(self._segment_seq, SEALED_SUFFIX),
+            )
+        except OSError:
+            next_segment.close()
+            next_path.unlink(missing_ok=True)
+            raise
+        self._segment.close()
+        self._segment = next_segment
+        self._segment_seq += 1
+        self._fsync_directory()
+
+    def _compact(self, checkpoint_seq: int) -> None:
+        for path in self.directory.glob(f"*{SEALED_SUFFIX}"):
+            if int(path.stem) < checkpoint_seq:
+                path.unlink(missing_ok=True)
+
+    def _recover(self) -> None:
+        """Replay everything after the store's checkpoint and reopen the active segment."""
+        checkpoint_seq, checkpoint_offset = self.store.checkpoint()
+        segments = sorted(
+            (int(path.name.split(".")[0]), path)
+            for path in self.directory.iterdir()
+            if path.suffix in (ACTIVE_SUFFIX, SEALED_SUFFIX)
+        )
+        for seq, path in segments:
+            if seq < checkpoint_seq:
+                continue
+            offset = checkpoint_offset if seq == checkpoint_seq else 0
+            with open(path, "rb+") as f:
+                f.seek(offset)
+                data = f.read()
+                # A crash mid-write can leave a torn last line; it was never acked
+                complete = data[: data.rfind(b"\n") + 1]
+                if len(complete) < len(data):
+                    f.truncate(offset + len(complete))
+            events = [json.loads(line) for line in complete.splitlines() if line]
+            if events:
+                self.store.append_many(events, (seq, offset + len(complete)))
+
+        if segments and segments[-1][1].suffix == ACTIVE_SUFFIX:
+            self._segment_seq = segments[-1][0]
+        elif segments:
+            self._segment_seq = segments[-1][0] + 1
+        self._segment = open(self._path(self._segment_seq, ACTIVE_SUFFIX), "ab")
+        self._compact(self._segment_seq)
+
+    def _path(self, seq: int, suffix: str) -> Path:
+        return self.directory / f"{seq:012d}{suffix}"
+
+    def _fsync_directory(self) -> None:
+        fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
@@ -0,0 +1,190 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+EVENTS_DB_PATH = os.getenv(
+    "EVENTS_DB_PATH", str(Path(__file__).parent / ".cache" / "github_events.sqlite3")
+)
+EVENTS_RETENTION = int(os.getenv("EVENTS_RETENTION", "100"))
+EVENTS_MAX_AGE_DAYS = float(os.getenv("EVENTS_MAX_AGE_DAYS", "0"))
+
+
+class EventStore:
+    """SQLite (WAL) store of GitHub Actions events shared by both servers.
+
+    The webhook server appends; the MCP server reads. WAL lets readers run
+    while a write is in progress, and the indexes on ``timestamp`` and
+    ``(workflow_name, timestamp)`` turn "latest N events" and "latest status
+    per workflow" into index scans instead of loading the whole history.
+    Retention keeps the newest ``retention`` events and, if ``max_age_days``
+    is set, drops anything older.
+    """
+
+    def __init__(
+        self,
+        path: str = EVENTS_DB_PATH,
+        retention: int = EVENTS_RETENTION,
+        max_age_days: float = EVENTS_MAX_AGE_DAYS,
+    ):
+        self.path = path
+        self.retention = retention
+        self.max_age_days = max_age_days
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS events ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "timestamp TEXT NOT NULL, "
+            "workflow_name TEXT, "
+            "payload TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS events_timestamp ON events (timestamp);"
+            "CREATE INDEX IF NOT EXISTS events_workflow "
+            "ON events (workflow_name, timestamp) WHERE workflow_name IS NOT NULL;"
+            "CREATE TABLE IF NOT EXISTS log_checkpoint ("
+            "id INTEGER PRIMARY KEY CHECK (id = 0), "
+            "segment INTEGER NOT NULL, "
+            "offset INTEGER NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS migrations ("
+            "name TEXT PRIMARY KEY, "
+            "applied_at TEXT NOT NULL);"
+        )
+        self._lock = threading.Lock()
+
+    def append(self, event: dict) -> None:
+        self.append_many([event])
+
+    def append_many(
+        self, events: list[dict], checkpoint: tuple[int, int] | None = None
+    ) -> None:
+        """Insert ``events``, recording the event log position they end at, if any."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._insert(events)
+                if checkpoint is not None:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO log_checkpoint (id, segment, offset) "
+                        "VALUES (0, ?, ?)",
+                        checkpoint,
+                    )
+                self._apply_retention()
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def recent(self, limit: int = 10) -> list[dict]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT payload FROM events ORDER BY timestamp DESC, id DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def latest_per_workflow(self, workflow_name: str | None = None) -> list[dict]:
+        """Newest event for each workflow (or just ``workflow_name``)."""
+        # SQLite returns the bare payload column from the row holding MAX()
+        query = (
+            "SELECT payload, MAX(timestamp) FROM events "
+            "WHERE workflow_name IS NOT NULL"
+        )
+        params: tuple = ()
+        if workflow_name:
+            query += " AND workflow_name = ?"
+            params = (workflow_name,)
+        query += " GROUP BY workflow_name"
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        return [json.loads(payload) for payload, _ in rows]
+
+    def checkpoint(self) -> tuple[int, int]:
+        """(segment, offset) of the last event log batch applied, or (0, 0)."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT segment, offset FROM log_checkpoint WHERE id = 0"
+            ).fetchone()
+        return tuple(row) if row else (0, 0)
+
+    def import_json(self, path: Path) -> int:
+        """Load a legacy ``github_events.json``, once per database.
+
+        The import and its ``migrations`` marker commit in one transaction,
+        so when both servers start at once only one of them imports, and a
+        store that retention has emptied is never refilled from the file. A
+        database that already holds events is marked without importing.
+        """
+        migration = f"import_json:{path.name}"
+        with self._lock:
+            if self._migrated(migration):
+                return 0
+        events = []
+        if path.exists():
+            with open(path, "r") as f:
+                events = json.load(f)
+
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                if self._migrated(migration):
+                    # The other server got there first
+                    self._db.execute("ROLLBACK")
+                    return 0
+                (count,) = self._db.execute("SELECT COUNT(*) FROM events").fetchone()
+                imported = 0 if count else len(events)
+                if imported:
+                    self._insert(events)
+                    self._apply_retention()
+                self._db.execute(
+                    "INSERT INTO migrations (name, applied_at) VALUES (?, ?)",
+                    (migration, datetime.now(timezone.utc).isoformat()),
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return imported
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def _insert(self, events: list[dict]) -> None:
+        rows = [
+            (
+                event.get("timestamp", ""),
+                (event.get("workflow_run") or {}).get("name"),
+                json.dumps(event),
+            )
+            for event in events
+        ]
+        self._db.executemany(
+            "INSERT INTO events (timestamp, workflow_name, payload) VALUES (?, ?, ?)",
+            rows,
+        )
+
+    def _migrated(self, name: str) -> bool:
+        return (
+            self._db.execute("SELECT 1 FROM migrations WHERE name = ?", (name,)).fetchone()
+            is not None
+        )
+
+    def _apply_retention(self) -> None:
+        if self.retention > 0:
+            # ids follow arrival order, so this is one index probe plus the delete
+            self._db.execute(
+                "DELETE FROM events WHERE id <= "
+                "(SELECT id FROM events ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (self.retention,),
+            )
+        if self.max_age_days > 0:
+            cutoff = datetime.utcnow() - timedelta(days=self.max_age_days)
+            self._db.execute(
+                "DELETE FROM events WHERE timestamp < ?", (cutoff.isoformat(),)
+            )
@@ -0,0 +1,768 @@
+import asyncio
+import contextlib
+import os
+import subprocess
+from fnmatch import fnmatchcase
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+NULL_MODE = "000000"
+GIT_MAX_CONCURRENCY = int(os.getenv("GIT_MAX_CONCURRENCY", "4"))
+# Persistent `git cat-file --batch` processes per repository
+GIT_CAT_FILE_PROCESSES = int(os.getenv("GIT_CAT_FILE_PROCESSES", "2"))
+# Parsed commits kept per repository, least recently used dropped first
+GIT_COMMIT_CACHE_SIZE = int(os.getenv("GIT_COMMIT_CACHE_SIZE", "10000"))
+# Repositories with a live GitObjectStore (and cat-file processes) at a time
+GIT_MAX_REPOSITORIES = int(os.getenv("GIT_MAX_REPOSITORIES", "8"))
+DIFF_PAGE_BYTES = 64_000
+# Files whose patches one page request asks git for at a time
+DIFF_PAGE_FILES = 64
+
+# Escapes git uses when quoting paths (core.quotePath)
+_QUOTE_ESCAPES = {
+    0x07: "\\a",
+    0x08: "\\b",
+    0x09: "\\t",
+    0x0A: "\\n",
+    0x0B: "\\v",
+    0x0C: "\\f",
+    0x0D: "\\r",
+    0x22: '\\"',
+    0x5C: "\\\\",
+}
+
+
+@dataclass
+class Commit:
+    sha: str
+    parents: list[str]
+    committer_time: int
+    subject: str
+
+
+@dataclass
+class FileChange:
+    status: str
+    path: str
+    old_mode: str | None
+    new_mode: str | None
+    old_sha: str | None
+    new_sha: str | None
+    insertions: int = 0
+    deletions: int = 0
+    binary: bool = False
+    old_size: int = 0
+    new_size: int = 0
+    # Source path of a rename (status R)
+    old_path: str | None = None
+
+    def patch_header(self) -> str:
+        """The ``diff --git`` line that opens this file's patch."""
+        old_path = self.old_path or self.path
+        return f"diff --git {_quote(f'a/{old_path}')} {_quote(f'b/{self.path}')}\n"
+
+    def patch_sections(self) -> int:
+        # git shows a type change as a deletion followed by an addition
+        return 2 if self.status == "T" else 1
+
+
+@dataclass
+class DiffPage:
+    text: str
+    lines: int
+    bytes: int
+    next_cursor: str | None
+
+
+@dataclass
+class ChangeSet:
+    """Everything ``analyze_file_changes`` reports for one (base, HEAD) pair.
+
+    Only per-file metadata and stats are kept; diff text is regenerated page
+    by page through ``ChangeAnalyzer.diff_page`` so cached change sets stay
+    small no matter how large the diff is.
+    """
+
+    repo: str
+    base_sha: str
+    head_sha: str
+    merge_base: str
+    files: list[FileChange] = field(default_factory=list)
+    commits: list[Commit] = field(default_factory=list)
+
+    def name_status(self, globs: list[str] | None = None) -> str:
+        lines = []
+        for change in self.select(globs):
+            paths = [change.old_path, change.path] if change.old_path else [change.path]
+            lines.append("\t".join([change.status, *map(_quote, paths)]) + "\n")
+        return "".join(lines)
+
+    def stat(self, width: int = 80, globs: list[str] | None = None) -> str:
+        """Render ``git diff --stat`` output, sizing and scaling columns like git does."""
+        files = self.select(globs)
+        if not files:
+            return ""
+        names = [
+            _rename_name(change.old_path, change.path) if change.old_path else _quote(change.path)
+            for change in files
+        ]
+        max_len = max(len(name) for name in names)
+        max_change = max(
+            (change.insertions + change.deletions for change in files if not change.binary),
+            default=0,
+        )
+        number_width = len(str(max_change))
+        bin_width = 0
+        for change in files:
+            if change.binary:
+                # "Bin XXX -> YYY bytes"
+                bin_width = max(bin_width, 14 + len(str(change.old_size)) + len(str(change.new_size)))
+                number_width = max(number_width, len("Bin"))
+
+        # Give the name and the graph what they want, then shrink both to fit
+        width = max(width, 16 + 6 + number_width)
+        graph_width = max_change if max_change + 4 > bin_width else bin_width - 4
+        name_width = max_len
+        if name_width + number_width + 6 + graph_width > width:
+            if graph_width > width * 3 // 8 - number_width - 6:
+                graph_width = max(width * 3 // 8 - number_width - 6, 6)
+            if name_width > width - number_width - 6 - graph_width:
+                name_width = width - number_width - 6 - graph_width
+            else:
+                graph_width = width - number_width - 6 - name_width
+
+        lines = []
+        for change, name in zip(files, names):
+            prefix = ""
+            if len(name) > name_width:
+                # Keep the end of the path, cut back to a directory boundary
+                prefix = "..."
+                name = name[len(name) - max(name_width - 3, 0) :]
+                slash = name.find("/")
+                if slash >= 0:
+                    name = name[slash:]
+            padding = " " * max(name_width - len(prefix) - len(name), 0)
+            line = f" {prefix}{name}{padding} | "
+            if change.binary:
+                line += f"{'Bin':>{number_width}}"
+                if change.old_size or change.new_size:
+                    line += f" {change.old_size} -> {change.new_size} bytes"
+                lines.append(line)
+                continue
+            insertions, deletions = change.insertions, change.deletions
+            total = insertions + deletions
+            if graph_width <= max_change:
+                scaled = _scale(total, graph_width, max_change)
+                if scaled < 2 and insertions and deletions:
+                    scaled = 2
+                if insertions < deletions:
+                    insertions = _scale(insertions, graph_width, max_change)
+                    deletions = scaled - insertions
+                else:
+                    deletions = _scale(deletions, graph_width, max_change)
+                    insertions = scaled - deletions
+            line += f"{total:>{number_width}}{' ' if total else ''}"
+            lines.append(line + "+" * insertions + "-" * deletions)
+
+        insertions = sum(change.insertions for change in files)
+        deletions = sum(change.deletions for change in files)
+        footer = f" {len(files)} file{'s' if len(files) != 1 else ''} changed"
+        if insertions or not deletions:
+            footer += f", {insertions} insertion{'s' if insertions != 1 else ''}(+)"
+        if deletions or not insertions:
+            footer += f", {deletions} deletion{'s' if deletions != 1 else ''}(-)"
+        return "\n".join(lines + [footer]) + "\n"
+
+    def select(self, globs: list[str] | None = None) -> list[FileChange]:
+        """Files whose path, or source path for a rename, matches any of ``globs``."""
+        if not globs:
+            return self.files
+        return [
+            change
+            for change in self.files
+            if any(
+                fnmatchcase(path, glob)
+                for path in (change.path, change.old_path)
+                if path is not None
+                for glob in globs
+            )
+        ]
+
+    def cursor(self, file_index: int, hunk_offset: int) -> str:
+        return f"{self.base_sha[:8]}.{self.head_sha[:8]}:{file_index}:{hunk_offset}"
+
+    def parse_cursor(self, cursor: str) -> tuple[int, int]:
+        """Return ``(file_index, hunk_offset)``, rejecting cursors from other SHAs."""
+        try:
+            shas, file_index, hunk_offset = cursor.split(":")
+            position = int(file_index), int(hunk_offset)
+        except ValueError:
+            raise ValueError(f"Malformed diff cursor: {cursor}") from None
+        if shas != f"{self.base_sha[:8]}.{self.head_sha[:8]}":
+            raise ValueError("Diff cursor is stale: the base branch or HEAD has moved")
+        return position
+
+    def log_oneline(self) -> str:
+        return "".join(
+            f"{commit.sha[:7]} {commit.subject}\n" for commit in self.commits
+        )
+
+
+def _scale(count: int, width: int, max_change: int) -> int:
+    if not count:
+        return 0
+    return 1 + count * (width - 1) // max_change
+
+
+def _quote(path: str) -> str:
+    """Quote ``path`` the way git prints it with the default ``core.quotePath``."""
+    raw = path.encode("utf-8", "surrogateescape")
+    if not any(byte < 0x20 or byte >= 0x7F or byte in (0x22, 0x5C) for byte in raw):
+        return path
+    quoted = "".join(
+        _QUOTE_ESCAPES.get(byte) or (chr(byte) if 0x20 <= byte < 0x7F else f"\\{byte:03o}")
+        for byte in raw
+    )
+    return f'"{quoted}"'
+
+
+def _rename_name(old_path: str, new_path: str) -> str:
+    """``--stat`` name of a rename, folding shared leading and trailing directories."""
+    old_quoted, new_quoted = _quote(old_path), _quote(new_path)
+    if old_quoted != old_path or new_quoted != new_path:
+        return f"{old_quoted} => {new_quoted}"
+
+    prefix = 0
+    for index, (old_char, new_char) in enumerate(zip(old_path, new_path)):
+        if old_char != new_char:
+            break
+        if old_char == "/":
+            prefix = index + 1
+
+    # The suffix may reach one character into the prefix to share its slash
+    suffix = 0
+    old_index, new_index = len(old_path) - 1, len(new_path) - 1
+    floor = prefix - 1 if prefix else 0
+    while (
+        old_index >= floor
+        and new_index >= floor
+        and old_path[old_index] == new_path[new_index]
+    ):
+        if old_path[old_index] == "/":
+            suffix = len(old_path) - old_index
+        old_index -= 1
+        new_index -= 1
+
+    old_middle = old_path[prefix : max(len(old_path) - suffix, prefix)]
+    new_middle = new_path[prefix : max(len(new_path) - suffix, prefix)]
+    if not prefix + suffix:
+        return f"{old_middle} => {new_middle}"
+    return (
+        f"{old_path[:prefix]}{{{old_middle} => {new_middle}}}"
+        f"{old_path[len(old_path) - suffix :]}"
+    )
+
+
+async def _read_until(stream: asyncio.StreamReader, separator: bytes) -> bytes:
+    """Read through the next ``separator`` (or EOF), however long the record is."""
+    parts = []
+    while True:
+        try:
+            parts.append(await stream.readuntil(separator))
+            break
+        except asyncio.IncompleteReadError as exc:
+            parts.append(exc.partial)
+            break
+        except asyncio.LimitOverrunError as exc:
+            parts.append(await stream.readexactly(exc.consumed))
+    return b"".join(parts)
+
+
+class GitObjectStore:
+    """Runs git commands for one repository and reads commits through ``git cat-file --batch``.
+
+    A small pool of long-lived child processes per repository serves object
+    lookups, so concurrent reads run in parallel instead of queueing behind
+    one process, and ``read_many`` pipelines a whole batch of SHAs through
+    one of them in a single round trip. Other git commands run through
+    ``asyncio`` subprocesses, bounded by
+    a per-repository semaphore so concurrent tool calls cannot fork an
+    unbounded number of ``git`` processes against the same repository.
+    Objects are immutable, so parsed commits are kept in an LRU of up to
+    ``max_commits`` entries.
+    """
+
+    def __init__(
+        self,
+        repo: str,
+        max_concurrency: int = GIT_MAX_CONCURRENCY,
+        batch_processes: int = GIT_CAT_FILE_PROCESSES,
+        max_commits: int = GIT_COMMIT_CACHE_SIZE,
+    ):
+        self.repo = repo
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._batch_processes = batch_processes
+        self._batch_slots = asyncio.Semaphore(batch_processes)
+        self._idle: list[asyncio.subprocess.Process] = []
+        self.max_commits = max_commits
+        self._commits: OrderedDict[str, Commit] = OrderedDict()
+
+    async def git(self, *args: str, input: bytes | None = None) -> str:
+        command = ["git", *args]
+        async with self._semaphore:
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                stdin=asyncio.subprocess.PIPE if input is not None else None,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=self.repo,
+            )
+            stdout, stderr = await process.communicate(input)
+        if process.returncode:
+            raise subprocess.CalledProcessError(
+                process.returncode, command, stdout.decode(), stderr.decode()
+            )
+        return stdout.decode()
+
+    @contextlib.asynccontextmanager
+    async def stream(self, *args: str) -> AsyncIterator[asyncio.StreamReader]:
+        """Run a git command and hand over its stdout as it is produced.
+
+        Leaving the block before the output is read to the end kills the
+        command, so callers stop paying for output they no longer need.
+        """
+        command = ["git", *args]
+        async with self._semaphore:
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=self.repo,
+                limit=2**20,
+            )
+            # Drained alongside stdout, so a chatty stderr cannot fill its pipe and stall git
+            stderr_read = asyncio.create_task(process.stderr.read())
+            try:
+                yield process.stdout
+                finished = process.stdout.at_eof()
+            finally:
+                if process.returncode is None and not process.stdout.at_eof():
+                    with contextlib.suppress(ProcessLookupError):
+                        process.kill()
+                stderr = await stderr_read
+                await process.wait()
+        if finished and process.returncode:
+            raise subprocess.CalledProcessError(
+                process.returncode, command, None, stderr.decode()
+            )
+
+    async def rev_parse(self, *revisions: str) -> list[str]:
+        for revision in revisions:
+            if revision.startswith("-"):
+                raise ValueError(f"Invalid revision: {revision}")
+        return (await self.git("rev-parse", *revisions)).split()
+
+    async def merge_base(self, base_sha: str, head_sha: str) -> str:
+        return (await self.git("merge-base", base_sha, head_sha)).strip()
+
+    async def sizes(self, shas: list[str]) -> dict[str, int]:
+        """Object sizes, without reading the objects themselves."""
+        if not shas:
+            return {}
+        output = await self.git(
+            "cat-file",
+            "--batch-check=%(objectname) %(objectsize)",
+            input="".join(f"{sha}\n" for sha in shas).encode(),
+        )
+        sizes = {}
+        for line in output.split("\n"):
+            sha, _, size = line.partition(" ")
+            # Objects that are not in the repository are reported as "missing"
+            if size.isdigit():
+                sizes[sha] = int(size)
+        return sizes
+
+    async def read_many(self, shas: list[str]) -> list[tuple[str, bytes]]:
+        if not shas:
+            return []
+        async with self._batch_slots:
+            process = await self._checkout_process()
+            # Feed requests while reading replies so neither pipe can fill up
+            writer = asyncio.create_task(self._write_requests(process, shas))
+            try:
+                objects = []
+                for sha in shas:
+                    header = (await process.stdout.readline()).decode().split()
+                    if len(header) != 3:
+                        raise KeyError(f"git object {sha} not found in {self.repo}")
+                    _, kind, size = header
+                    data = await process.stdout.readexactly(int(size) + 1)
+                    objects.append((kind, data[:-1]))
+                await writer
+            except BaseException:
+                writer.cancel()
+                # The reply stream is out of sync; start a fresh process next time
+                process.kill()
+                raise
+            self._idle.append(process)
+            return objects
+
+    async def read(self, sha: str) -> tuple[str, bytes]:
+        return (await self.read_many([sha]))[0]
+
+    async def commits(self, shas: list[str]) -> list[Commit]:
+        found: dict[str, Commit] = {}
+        for sha in shas:
+            if sha in self._commits:
+                self._commits.move_to_end(sha)
+                found[sha] = self._commits[sha]
+        missing = [sha for sha in dict.fromkeys(shas) if sha not in found]
+        for sha, (_, data) in zip(missing, await self.read_many(missing)):
+            found[sha] = self._commits[sha] = _parse_commit(sha, data)
+        while len(self._commits) > self.max_commits:
+            self._commits.popitem(last=False)
+        return [found[sha] for sha in shas]
+
+    async def close(self) -> None:
+        # Wait for reads in flight so every process is back in the pool
+        for _ in range(self._batch_processes):
+            await self._batch_slots.acquire()
+        try:
+            idle, self._idle = self._idle, []
+            for process in idle:
+                if process.returncode is None:
+                    process.stdin.close()
+            await asyncio.gather(*(process.wait() for process in idle))
+        finally:
+            for _ in range(self._batch_processes):
+                self._batch_slots.release()
+
+    async def _checkout_process(self) -> asyncio.subprocess.Process:
+        while self._idle:
+            process = self._idle.pop()
+            if process.returncode is None:
+                return process
+        return await asyncio.create_subprocess_exec(
+            "git",
+            "cat-file",
+            "--batch",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            cwd=self.repo,
+            limit=2**20,
+        )
+
+    @staticmethod
+    async def _write_requests(process: asyncio.subprocess.Process, shas: list[str]) -> None:
+        process.stdin.write("".join(f"{sha}\n" for sha in shas).encode())
+        await process.stdin.drain()
+
+
+def _parse_commit(sha: str, data: bytes) -> Commit:
+    headers, _, message = data.decode("utf-8", "replace").partition("\n\n")
+    parents = []
+    committer_time = 0
+    for line in headers.split("\n"):
+        key, _, value = line.partition(" ")
+        if key == "parent":
+            parents.append(value)
+        elif key == "committer":
+            committer_time = int(value.rsplit(" ", 2)[-2])
+    subject = " ".join(message.split("\n\n", 1)[0].split("\n")).strip()
+    return Commit(sha, parents, committer_time, subject)
+
+
+class ChangeAnalyzer:
+    """Derives name-status, stats, diff and commit list for a (base, HEAD) pair.
+
+    The merge base is resolved once per pair, concurrently with the
+    ``base..HEAD`` commit list. Name-status and line counts then come from a
+    single ``git diff-tree -M --raw --numstat`` run, so renames and type
+    changes are exactly what ``git diff`` shows. No patch is generated here;
+    ``diff_page`` asks git for the patches of one page at a time. Results are
+    kept in an LRU keyed by the resolved SHA pair, and concurrent calls for
+    the same pair share one in-flight analysis. Stores are kept for up to
+    ``max_repositories`` repositories; the least recently used one is closed
+    when another is opened.
+    """
+
+    def __init__(self, max_entries: int = 32, max_repositories: int = GIT_MAX_REPOSITORIES):
+        self.max_entries = max_entries
+        self.max_repositories = max_repositories
+        self._stores: OrderedDict[str, GitObjectStore] = OrderedDict()
+        self._closing: set[asyncio.Task] = set()
+        self._results: OrderedDict[tuple[str, str, str], ChangeSet] = OrderedDict()
+        self._inflight: dict[tuple[str, str, str], asyncio.Future] = {}
+
+    def store(self, repo: str) -> GitObjectStore:
+        repo = str(Path(repo).resolve())
+        if repo in self._stores:
+            self._stores.move_to_end(repo)
+            return self._stores[repo]
+        store = self._stores[repo] = GitObjectStore(repo)
+        while len(self._stores) > self.max_repositories:
+            _, evicted = self._stores.popitem(last=False)
+            # close() lets reads in flight finish before stopping the processes
+            task = asyncio.get_running_loop().create_task(evicted.close())
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+        return store
+
+    async def resolve(
+        self, repo: str, base_branch: str, head: str = "HEAD"
+    ) -> tuple[str, str, str]:
+        """Return ``(repo, base_sha, head_sha)``, the key everything is cached by."""
+        store = self.store(repo)
+        base_sha, head_sha = await store.rev_parse(
+            f"{base_branch}^{{commit}}", f"{head}^{{commit}}"
+        )
+        return store.repo, base_sha, head_sha
+
+    async def analyze(self, repo: str, base_branch: str, head: str = "HEAD") -> ChangeSet:
+        return await self.analyze_resolved(await self.resolve(repo, base_branch, head))
+
+    async def analyze_resolved(self, key: tuple[str, str, str]) -> ChangeSet:
+        store = self.store(key[0])
+        _, base_sha, head_sha = key
+        if key in self._results:
+            self._results.move_to_end(key)
+            return self._results[key]
+        if key in self._inflight:
+            return await asyncio.shield(self._inflight[key])
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            changes = await self._analyze(store, base_sha, head_sha)
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Waiters see the exception; don't warn if there were none
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+        future.set_result(changes)
+        self._results[key] = changes
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+        return changes
+
+    async def diff_page(
+        self,
+        changes: ChangeSet,
+        cursor: str | None = None,
+        globs: list[str] | None = None,
+        max_bytes: int = DIFF_PAGE_BYTES,
+        max_lines: int | None = None,
+    ) -> DiffPage:
+        """Render the diff from ``cursor`` on until a byte or line budget is hit.
+
+        git is asked for the patches of the files from the cursor on, up to
+        ``DIFF_PAGE_FILES`` at a time, and killed as soon as the budget is
+        spent, so cost and memory scale with the page, not the whole diff.
+        Pages break between hunks; the file header is repeated when a page
+        resumes mid-file. A single hunk larger than an empty page is cut at
+        the budget. Pass the same ``globs`` with every cursor.
+        """
+        store = self.store(changes.repo)
+        files = changes.select(globs)
+        file_index, hunk_offset = changes.parse_cursor(cursor) if cursor else (0, 0)
+        max_lines = max_lines if max_lines is not None else float("inf")
+
+        out: list[str] = []
+        used_bytes = used_lines = 0
+        for batch_start in range(file_index, len(files), DIFF_PAGE_FILES):
+            batch_end = min(batch_start + DIFF_PAGE_FILES, len(files))
+            async with (
+                self._patch(store, changes, files[batch_start:batch_end]) as stdout,
+                contextlib.aclosing(_patch_units(stdout, files, batch_start, batch_end)) as units,
+            ):
+                async for index, unit_index, header, unit in units:
+                    if index == file_index and unit_index < hunk_offset:
+                        continue
+                    # A page resuming mid-section repeats the section header
+                    opens_section = unit[0].startswith("diff --git ")
+                    chunk = unit if out or opens_section else header + unit
+                    chunk_bytes = sum(len(line.encode()) for line in chunk)
+                    chunk_lines = len(chunk)
+                    if used_bytes + chunk_bytes <= max_bytes and used_lines + chunk_lines <= max_lines:
+                        out.extend(chunk)
+                        used_bytes += chunk_bytes
+                        used_lines += chunk_lines
+                        continue
+                    if out:
+                        return DiffPage(
+                            "".join(out), used_lines, used_bytes,
+                            changes.cursor(index, unit_index),
+                        )
+                    chunk = _cut(chunk, max_bytes, max_lines)
+                    following = await anext(units, None)
+                    if following is not None:
+                        next_cursor = changes.cursor(*following[:2])
+                    elif batch_end < len(files):
+                        next_cursor = changes.cursor(batch_end, 0)
+                    else:
+                        next_cursor = None
+                    return DiffPage(
+                        "".join(chunk), len(chunk),
+                        sum(len(line.encode()) for line in chunk), next_cursor,
+                    )
+        return DiffPage("".join(out), used_lines, used_bytes, None)
+
+    async def close(self) -> None:
+        stores = list(self._stores.values())
+        self._stores.clear()
+        await asyncio.gather(*(store.close() for store in stores), *self._closing)
+
+    async def _analyze(self, store: GitObjectStore, base_sha: str, head_sha: str) -> ChangeSet:
+        (merge_base, commits) = await asyncio.gather(
+            store.merge_base(base_sha, head_sha),
+            self._commits_between(store, base_sha, head_sha),
+        )
+        changes = ChangeSet(store.repo, base_sha, head_sha, merge_base, commits=commits)
+        async with store.stream(
+            "diff-tree", "-r", "-M", "-z", "--raw", "--numstat", merge_base, head_sha
+        ) as stdout:
+            changes.files = await _read_changes(stdout)
+            # Read to EOF so a failed git run is reported instead of killed
+            await stdout.read()
+
+        binary = [change for change in changes.files if change.binary]
+        sizes = await store.sizes(
+            [sha for change in binary for sha in (change.old_sha, change.new_sha) if sha]
+        )
+        for change in binary:
+            change.old_size = sizes.get(change.old_sha, 0)
+            change.new_size = sizes.get(change.new_sha, 0)
+        return changes
+
+    def _patch(self, store: GitObjectStore, changes: ChangeSet, files: list[FileChange]):
+        paths = [
+            path for change in files for path in (change.old_path, change.path) if path
+        ]
+        return store.stream(
+            "--literal-pathspecs", "diff-tree", "-r", "-M", "-p",
+            changes.merge_base, changes.head_sha, "--", *paths,
+        )
+
+    async def _commits_between(
+        self, store: GitObjectStore, base_sha: str, head_sha: str
+    ) -> list[Commit]:
+        """Commits reachable from HEAD but not from base (``base..HEAD``), newest first."""
+        shas = (await store.git("rev-list", f"{base_sha}..{head_sha}")).split()
+        return await store.commits(shas)
+
+
+async def _read_changes(stdout: asyncio.StreamReader) -> list[FileChange]:
+    """Parse the ``--raw`` then ``--numstat`` records of ``diff-tree -z`` output."""
+
+    async def token() -> str:
+        return (await _read_until(stdout, b"\0"))[:-1].decode("utf-8", "surrogateescape")
+
+    files: list[FileChange] = []
+    record = await token()
+    while record.startswith(":"):
+        old_mode, new_mode, old_sha, new_sha, status = record[1:].split()
+        path = await token()
+        old_path = None
+        if status[0] in "RC":
+            old_path, path = path, await token()
+        files.append(
+            FileChange(
+                status,
+                path,
+                old_mode if old_mode != NULL_MODE else None,
+                new_mode if new_mode != NULL_MODE else None,
+                old_sha if old_sha.strip("0") else None,
+                new_sha if new_sha.strip("0") else None,
+                old_path=old_path,
+            )
+        )
+        record = await token()
+
+    for index, change in enumerate(files):
+        if index:
+            record = await token()
+        insertions, deletions, path = record.split("\t", 2)
+        if not path:
+            # Renames list both paths as separate records
+            await token()
+            await token()
+        if insertions == "-":
+            change.binary = True
+        else:
+            change.insertions, change.deletions = int(insertions), int(deletions)
+    return files
+
+
+async def _patch_units(
+    stdout: asyncio.StreamReader, files: list[FileChange], start: int, end: int
+) -> AsyncIterator[tuple[int, int, list[str], list[str]]]:
+    """Split ``diff-tree -p`` output for ``files[start:end]`` into page units.
+
+    Yields ``(file_index, unit_index, section_header, lines)``. A unit is one
+    hunk; the first hunk of a section carries the section's header lines, and
+    header-only sections (binary, mode change, pure rename) are one unit.
+    Sections that match none of the expected files are skipped.
+    """
+    index = start - 1
+    sections = unit_index = 0
+    header: list[str] = []
+    unit: list[str] = []
+    in_header = skipping = False
+    while line := (await _read_until(stdout, b"\n")).decode("utf-8", "replace"):
+        if line.startswith("diff --git "):
+            if unit and not skipping:
+                yield index, unit_index, header, unit
+            if (
+                index >= start
+                and line == files[index].patch_header()
+                and sections < files[index].patch_sections()
+            ):
+                sections += 1
+                unit_index += 1
+            else:
+                following = index + 1
+                while following < end and files[following].patch_header() != line:
+                    following += 1
+                skipping = following == end
+                if skipping:
+                    unit = []
+                    continue
+                index, sections, unit_index = following, 1, 0
+            skipping = False
+            header = unit = [line]
+            in_header = True
+        elif skipping:
+            continue
+        elif line.startswith("@@"):
+            if in_header:
+                in_header = False
+                header = list(header)
+            else:
+                yield index, unit_index, header, unit
+                unit_index += 1
+                unit = []
+            unit.append(line)
+        else:
+            unit.append(line)
+    if unit and not skipping:
+        yield index, unit_index, header, unit
+
+
+def _cut(chunk: list[str], max_bytes: int, max_lines: float) -> list[str]:
+    marker = "... hunk truncated to fit the diff budget ...\n"
+    kept: list[str] = []
+    used_bytes = len(marker)
+    used_lines = 1
+    for line in chunk:
+        used_bytes += len(line.encode())
+        used_lines += line.count("\n")
+        if used_bytes > max_bytes or used_lines > max_lines:
+            break
+        kept.append(line)
+    return kept + [marker]
@@ -1,21 +1,87 @@
 #!/usr/bin/env python3
+import asyncio
 import json
 import os
 import subprocess
-import requests
+from contextlib import asynccontextmanager
 from typing import Optional
 from pathlib import Path
+from urllib.parse import quote
 
+from pydantic import AnyUrl
 from mcp.types import TextContent
 from mcp.server.fastmcp import FastMCP
+from mcp.server.lowlevel import NotificationOptions
+from mcp.server.session import ServerSession
+from mcp.server.stdio import stdio_server
+
+from event_channel import EventSubscriber, WorkflowStatusView
+from event_store import EventStore
+from git_objects import DIFF_PAGE_BYTES, ChangeAnalyzer
+from slack_sender import SlackError, SlackSender
+from template_classifier import TemplateClassifier
+from tool_cache import ToolCache
+
+WORKFLOWS_URI = "workflows://status"
+
+
+@asynccontextmanager
+async def lifespan(server):
+    """Follow the webhook server's event socket while a client is connected."""
+    subscriber = asyncio.create_task(
+        EventSubscriber(events_store, workflow_view, notify_workflows_changed).run()
+    )
+    try:
+        yield
+    finally:
+        subscriber.cancel()
+        await asyncio.gather(subscriber, return_exceptions=True)
+        await slack.close()
+        await git_changes.close()
+
 
 # Initialize the FastMCP server
-mcp = FastMCP("pr-agent")
+mcp = FastMCP("pr-agent", lifespan=lifespan)
 
 # PR template directory (shared between starter and solution)
 TEMPLATES_DIR = Path(__file__).parent.parent.parent / "templates"
 EVENTS_FILE = Path(__file__).parent / "github_events.json"
 
+# Events written by webhook_server.py; older JSON history is imported once
+events_store = EventStore()
+events_store.import_json(EVENTS_FILE)
+
+# Latest status per workflow, pushed from webhook_server.py as events arrive
+workflow_view = WorkflowStatusView()
+workflow_view.load(events_store.latest_per_workflow())
+
+# Shared keep-alive Slack client; bursts of CI failure alerts become one digest
+slack = SlackSender(
+    os.getenv("SLACK_WEBHOOK_URL"),
+    timeout=float(os.getenv("SLACK_TIMEOUT_SECONDS", "10")),
+    max_retries=int(os.getenv("SLACK_MAX_RETRIES", "5")),
+    digest_window=float(os.getenv("SLACK_DIGEST_WINDOW_SECONDS", "0")),
+)
+
+# Sessions that asked for resources/updated notifications, by resource URI
+resource_subscriptions: dict[str, set[ServerSession]] = {}
+
+# Persistent git object readers and per-(base, HEAD) results, shared by all calls
+git_changes = ChangeAnalyzer(max_entries=int(os.getenv("GIT_CHANGES_CACHE_SIZE", "32")))
+
+# Memoized tool results, keyed by commit SHAs and template mtimes; set
+# PR_AGENT_CACHE_PATH to keep them on disk across restarts
+tool_cache = ToolCache(
+    max_entries=int(os.getenv("PR_AGENT_CACHE_SIZE", "256")),
+    path=os.getenv("PR_AGENT_CACHE_PATH"),
+)
+
+# Keyword/path index per template, compiled once for suggest_template
+template_classifier = TemplateClassifier()
+
+# (mtime key, parsed templates, JSON listing) from the last template read
+_templates: Optional[tuple[tuple, list[dict], str]] = None
+
 # Default PR templates
 DEFAULT_TEMPLATES = {
     "bug.md": "Bug Fix",
@@ -45,12 +111,32 @@ TYPE_MAPPING = {
 }
 
 
+async def _client_working_directory(working_directory: Optional[str]) -> Optional[str]:
+    """Return ``working_directory``, or the client's first root when it is None."""
+    # Try to get working directory from roots first
+    if working_directory is None:
+        try:
+            context = mcp.get_context()
+            roots_result = await context.session.list_roots()
+            # Get the first root - Claude Code sets this to the CWD
+            root = roots_result.roots[0]
+            # FileUrl object has a .path property that gives us the path directly
+            working_directory = root.uri.path
+        except Exception:
+            # If we can't get roots, fall back to current directory
+            pass
+    return working_directory
+
+
 @mcp.tool()
 async def analyze_file_changes(
     base_branch: str = "main",
     include_diff: bool = True,
     max_diff_lines: int = 500,
     working_directory: Optional[str] = None,
+    max_diff_bytes: int = DIFF_PAGE_BYTES,
+    cursor: Optional[str] = None,
+    paths: Optional[list[str]] = None,
 ) -> str:
     """Get the full diff and list of changed files in the current git repository.
 
@@ -59,20 +145,13 @@ async def analyze_file_changes(
         include_diff: Include the full diff content (default: true)
         max_diff_lines: Maximum number of diff lines to include (default: 500)
         working_directory: Directory to run git commands in (default: current directory)
+        max_diff_bytes: Maximum size of the diff page in bytes (default: 64000)
+        cursor: next_cursor from a previous call, to fetch the following diff page
+        paths: Only list, count and diff files matching any of these globs,
+            e.g. ["src/*.py"]; a rename matches by either path
     """
     try:
-        # Try to get working directory from roots first
-        if working_directory is None:
-            try:
-                context = mcp.get_context()
-                roots_result = await context.session.list_roots()
-                # Get the first root - Claude Code sets this to the CWD
-                root = roots_result.roots[0]
-                # FileUrl object has a .path property that gives us the path directly
-                working_directory = root.uri.path
-            except Exception:
-                # If we can't get roots, fall back to current directory
-                pass
+        working_directory = await _client_working_directory(working_directory)
 
         # Use provided working directory or current directory
         cwd = working_directory if working_directory else os.getcwd()
@@ -98,67 +177,66 @@ async def analyze_file_changes(
         except Exception as e:
             debug_info["roots_check"] = {"found": False, "error": str(e)}
 
-        # Get list of changed files
-        files_result = subprocess.run(
-            ["git", "diff", "--name-status", f"{base_branch}...HEAD"],
-            capture_output=True,
-            text=True,
-            check=True,
-            cwd=cwd,
+        # Results only depend on the resolved SHAs and the paging arguments
+        resolved = await git_changes.resolve(cwd, base_branch)
+        cache_key = ToolCache.key(
+            "analyze_file_changes",
+            resolved,
+            include_diff,
+            max_diff_lines,
+            max_diff_bytes,
+            cursor,
+            paths,
         )
+        cached = tool_cache.get(cache_key)
+        if cached is not None:
+            analysis = json.loads(cached)
+            analysis["_debug"] = debug_info
+            return json.dumps(analysis, indent=2)
 
-        # Get diff statistics
-        stat_result = subprocess.run(
-            ["git", "diff", "--stat", f"{base_branch}...HEAD"],
-            capture_output=True,
-            text=True,
-            cwd=cwd,
-        )
+        # Name-status, stats and commits come from one cached git diff-tree run
+        changes = await git_changes.analyze_resolved(resolved)
 
-        # Get the actual diff if requested
+        # Get the actual diff if requested, one bounded page at a time
         diff_content = ""
-        truncated = False
+        next_cursor = None
+        # From numstat, so the whole patch is never generated just to be counted
+        total_changed_lines = sum(
+            change.insertions + change.deletions for change in changes.select(paths)
+        )
         if include_diff:
-            diff_result = subprocess.run(
-                ["git", "diff", f"{base_branch}...HEAD"],
-                capture_output=True,
-                text=True,
-                cwd=cwd,
+            page = await git_changes.diff_page(
+                changes,
+                cursor=cursor,
+                globs=paths,
+                max_bytes=max_diff_bytes,
+                max_lines=max_diff_lines,
             )
-            diff_lines = diff_result.stdout.split("\n")
+            diff_content = page.text
+            next_cursor = page.next_cursor
 
-            # Check if we need to truncate
-            if len(diff_lines) > max_diff_lines:
-                diff_content = "\n".join(diff_lines[:max_diff_lines])
+            if next_cursor:
                 diff_content += f"\n\n... Output truncated. Showing {
-                    max_diff_lines
-                } of {len(diff_lines)} lines ..."
-                diff_content += "\n... Use max_diff_lines parameter to see more ..."
-                truncated = True
-            else:
-                diff_content = diff_result.stdout
-
-        # Get commit messages for context
-        commits_result = subprocess.run(
-            ["git", "log", "--oneline", f"{base_branch}..HEAD"],
-            capture_output=True,
-            text=True,
-            cwd=cwd,
-        )
+                    page.lines
+                } diff lines; {total_changed_lines} lines are added or removed in total ..."
+                diff_content += f"\n... Pass cursor={next_cursor!r} to see the next page ..."
 
         analysis = {
             "base_branch": base_branch,
-            "files_changed": files_result.stdout,
-            "statistics": stat_result.stdout,
-            "commits": commits_result.stdout,
+            "files_changed": changes.name_status(paths),
+            "statistics": changes.stat(globs=paths),
+            "commits": changes.log_oneline(),
             "diff": diff_content
             if include_diff
             else "Diff not included (set include_diff=true to see full diff)",
-            "truncated": truncated,
-            "total_diff_lines": len(diff_lines) if include_diff else 0,
-            "_debug": debug_info,
+            "truncated": next_cursor is not None,
+            "next_cursor": next_cursor,
+            "total_changed_lines": total_changed_lines,
         }
 
+        tool_cache.set(cache_key, json.dumps(analysis))
+
+        analysis["_debug"] = debug_info
         return json.dumps(analysis, indent=2)
 
     except subprocess.CalledProcessError as e:
@@ -167,36 +245,92 @@ async def analyze_file_changes(
         return json.dumps({"error": str(e)})
 
 
+def _load_templates() -> tuple[tuple, list[dict], str]:
+    """Return (mtime key, parsed templates, JSON listing), re-reading only on change."""
+    global _templates
+    key = tuple(
+        (filename, (TEMPLATES_DIR / filename).stat().st_mtime_ns)
+        for filename in DEFAULT_TEMPLATES
+    )
+    if _templates is None or _templates[0] != key:
+        templates = [
+            {
+                "filename": filename,
+                "type": template_type,
+                "content": (TEMPLATES_DIR / filename).read_text(),
+            }
+            for filename, template_type in DEFAULT_TEMPLATES.items()
+        ]
+        _templates = (key, templates, json.dumps(templates, indent=2))
+    return _templates
+
+
 @mcp.tool()
 async def get_pr_templates() -> str:
     """List available PR templates with their content."""
-    templates = [
-        {
-            "filename": filename,
-            "type": template_type,
-            "content": (TEMPLATES_DIR / filename).read_text(),
-        }
-        for filename, template_type in DEFAULT_TEMPLATES.items()
-    ]
-
-    return json.dumps(templates, indent=2)
+    return _load_templates()[2]
 
 
 @mcp.tool()
-async def suggest_template(changes_summary: str, change_type: str) -> str:
-    """Let Claude analyze the changes and suggest the most appropriate PR template.
+async def suggest_template(
+    changes_summary: str,
+    change_type: Optional[str] = None,
+    base_branch: str = "main",
+    working_directory: Optional[str] = None,
+) -> str:
+    """Suggest the most appropriate PR template for the current changes.
+
+    Without a change_type, templates are ranked locally from the changed
+    paths, diff stats and commit messages, so no separate classification
+    step is needed. A known change_type picks its template directly; the
+    repository is not read and the ranking comes from the summary alone.
 
     Args:
         changes_summary: Your analysis of what the changes do
-        change_type: The type of change you've identified (bug, feature, docs, refactor, test, etc.)
+        change_type: The type of change if already known (bug, feature, docs, refactor, test, etc.)
+        base_branch: Base branch to compare against (default: main)
+        working_directory: Directory to run git commands in (default: current directory)
     """
 
     # Get available templates
-    templates_response = await get_pr_templates()
-    templates = json.loads(templates_response)
+    templates_key, templates, _ = _load_templates()
+
+    # An explicit change_type decides the template, so skip the git analysis
+    explicit_type = bool(change_type) and change_type.lower() in TYPE_MAPPING
+
+    # The ranking only depends on the resolved SHAs, not on how HEAD was named
+    changes = None
+    resolved = None
+    if not explicit_type:
+        try:
+            cwd = await _client_working_directory(working_directory) or os.getcwd()
+            resolved = await git_changes.resolve(cwd, base_branch)
+        except Exception:
+            # Not a git checkout (or no base branch); rank from the summary alone
+            pass
+
+    cache_key = ToolCache.key(
+        "suggest_template", templates_key, changes_summary, change_type, resolved
+    )
+    cached = tool_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    if resolved is not None:
+        changes = await git_changes.analyze_resolved(resolved)
+    ranking = template_classifier.rank(changes, changes_summary)
 
     # Find matching template
-    template_file = TYPE_MAPPING.get(change_type.lower(), "feature.md")
+    if explicit_type:
+        template_file = TYPE_MAPPING[change_type.lower()]
+        reasoning = f"Based on your analysis: '{changes_summary}', this appears to be a {change_type} change."
+    else:
+        top = ranking[0]
+        template_file = top.filename
+        reasoning = (
+            f"Based on your analysis: '{changes_summary}', this appears to be a "
+            f"{DEFAULT_TEMPLATES[top.filename]} change ({', '.join(top.signals[:5])})."
+        )
     selected_template = next(
         (t for t in templates if t["filename"] == template_file),
         templates[0],  # Default to first template if no match
@@ -204,12 +338,23 @@ async def suggest_template(changes_summary: str, change_type: str) -> str:
 
     suggestion = {
         "recommended_template": selected_template,
-        "reasoning": f"Based on your analysis: '{changes_summary}', this appears to be a {change_type} change.",
+        "reasoning": reasoning,
+        "ranking": [
+            {
+                "filename": score.filename,
+                "type": DEFAULT_TEMPLATES[score.filename],
+                "score": round(score.score, 2),
+                "signals": score.signals,
+            }
+            for score in ranking
+        ],
         "template_content": selected_template["content"],
         "usage_hint": "Claude can help you fill out this template based on the specific changes in your PR.",
     }
 
-    return json.dumps(suggestion, indent=2)
+    result = json.dumps(suggestion, indent=2)
+    tool_cache.set(cache_key, result)
+    return result
 
 
 @mcp.tool()
@@ -220,15 +365,7 @@ async def get_recent_actions_events(limit: int = 10) -> str:
         limit: Maximum number of events to return (default: 10)
     """
     try:
-        if not EVENTS_FILE.exists():
-            return json.dumps([], indent=2)
-
-        with open(EVENTS_FILE, "r") as f:
-            events = json.load(f)
-
-        events.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-
-        recent_events = events[:limit]
+        recent_events = events_store.recent(limit)
         return json.dumps(recent_events, indent=2)
 
     except Exception as e:
@@ -243,46 +380,51 @@ async def get_workflow_status(workflow_name: Optional[str] = None) -> str:
        workflow_name: workflow name to filter
     """
     try:
-        if not EVENTS_FILE.exists():
-            return json.dumps({"error": "No events file found"})
-
-        with open(EVENTS_FILE, "r") as f:
-            events = json.load(f)
-
-        workflow_events = [e for e in events if e.get("workflow_run") is not None]
-
-        if workflow_name:
-            workflow_events = [
-                e
-                for e in workflow_events
-                if e["workflow_run"].get("name") == workflow_name
-            ]
-
-        workflow_status = {}
-        for event in workflow_events:
-            workflow_run = event.get("workflow_run", {})
-            workflow_name = workflow_run.get("name")
-
-            if workflow_name:
-                if (
-                    workflow_name not in workflow_status
-                    or event.get("timestamp", "")
-                    > workflow_status[workflow_name]["timestamp"]
-                ):
-                    workflow_status[workflow_name] = {
-                        "status": workflow_run.get("status", "unknown"),
-                        "conclusion": workflow_run.get("conclusion", "unknown"),
-                        "timestamp": event.get("timestamp", ""),
-                        "repository": event.get("repository", "unknown"),
-                        "html_url": workflow_run.get("html_url", ""),
-                    }
-
-        return json.dumps(workflow_status, indent=2)
+        # Served from the in-memory view; no store or file access per call
+        return json.dumps(workflow_view.snapshot(workflow_name), indent=2)
 
     except Exception as e:
         return json.dumps({"error": f"Failed to process workflow status: {str(e)}"})
 
 
+@mcp.resource(WORKFLOWS_URI, mime_type="application/json")
+def workflows_status() -> str:
+    """Latest status of every GitHub Actions workflow. Subscribe for updates."""
+    return json.dumps(workflow_view.snapshot(), indent=2)
+
+
+@mcp.resource(WORKFLOWS_URI + "/{workflow_name}", mime_type="application/json")
+def workflow_status(workflow_name: str) -> str:
+    """Latest status of one GitHub Actions workflow. Subscribe for updates."""
+    return json.dumps(workflow_view.snapshot(workflow_name), indent=2)
+
+
+@mcp._mcp_server.subscribe_resource()
+async def subscribe_resource(uri: AnyUrl) -> None:
+    session = mcp._mcp_server.request_context.session
+    resource_subscriptions.setdefault(str(uri), set()).add(session)
+
+
+@mcp._mcp_server.unsubscribe_resource()
+async def unsubscribe_resource(uri: AnyUrl) -> None:
+    session = mcp._mcp_server.request_context.session
+    resource_subscriptions.get(str(uri), set()).discard(session)
+
+
+async def notify_workflows_changed(workflow_names: list[str]) -> None:
+    """Send resources/updated to every session subscribed to a changed workflow."""
+    uris = [WORKFLOWS_URI] + [
+        f"{WORKFLOWS_URI}/{quote(name, safe='')}" for name in workflow_names
+    ]
+    for uri in uris:
+        for session in list(resource_subscriptions.get(uri, ())):
+            try:
+                await session.send_resource_updated(AnyUrl(uri))
+            except Exception:
+                # The client went away; stop notifying it
+                resource_subscriptions[uri].discard(session)
+
+
 @mcp.prompt()
 async def analyze_ci_results():
     """Analyze recent CI/CD results and provide insights."""
@@ -411,23 +553,24 @@ Structure your response as:
 
 
 @mcp.tool()
-def send_slack_notification(message: str) -> str:
-    """Send a formatted notification to the team Slack channel."""
-    webhook_url = os.getenv("SLACK_WEBHOOK_URL")
-    if not webhook_url:
+async def send_slack_notification(message: str, coalesce: Optional[bool] = None) -> str:
+    """Send a formatted notification to the team Slack channel.
+
+    Args:
+        message: Slack-formatted message text
+        coalesce: Merge into a digest with other alerts sent in the same burst
+            (default: only CI failure alerts, when SLACK_DIGEST_WINDOW_SECONDS is set)
+    """
+    if not slack.webhook_url:
         return "Error: SLACK_WEBHOOK_URL environment variable not set"
 
     try:
-        payload = {"text": message, "mrkdwn": True}
-
-        response = requests.post(
-            webhook_url, json=payload, headers={"Content-Type": "application/json"}
-        )
-
-        if response.status_code == 200:
-            return "Success: Notification sent to Slack"
-        else:
-            return f"Error: Failed to send notification. Status code: {response.status_code}"
+        delivered = await slack.send(message, coalesce)
+        if delivered > 1:
+            return f"Success: Notification sent to Slack in a digest of {delivered} alerts"
+        return "Success: Notification sent to Slack"
+    except SlackError as e:
+        return str(e)
     except Exception as e:
         return f"Error sending message: {str(e)}"
 
@@ -471,5 +614,16 @@ Deployment completed successfully for [Repository Name]
 Keep it celebratory but informative. Use Slack markdown formatting."""
 
 
+async def run_stdio() -> None:
+    """Like ``mcp.run()``, but advertising resource subscriptions to clients."""
+    server = mcp._mcp_server
+    options = server.create_initialization_options(
+        NotificationOptions(resources_changed=True)
+    )
+    options.capabilities.resources.subscribe = True
+    async with stdio_server() as (read_stream, write_stream):
+        await server.run(read_stream, write_stream, options)
+
+
 if __name__ == "__main__":
-    mcp.run()
+    asyncio.run(run_stdio())
@@ -0,0 +1,150 @@
+import asyncio
+import random
+
+import aiohttp
+
+SLACK_MAX_TEXT_LENGTH = 40_000
+FAILURE_ALERT_MARKER = "CI Failure Alert"
+
+
+class SlackError(Exception):
+    def __init__(self, message: str, status: int | None = None):
+        super().__init__(message)
+        self.status = status
+
+
+class SlackSender:
+    """Posts to a Slack incoming webhook over one shared keep-alive session.
+
+    429 and 5xx responses, timeouts and connection errors are retried up to
+    ``max_retries`` times with full-jitter exponential backoff, waiting at
+    least as long as Slack's ``Retry-After`` when it sends one, up to
+    ``backoff_cap`` seconds. With
+    ``digest_window`` > 0, coalesced messages (CI failure alerts by default)
+    arriving within that many seconds of the first one are posted as a
+    single digest, and every caller gets the digest's outcome.
+    """
+
+    def __init__(
+        self,
+        webhook_url: str | None,
+        timeout: float = 10.0,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 30.0,
+        digest_window: float = 0.0,
+        pool_size: int = 4,
+    ):
+        self.webhook_url = webhook_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.digest_window = digest_window
+        self.pool_size = pool_size
+
+        self._session: aiohttp.ClientSession | None = None
+        self._digest: list[str] = []
+        self._digest_result: asyncio.Future | None = None
+        self._digest_task: asyncio.Task | None = None
+
+        self.sent = 0
+        self.retried = 0
+        self.coalesced = 0
+
+    async def send(self, message: str, coalesce: bool | None = None) -> int:
+        """Post ``message``; return how many alerts the delivered post carried.
+
+        ``coalesce=None`` coalesces CI failure alerts only.
+        """
+        if coalesce is None:
+            coalesce = FAILURE_ALERT_MARKER in message
+        if not (coalesce and self.digest_window > 0):
+            await self._post(message)
+            return 1
+
+        self._digest.append(message)
+        if self._digest_result is None:
+            self._digest_result = asyncio.get_running_loop().create_future()
+            self._digest_task = asyncio.create_task(
+                self._flush_digest(self._digest_result)
+            )
+        return await asyncio.shield(self._digest_result)
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _flush_digest(self, result: asyncio.Future) -> None:
+        await asyncio.sleep(self.digest_window)
+        messages, self._digest = self._digest, []
+        self._digest_result = None
+        self.coalesced += len(messages) - 1
+        try:
+            await self._post(_format_digest(messages))
+        except Exception as exc:
+            result.set_exception(exc)
+            # Waiters see the exception; don't warn if they were cancelled
+            result.exception()
+        else:
+            result.set_result(len(messages))
+
+    async def _post(self, text: str) -> None:
+        session = self._ensure_session()
+        payload = {"text": text[:SLACK_MAX_TEXT_LENGTH], "mrkdwn": True}
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                async with session.post(self.webhook_url, json=payload) as response:
+                    if response.status == 200:
+                        self.sent += 1
+                        return
+                    if response.status != 429 and response.status < 500:
+                        raise SlackError(
+                            f"Error: Failed to send notification. Status code: {response.status}",
+                            response.status,
+                        )
+                    error = SlackError(
+                        f"Error: Failed to send notification. Status code: {response.status}",
+                        response.status,
+                    )
+                    retry_after = _retry_after(response.headers.get("Retry-After"))
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                error = SlackError(f"Error sending message: {exc}")
+
+            if attempt == self.max_retries:
+                raise error
+            self.retried += 1
+            delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2**attempt))
+            if retry_after is not None:
+                # Capped, so one response cannot stall the caller indefinitely
+                retry_after = min(retry_after, self.backoff_cap)
+                delay = max(delay, retry_after + random.uniform(0, self.backoff_base))
+            await asyncio.sleep(delay)
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"Content-Type": "application/json"},
+            )
+        return self._session
+
+
+def _retry_after(value: str | None) -> float | None:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _format_digest(messages: list[str]) -> str:
+    if len(messages) == 1:
+        return messages[0]
+    if all(FAILURE_ALERT_MARKER in message for message in messages):
+        header = f":rotating_light: *{len(messages)} CI failure alerts* :rotating_light:"
+    else:
+        header = f"*{len(messages)} notifications*"
+    return "\n\n".join([header, *(f"*{i}.* {m}" for i, m in enumerate(messages, 1))])
@@ -0,0 +1,175 @@
+import re
+from dataclasses import dataclass, field
+from fnmatch import translate
+
+from git_objects import ChangeSet
+
+# Per-template signals. Keyword weights apply to words in commit subjects and
+# the caller's summary; a conventional-commit prefix (``fix:``,
+# ``feat(api):``) counts PREFIX_WEIGHT times. Path globs score the fraction
+# of changed files they match.
+TEMPLATE_SIGNALS = {
+    "bug.md": {
+        "prefixes": ["fix", "bugfix", "hotfix"],
+        "keywords": {
+            "fix": 3, "fixes": 3, "fixed": 3, "bug": 3, "hotfix": 3, "regression": 2,
+            "crash": 2, "error": 1, "broken": 2, "issue": 1, "incorrect": 1, "wrong": 1,
+            "exception": 1, "handle": 1, "patch": 1,
+        },
+        "paths": [],
+    },
+    "feature.md": {
+        "prefixes": ["feat", "feature"],
+        "keywords": {
+            "add": 2, "adds": 2, "added": 2, "feature": 3, "new": 1, "implement": 2,
+            "introduce": 2, "support": 1, "enhancement": 2, "endpoint": 1, "allow": 1,
+        },
+        "paths": [],
+    },
+    "docs.md": {
+        "prefixes": ["docs", "doc"],
+        "keywords": {
+            "docs": 3, "documentation": 3, "readme": 3, "typo": 2, "docstring": 2,
+            "comment": 1, "comments": 1, "guide": 1, "changelog": 2,
+        },
+        "paths": ["*.md", "*.rst", "*.txt", "docs/*", "*/docs/*", "*README*", "*CHANGELOG*"],
+    },
+    "refactor.md": {
+        "prefixes": ["refactor", "chore", "style", "cleanup"],
+        "keywords": {
+            "refactor": 3, "cleanup": 3, "clean": 1, "rename": 2, "move": 1, "extract": 2,
+            "simplify": 2, "restructure": 2, "reorganize": 2, "remove": 1, "unused": 2,
+            "deprecated": 1, "lint": 1, "format": 1,
+        },
+        "paths": [],
+    },
+    "test.md": {
+        "prefixes": ["test", "tests"],
+        "keywords": {
+            "test": 3, "tests": 3, "testing": 3, "coverage": 2, "spec": 2, "fixture": 2,
+            "mock": 1, "pytest": 2, "flaky": 2,
+        },
+        "paths": [
+            "test_*.py", "*/test_*.py", "*_test.py", "*_test.go", "tests/*", "*/tests/*",
+            "*.spec.*", "*.test.*", "__tests__/*", "*/__tests__/*", "conftest.py", "*/conftest.py",
+        ],
+    },
+    "performance.md": {
+        "prefixes": ["perf"],
+        "keywords": {
+            "performance": 3, "perf": 3, "optimize": 3, "optimization": 3, "faster": 2,
+            "speed": 2, "latency": 2, "cache": 2, "caching": 2, "memory": 1, "throughput": 2,
+            "slow": 1, "benchmark": 2, "profile": 1,
+        },
+        "paths": ["bench/*", "benchmarks/*", "*/benchmarks/*", "*_bench*", "*benchmark*"],
+    },
+    "security.md": {
+        "prefixes": ["security", "sec"],
+        "keywords": {
+            "security": 3, "vulnerability": 3, "cve": 3, "xss": 3, "csrf": 3, "injection": 3,
+            "auth": 2, "authentication": 2, "permission": 2, "sanitize": 2, "secret": 2,
+            "token": 1, "encrypt": 2, "dependabot": 2,
+        },
+        "paths": ["*auth*", "*security*", "*secrets*", "*.lock", "requirements*.txt"],
+    },
+}
+
+PREFIX_WEIGHT = 3
+PATH_WEIGHT = 6
+FALLBACK_TEMPLATE = "feature.md"
+
+_WORD = re.compile(r"[a-z][a-z0-9]+")
+_PREFIX = re.compile(r"^\s*([a-z]+)(?:\([^)]*\))?!?:")
+
+
+@dataclass
+class TemplateScore:
+    filename: str
+    score: float = 0.0
+    signals: list[str] = field(default_factory=list)
+
+
+class TemplateClassifier:
+    """Ranks PR templates from changed paths, diff stats and commit messages.
+
+    Keyword and path signals are compiled once into an inverted word index
+    and one regex per template, so classifying a change set is a handful of
+    dict lookups and regex matches; no model call is involved and the same
+    input always yields the same ranking.
+    """
+
+    def __init__(self, signals: dict = TEMPLATE_SIGNALS):
+        self._keywords: dict[str, list[tuple[str, int]]] = {}
+        self._prefixes: dict[str, str] = {}
+        self._paths: dict[str, re.Pattern] = {}
+        for filename, spec in signals.items():
+            for word, weight in spec["keywords"].items():
+                self._keywords.setdefault(word, []).append((filename, weight))
+            for prefix in spec["prefixes"]:
+                self._prefixes[prefix] = filename
+            if spec["paths"]:
+                self._paths[filename] = re.compile(
+                    "|".join(translate(glob) for glob in spec["paths"]), re.IGNORECASE
+                )
+        self.filenames = list(signals)
+
+    def rank(
+        self,
+        changes: ChangeSet | None = None,
+        summary: str = "",
+        commit_messages: list[str] | None = None,
+    ) -> list[TemplateScore]:
+        scores = {filename: TemplateScore(filename) for filename in self.filenames}
+        messages = list(commit_messages or [])
+        if changes is not None:
+            messages += [commit.subject for commit in changes.commits]
+
+        for message in messages:
+            match = _PREFIX.match(message.lower())
+            if match and match.group(1) in self._prefixes:
+                score = scores[self._prefixes[match.group(1)]]
+                score.score += PREFIX_WEIGHT
+                score.signals.append(f"commit prefix '{match.group(1)}:'")
+
+        for text in [summary, *messages]:
+            for word in dict.fromkeys(_WORD.findall(text.lower())):
+                for filename, weight in self._keywords.get(word, ()):
+                    scores[filename].score += weight
+                    scores[filename].signals.append(f"keyword '{word}'")
+
+        if changes is not None and changes.files:
+            self._score_files(changes, scores)
+
+        ranked = sorted(
+            scores.values(),
+            # Ties fall back to the template order, so results are stable
+            key=lambda s: (-s.score, self.filenames.index(s.filename)),
+        )
+        if ranked[0].score == 0:
+            fallback = scores[FALLBACK_TEMPLATE]
+            fallback.signals.append("no signals; defaulting")
+            ranked.remove(fallback)
+            ranked.insert(0, fallback)
+        return ranked
+
+    def _score_files(self, changes: ChangeSet, scores: dict[str, TemplateScore]) -> None:
+        files = changes.files
+        for filename, pattern in self._paths.items():
+            matched = sum(1 for change in files if pattern.match(change.path))
+            if matched:
+                share = matched / len(files)
+                scores[filename].score += PATH_WEIGHT * share
+                scores[filename].signals.append(f"{matched}/{len(files)} paths match")
+
+        added = sum(change.status == "A" for change in files)
+        insertions = sum(change.insertions for change in files)
+        deletions = sum(change.deletions for change in files)
+        if added and added / len(files) >= 0.3:
+            scores["feature.md"].score += 2
+            scores["feature.md"].signals.append(f"{added} new files")
+        if deletions > insertions * 1.5 and deletions > 20:
+            scores["refactor.md"].score += 2
+            scores["refactor.md"].signals.append(f"net -{deletions - insertions} lines")
+        if insertions + deletions <= 10 and not added:
+            scores["bug.md"].score += 1
+            scores["bug.md"].signals.append("small, targeted diff")
@@ -0,0 +1,76 @@
+import os
+import subprocess
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# server.py opens the event store at import time; keep it out of the app dir
+os.environ.setdefault("EVENTS_DB_PATH", str(Path(tempfile.mkdtemp()) / "events.sqlite3"))
+
+GIT_ENV = {
+    **os.environ,
+    "GIT_AUTHOR_NAME": "test",
+    "GIT_AUTHOR_EMAIL": "test@example.com",
+    "GIT_COMMITTER_NAME": "test",
+    "GIT_COMMITTER_EMAIL": "test@example.com",
+    "GIT_CONFIG_GLOBAL": os.devnull,
+    "GIT_CONFIG_NOSYSTEM": "1",
+}
+
+
+def git(repo: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", *args],
+        cwd=repo,
+        check=True,
+        capture_output=True,
+        env=GIT_ENV,
+    ).stdout.decode("utf-8", "replace")
+
+
+def write(repo: Path, name: str, content: str | bytes) -> None:
+    path = repo / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(content, str):
+        content = content.encode()
+    path.write_bytes(content)
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> Path:
+    """A main branch and a feature branch exercising every kind of change."""
+    git(tmp_path, "init", "-q", "-b", "main")
+    lines = "".join(f"line {n}\n" for n in range(200))
+    write(tmp_path, "src/app.py", "def main():\n" + lines)
+    write(tmp_path, "src/old_name.py", lines)
+    write(tmp_path, "src/pure_rename.txt", "same\n")
+    write(tmp_path, "deleted.txt", "bye\n")
+    write(tmp_path, "script.sh", "echo hi\n")
+    write(tmp_path, "logo.bin", b"\0\1\2binary")
+    write(tmp_path, "separators.txt", "a\fb\n c\x0bd\n e\x1cf\n g h\n" + lines)
+    write(tmp_path, "no_newline.txt", "last")
+    os.symlink("script.sh", tmp_path / "link")
+    git(tmp_path, "add", "-A")
+    git(tmp_path, "commit", "-q", "-m", "Initial import")
+
+    git(tmp_path, "checkout", "-q", "-b", "feature")
+    write(tmp_path, "src/app.py", "def main():\n" + lines.replace("line 150\n", "changed\n"))
+    git(tmp_path, "mv", "src/old_name.py", "src/new_name.py")
+    write(tmp_path, "src/new_name.py", lines + "appended\n")
+    (tmp_path / "docs").mkdir()
+    git(tmp_path, "mv", "src/pure_rename.txt", "docs/pure_rename.txt")
+    (tmp_path / "deleted.txt").unlink()
+    (tmp_path / "script.sh").chmod(0o755)
+    write(tmp_path, "logo.bin", b"\0\1\2binary, but longer")
+    write(tmp_path, "separators.txt", "a\fB\n c\x0bd\n e\x1cf\n g H\n" + lines)
+    write(tmp_path, "no_newline.txt", "last, changed")
+    (tmp_path / "link").unlink()
+    write(tmp_path, "link", "a regular file now\n")
+    write(tmp_path, "café menu.txt", "espresso\n")
+    write(tmp_path, "a/very/deeply/nested/directory/structure/with/a/long/file_name.txt", "x\n" * 500)
+    git(tmp_path, "add", "-A")
+    git(tmp_path, "commit", "-q", "-m", "Rework everything")
+    write(tmp_path, "src/app.py", "def main():\n" + lines.replace("line 10\n", "first\n"))
+    git(tmp_path, "commit", "-q", "-am", "fix: second hunk")
+    return tmp_path
@@ -0,0 +1,195 @@
+import asyncio
+import json
+
+import pytest
+
+from event_channel import EventPublisher, EventSubscriber, WorkflowStatusView
+from event_store import EventStore
+
+
+def event(n: int, workflow: str = "CI", conclusion: str = "success") -> dict:
+    return {
+        "timestamp": f"2026-01-01T00:00:{n:02d}",
+        "workflow_run": {"name": workflow, "status": "completed", "conclusion": conclusion},
+    }
+
+
+async def until(condition, timeout: float = 2.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    # Unix socket paths are limited to ~100 bytes; pytest's tmp_path can exceed that
+    return str(tmp_path / "e.sock") if len(str(tmp_path)) < 80 else "/tmp/pr-agent-test.sock"
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = EventStore(str(tmp_path / "events.db"))
+    yield store
+    store.close()
+
+
+def test_view_only_moves_forward():
+    view = WorkflowStatusView()
+
+    assert view.apply(event(2, conclusion="failure")) == "CI"
+    assert view.apply(event(1)) is None
+    assert view.apply(event(2, conclusion="failure")) is None
+    assert view.snapshot("CI")["CI"]["conclusion"] == "failure"
+    assert view.apply({"timestamp": "x"}) is None
+    assert view.apply({"workflow_run": "CI"}) is None
+
+
+async def test_subscriber_follows_published_events(store, socket_path):
+    publisher = EventPublisher(socket_path)
+    await publisher.start()
+    view = WorkflowStatusView()
+    changes: list[list[str]] = []
+
+    async def on_change(names):
+        changes.append(names)
+
+    subscriber = asyncio.create_task(EventSubscriber(store, view, on_change, socket_path).run())
+    try:
+        await until(lambda: publisher._subscribers)
+        publisher.publish([event(1, "CI"), event(2, "Lint", "failure")])
+        await until(lambda: len(view.snapshot()) == 2)
+    finally:
+        subscriber.cancel()
+        await publisher.stop()
+
+    assert view.snapshot("Lint")["Lint"]["conclusion"] == "failure"
+
+
+async def test_events_published_before_subscribing_are_replayed(store, socket_path):
+    publisher = EventPublisher(socket_path)
+    await publisher.start()
+    # Committed and published, but not indexed into the store yet
+    publisher.publish([event(1, "CI", "failure")])
+    view = WorkflowStatusView()
+
+    async def on_change(names):
+        pass
+
+    subscriber = asyncio.create_task(EventSubscriber(store, view, on_change, socket_path).run())
+    try:
+        await until(lambda: view.snapshot("CI"))
+    finally:
+        subscriber.cancel()
+        await publisher.stop()
+
+    assert view.snapshot("CI")["CI"]["conclusion"] == "failure"
+
+
+async def test_store_is_loaded_after_registration(store, socket_path):
+    store.append(event(1, "Deploy"))
+    publisher = EventPublisher(socket_path)
+    await publisher.start()
+    view = WorkflowStatusView()
+
+    async def on_change(names):
+        pass
+
+    subscriber = asyncio.create_task(EventSubscriber(store, view, on_change, socket_path).run())
+    try:
+        await until(lambda: view.snapshot("Deploy"))
+    finally:
+        subscriber.cancel()
+        await publisher.stop()
+
+
+async def test_malformed_lines_are_skipped(store, socket_path, capsys):
+    publisher = EventPublisher(socket_path)
+    await publisher.start()
+    view = WorkflowStatusView()
+
+    async def on_change(names):
+        pass
+
+    subscriber = asyncio.create_task(EventSubscriber(store, view, on_change, socket_path).run())
+    try:
+        await until(lambda: publisher._subscribers)
+        (queue,) = publisher._subscribers
+        queue.put_nowait(b"not json\n" + (json.dumps(event(3)) + "\n").encode())
+        await until(lambda: view.snapshot("CI"))
+        assert not subscriber.done()
+    finally:
+        subscriber.cancel()
+        await publisher.stop()
+
+    assert "malformed" in capsys.readouterr().out
+
+
+async def test_long_and_non_object_lines_are_handled(store, socket_path, capsys):
+    publisher = EventPublisher(socket_path)
+    await publisher.start()
+    view = WorkflowStatusView()
+
+    async def on_change(names):
+        pass
+
+    subscriber = asyncio.create_task(EventSubscriber(store, view, on_change, socket_path).run())
+    try:
+        await until(lambda: publisher._subscribers)
+        (queue,) = publisher._subscribers
+        # Well past the 64 KB a StreamReader reads by default
+        large = event(2, "Large")
+        large["workflow_run"]["html_url"] = "x" * 200_000
+        lines = [b"[1, 2]\n", b'"text"\n', json.dumps(large).encode() + b"\n"]
+        queue.put_nowait(b"".join(lines) + (json.dumps(event(3)) + "\n").encode())
+        await until(lambda: view.snapshot("CI"))
+        assert not subscriber.done()
+    finally:
+        subscriber.cancel()
+        await publisher.stop()
+
+    assert view.snapshot("Large")
+    assert capsys.readouterr().out.count("non-object") == 2
+
+
+async def test_unexpected_error_is_logged_and_followed_by_a_reconnect(store, socket_path, capsys):
+    publisher = EventPublisher(socket_path)
+    await publisher.start()
+    view = WorkflowStatusView()
+    calls = []
+
+    async def on_change(names):
+        calls.append(names)
+        if len(calls) == 1:
+            raise RuntimeError("notification failed")
+
+    subscriber = asyncio.create_task(EventSubscriber(store, view, on_change, socket_path).run())
+    try:
+        await until(lambda: publisher._subscribers)
+        publisher.publish([event(1, "CI")])
+        await until(lambda: calls)
+        publisher.publish([event(2, "Lint")])
+        await until(lambda: view.snapshot("Lint"))
+        assert not subscriber.done()
+    finally:
+        subscriber.cancel()
+        await publisher.stop()
+
+    assert "Reconnecting after RuntimeError: notification failed" in capsys.readouterr().out
+
+
+async def test_slow_subscriber_is_disconnected(store, socket_path):
+    publisher = EventPublisher(socket_path, max_backlog=1)
+    await publisher.start()
+    try:
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+        await until(lambda: publisher._subscribers)
+        (queue,) = publisher._subscribers
+        # Fill the backlog without letting the server task drain it
+        queue.put_nowait(b"")
+        publisher.publish([event(1)])
+
+        assert not publisher._subscribers
+        writer.close()
+    finally:
+        await publisher.stop()
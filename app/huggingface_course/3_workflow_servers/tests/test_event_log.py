@@ -0,0 +1,130 @@
+import asyncio
+import os
+
+import pytest
+
+from event_log import SEALED_SUFFIX, Backpressure, EventLog
+from event_store import EventStore
+
+
+def event(n: int) -> dict:
+    return {"timestamp": f"2026-01-01T00:00:{n:02d}", "workflow_run": {"name": "CI"}, "n": n}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = EventStore(str(tmp_path / "events.db"), retention=0)
+    yield store
+    store.close()
+
+
+async def test_appended_events_are_durable_and_indexed(tmp_path, store):
+    log = EventLog(store, str(tmp_path / "log"))
+    await log.start()
+
+    acks = await asyncio.gather(*(log.append(event(n)) for n in range(20)))
+    await log.stop()
+
+    assert all(acks)
+    # Concurrent appends were group-committed
+    assert log.commits < 20
+    assert sorted(e["n"] for e in store.recent(100)) == list(range(20))
+
+
+async def test_failing_listener_does_not_stop_the_writer(tmp_path, store, capsys):
+    log = EventLog(store, str(tmp_path / "log"))
+    seen = []
+
+    def broken(events):
+        raise RuntimeError("boom")
+
+    log.listeners += [broken, seen.extend]
+    await log.start()
+
+    assert await log.append(event(1))
+    assert await log.append(event(2))
+    await log.stop()
+
+    assert [e["n"] for e in seen] == [1, 2]
+    assert len(store.recent(10)) == 2
+    assert "boom" in capsys.readouterr().out
+
+
+async def test_unindexed_events_are_replayed_on_start(tmp_path, store):
+    log = EventLog(store, str(tmp_path / "log"))
+    await log.start()
+    await log.append(event(1))
+    await log.stop()
+
+    # A fresh store has no checkpoint, as if indexing never happened
+    fresh = EventStore(str(tmp_path / "fresh.db"), retention=0)
+    replay = EventLog(fresh, str(tmp_path / "log"))
+    await replay.start()
+    await replay.stop()
+
+    assert fresh.recent(10) == [event(1)]
+    fresh.close()
+
+
+async def test_torn_last_line_is_dropped_on_recovery(tmp_path, store):
+    log = EventLog(store, str(tmp_path / "log"))
+    await log.start()
+    await log.append(event(1))
+    await log.stop()
+    (segment,) = (tmp_path / "log").iterdir()
+    with open(segment, "ab") as f:
+        f.write(b'{"torn": ')
+
+    fresh = EventStore(str(tmp_path / "fresh.db"), retention=0)
+    replay = EventLog(fresh, str(tmp_path / "log"))
+    await replay.start()
+    await replay.stop()
+
+    assert fresh.recent(10) == [event(1)]
+    assert not segment.read_bytes().endswith(b'{"torn": ')
+    fresh.close()
+
+
+async def test_sealed_segments_are_compacted(tmp_path, store):
+    log = EventLog(store, str(tmp_path / "log"), segment_bytes=200)
+    await log.start()
+    for n in range(10):
+        await log.append(event(n))
+    await log.stop()
+
+    assert len(store.recent(100)) == 10
+    assert not list((tmp_path / "log").glob(f"*{SEALED_SUFFIX}"))
+
+
+async def test_full_queue_raises_backpressure(tmp_path, store):
+    # Not started, so nothing drains the queue
+    log = EventLog(store, str(tmp_path / "log"), max_pending=1, ack_timeout=0.01)
+
+    assert await log.append(event(1)) is False
+    with pytest.raises(Backpressure):
+        await log.append(event(2))
+    assert log.stats()["rejected"] == 1
+
+
+async def test_failed_rotation_does_not_fail_the_batch(tmp_path, store, monkeypatch, capsys):
+    log = EventLog(store, str(tmp_path / "log"), segment_bytes=50)
+    await log.start()
+    replace = os.replace
+    attempts = []
+
+    def flaky_replace(src, dst):
+        attempts.append(dst)
+        if len(attempts) == 1:
+            raise OSError("read-only file system")
+        replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", flaky_replace)
+
+    assert await log.append(event(1)) is True
+    assert await log.append(event(2)) is True
+    await log.stop()
+
+    assert "Failed to rotate segment 0" in capsys.readouterr().out
+    # The next commit rotated the segment that had kept growing
+    assert len(attempts) == 2 and log.stats()["segment"] == 1
+    assert sorted(e["n"] for e in store.recent(100)) == [1, 2]
@@ -0,0 +1,89 @@
+import json
+import threading
+
+from event_store import EventStore
+
+
+def event(n: int, workflow: str = "CI", conclusion: str = "success") -> dict:
+    return {
+        "timestamp": f"2026-01-01T00:00:{n:02d}",
+        "action": "completed",
+        "workflow_run": {"name": workflow, "conclusion": conclusion},
+    }
+
+
+def test_recent_is_newest_first(tmp_path):
+    store = EventStore(str(tmp_path / "events.db"))
+    store.append_many([event(n) for n in range(5)])
+
+    assert [e["timestamp"] for e in store.recent(2)] == [event(4)["timestamp"], event(3)["timestamp"]]
+
+
+def test_latest_per_workflow(tmp_path):
+    store = EventStore(str(tmp_path / "events.db"))
+    store.append_many([event(1, "CI", "failure"), event(2, "Lint"), event(3, "CI")])
+
+    latest = {e["workflow_run"]["name"]: e for e in store.latest_per_workflow()}
+
+    assert latest["CI"] == event(3, "CI")
+    assert latest["Lint"] == event(2, "Lint")
+    assert store.latest_per_workflow("Lint") == [event(2, "Lint")]
+
+
+def test_retention_keeps_the_newest_events(tmp_path):
+    store = EventStore(str(tmp_path / "events.db"), retention=3)
+    store.append_many([event(n) for n in range(10)])
+
+    assert len(store.recent(100)) == 3
+    assert store.recent(1) == [event(9)]
+
+
+def test_checkpoint_commits_with_its_batch(tmp_path):
+    store = EventStore(str(tmp_path / "events.db"))
+    assert store.checkpoint() == (0, 0)
+
+    store.append_many([event(1)], checkpoint=(2, 128))
+
+    assert store.checkpoint() == (2, 128)
+
+
+def test_import_json_runs_once(tmp_path):
+    legacy = tmp_path / "github_events.json"
+    legacy.write_text(json.dumps([event(n) for n in range(4)]))
+    store = EventStore(str(tmp_path / "events.db"), retention=0)
+
+    assert store.import_json(legacy) == 4
+    # Emptied later (e.g. by retention): the legacy file is not imported again
+    store._db.execute("DELETE FROM events")
+    assert store.import_json(legacy) == 0
+    assert EventStore(str(tmp_path / "events.db")).import_json(legacy) == 0
+    assert store.recent(10) == []
+
+
+def test_import_json_skips_a_populated_store(tmp_path):
+    legacy = tmp_path / "github_events.json"
+    legacy.write_text(json.dumps([event(1)]))
+    store = EventStore(str(tmp_path / "events.db"))
+    store.append(event(2))
+
+    assert store.import_json(legacy) == 0
+    assert store.recent(10) == [event(2)]
+
+
+def test_concurrent_imports_load_the_file_once(tmp_path):
+    legacy = tmp_path / "github_events.json"
+    legacy.write_text(json.dumps([event(n) for n in range(50)]))
+    stores = [EventStore(str(tmp_path / "events.db"), retention=0) for _ in range(4)]
+    imported = []
+
+    threads = [
+        threading.Thread(target=lambda store=store: imported.append(store.import_json(legacy)))
+        for store in stores
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(imported) == [0, 0, 0, 50]
+    assert len(stores[0].recent(100)) == 50
@@ -0,0 +1,211 @@
+import asyncio
+import subprocess
+
+import pytest
+
+from conftest import git, write
+from git_objects import ChangeAnalyzer, GitObjectStore
+
+
+@pytest.fixture
+async def analyzer():
+    analyzer = ChangeAnalyzer()
+    yield analyzer
+    await analyzer.close()
+
+
+async def test_name_status_matches_git(repo, analyzer):
+    changes = await analyzer.analyze(str(repo), "main")
+
+    assert changes.name_status() == git(repo, "diff", "--name-status", "main...HEAD")
+    statuses = {change.path: change.status for change in changes.files}
+    assert statuses["src/new_name.py"].startswith("R")
+    assert statuses["docs/pure_rename.txt"] == "R100"
+    assert statuses["link"] == "T"
+
+
+async def test_stat_matches_git(repo, analyzer):
+    changes = await analyzer.analyze(str(repo), "main")
+
+    assert changes.stat() == git(repo, "diff", "--stat=80", "main...HEAD")
+
+
+async def test_line_counts_match_git(repo, analyzer):
+    changes = await analyzer.analyze(str(repo), "main")
+
+    numstat = git(repo, "diff", "--numstat", "main...HEAD").splitlines()
+    assert [(change.insertions, change.deletions) for change in changes.files] == [
+        (0, 0) if line.startswith("-") else tuple(map(int, line.split("\t")[:2]))
+        for line in numstat
+    ]
+
+
+async def test_analysis_does_not_generate_the_patch(repo, analyzer, monkeypatch):
+    commands = []
+    stream = GitObjectStore.stream
+
+    def recording_stream(self, *args):
+        commands.append(args)
+        return stream(self, *args)
+
+    monkeypatch.setattr(GitObjectStore, "stream", recording_stream)
+
+    await analyzer.analyze(str(repo), "main")
+
+    assert commands and not any("-p" in args for args in commands)
+
+
+async def test_single_page_is_git_diff(repo, analyzer):
+    changes = await analyzer.analyze(str(repo), "main")
+
+    page = await analyzer.diff_page(changes, max_bytes=10**9)
+
+    assert page.text == git(repo, "diff", "main...HEAD")
+    assert page.next_cursor is None
+
+
+async def test_pages_cover_every_hunk_once(repo, analyzer):
+    changes = await analyzer.analyze(str(repo), "main")
+    full_diff = git(repo, "diff", "main...HEAD")
+
+    pages, cursor = [], None
+    while True:
+        page = await analyzer.diff_page(changes, cursor=cursor, max_bytes=400)
+        pages.append(page)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert len(pages) > 1
+    assert all(page.bytes <= 400 for page in pages)
+    # Resumed pages repeat their file header, but every hunk shows up once
+    hunks = [line for page in pages for line in page.text.splitlines() if line.startswith("@@")]
+    assert hunks == [line for line in full_diff.splitlines() if line.startswith("@@")]
+
+
+async def test_page_line_budget(repo, analyzer):
+    changes = await analyzer.analyze(str(repo), "main")
+
+    page = await analyzer.diff_page(changes, max_lines=20)
+
+    assert page.lines <= 20
+    assert page.text.count("\n") == page.lines
+    assert page.next_cursor is not None
+
+
+async def test_globs_limit_the_diff(repo, analyzer):
+    changes = await analyzer.analyze(str(repo), "main")
+
+    page = await analyzer.diff_page(changes, globs=["src/*"], max_bytes=10**9)
+
+    # Renames out of src/ match by their source path
+    assert page.text == git(repo, "diff", "main...HEAD", "--", "src/", "docs/pure_rename.txt")
+
+
+async def test_stale_cursor_is_rejected(repo, analyzer):
+    changes = await analyzer.analyze(str(repo), "main")
+    page = await analyzer.diff_page(changes, max_bytes=400)
+
+    write(repo, "later.txt", "moved on\n")
+    git(repo, "add", "later.txt")
+    git(repo, "commit", "-q", "-m", "Move HEAD")
+    moved = await analyzer.analyze(str(repo), "main")
+
+    with pytest.raises(ValueError, match="stale"):
+        await analyzer.diff_page(moved, cursor=page.next_cursor)
+
+
+async def test_commits_match_git_log(repo, analyzer):
+    changes = await analyzer.analyze(str(repo), "main")
+
+    assert changes.log_oneline() == git(repo, "log", "--oneline", "--no-decorate", "main..HEAD")
+
+
+async def test_concurrent_calls_share_one_analysis(repo, analyzer):
+    first, second = await asyncio.gather(
+        analyzer.analyze(str(repo), "main"), analyzer.analyze(str(repo), "main")
+    )
+
+    assert first is second
+
+
+async def test_no_changes(repo, analyzer):
+    changes = await analyzer.analyze(str(repo), "HEAD")
+
+    assert changes.files == []
+    assert changes.stat() == ""
+    assert (await analyzer.diff_page(changes)).text == ""
+
+
+async def test_concurrent_reads_use_the_process_pool(repo):
+    store = GitObjectStore(str(repo), batch_processes=2)
+    shas = git(repo, "rev-list", "HEAD").split()
+    try:
+        results = await asyncio.gather(*(store.read_many(shas) for _ in range(4)))
+        # Reads overlapped, so both pooled processes were started and kept
+        pooled = len(store._idle)
+    finally:
+        await store.close()
+
+    assert all(result == results[0] for result in results)
+    assert [kind for kind, _ in results[0]] == ["commit"] * len(shas)
+    assert pooled == 2
+
+
+async def test_failed_read_does_not_poison_the_pool(repo):
+    store = GitObjectStore(str(repo))
+    head = git(repo, "rev-parse", "HEAD").strip()
+    try:
+        with pytest.raises(KeyError):
+            await store.read_many([head, "0" * 40])
+        (commit,) = await store.commits([head])
+    finally:
+        await store.close()
+
+    assert commit.subject == "fix: second hunk"
+
+
+async def test_stream_drains_a_large_stderr(repo):
+    store = GitObjectStore(str(repo))
+    # 8 MB of errors, more than asyncio buffers for a pipe nobody reads
+    noisy = "alias.noisy=!yes failed | head -c 8000000 >&2; exit 1"
+
+    with pytest.raises(subprocess.CalledProcessError) as error:
+        async with store.stream("-c", noisy, "noisy") as stdout:
+            await asyncio.wait_for(stdout.read(), timeout=10)
+
+    assert len(error.value.stderr) == 8_000_000
+
+
+async def test_commit_cache_keeps_the_most_recent(repo):
+    store = GitObjectStore(str(repo), max_commits=2)
+    shas = git(repo, "rev-list", "HEAD").split()
+    try:
+        commits = await store.commits(shas)
+        # A hit counts as a use
+        await store.commits(shas[1:2])
+    finally:
+        await store.close()
+
+    assert len(shas) == 3
+    assert [commit.sha for commit in commits] == shas
+    assert list(store._commits) == [shas[2], shas[1]]
+
+
+async def test_least_recently_used_repository_is_closed(repo, tmp_path_factory):
+    other = tmp_path_factory.mktemp("other")
+    git(other, "init", "-q", "-b", "main")
+    git(other, "commit", "-q", "--allow-empty", "-m", "Empty")
+    analyzer = ChangeAnalyzer(max_repositories=1)
+    try:
+        await analyzer.analyze(str(repo), "main")
+        first = analyzer.store(str(repo))
+        assert first._idle
+
+        await analyzer.analyze(str(other), "main")
+        await asyncio.gather(*analyzer._closing)
+
+        assert list(analyzer._stores) == [str(other.resolve())]
+        assert first._idle == []
+    finally:
+        await analyzer.close()
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+import server
+from conftest import git
+
+
+@pytest.fixture(autouse=True)
+def templates(tmp_path_factory, monkeypatch):
+    templates_dir = tmp_path_factory.mktemp("templates")
+    for filename, template_type in server.DEFAULT_TEMPLATES.items():
+        (templates_dir / filename).write_text(f"## {template_type}\n")
+    monkeypatch.setattr(server, "TEMPLATES_DIR", templates_dir)
+    monkeypatch.setattr(server, "_templates", None)
+
+
+async def analyze(repo, **kwargs) -> dict:
+    return json.loads(
+        await server.analyze_file_changes(working_directory=str(repo), **kwargs)
+    )
+
+
+async def test_analyze_file_changes_matches_git(repo):
+    analysis = await analyze(repo, max_diff_bytes=10**9, max_diff_lines=10**9)
+
+    assert analysis["files_changed"] == git(repo, "diff", "--name-status", "main...HEAD")
+    assert analysis["statistics"] == git(repo, "diff", "--stat=80", "main...HEAD")
+    assert analysis["diff"] == git(repo, "diff", "main...HEAD")
+    assert analysis["truncated"] is False
+
+
+async def test_paths_filter_every_section(repo):
+    analysis = await analyze(repo, paths=["src/*"], max_diff_bytes=10**9, max_diff_lines=10**9)
+
+    pathspec = ["--", "src/", "docs/pure_rename.txt"]
+    assert analysis["files_changed"] == git(repo, "diff", "--name-status", "main...HEAD", *pathspec)
+    assert analysis["statistics"] == git(repo, "diff", "--stat=80", "main...HEAD", *pathspec)
+    assert analysis["diff"] == git(repo, "diff", "main...HEAD", *pathspec)
+    numstat = git(repo, "diff", "--numstat", "main...HEAD", *pathspec).splitlines()
+    assert analysis["total_changed_lines"] == sum(
+        int(added) + int(removed)
+        for added, removed, _ in (line.split("\t", 2) for line in numstat)
+        if added != "-"
+    )
+
+
+async def test_cursor_pages_through_the_diff(repo):
+    first = await analyze(repo, max_diff_bytes=2000)
+    second = await analyze(repo, max_diff_bytes=2000, cursor=first["next_cursor"])
+
+    assert first["truncated"] is True
+    assert second["diff"]
+    assert second["diff"] not in first["diff"]
+
+
+async def test_suggest_template_ranks_from_the_changes(repo):
+    suggestion = json.loads(
+        await server.suggest_template("Fix the crash", working_directory=str(repo))
+    )
+
+    assert suggestion["recommended_template"]["filename"] == "bug.md"
+
+
+async def test_explicit_change_type_skips_the_git_analysis(repo, monkeypatch):
+    async def fail(*args, **kwargs):
+        raise AssertionError("the repository should not be analyzed")
+
+    monkeypatch.setattr(server.git_changes, "resolve", fail)
+    monkeypatch.setattr(server.git_changes, "analyze_resolved", fail)
+
+    suggestion = json.loads(
+        await server.suggest_template(
+            "Speed up the parser", change_type="docs", working_directory=str(repo)
+        )
+    )
+
+    assert suggestion["recommended_template"]["filename"] == "docs.md"
+    assert suggestion["ranking"]
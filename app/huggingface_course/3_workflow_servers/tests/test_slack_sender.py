@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from slack_sender import SlackError, SlackSender
+
+
+@pytest.fixture
+async def slack():
+    """A fake Slack webhook answering with the queued statuses, then 200."""
+    statuses: list[tuple[int, dict]] = []
+    received: list[str] = []
+
+    async def webhook(request):
+        received.append((await request.json())["text"])
+        status, headers = statuses.pop(0) if statuses else (200, {})
+        return web.Response(status=status, headers=headers, text="ok")
+
+    app = web.Application()
+    app.router.add_post("/hook", webhook)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}/hook", statuses, received
+    await runner.cleanup()
+
+
+async def test_send_posts_once(slack):
+    url, _, received = slack
+    sender = SlackSender(url)
+
+    assert await sender.send("hello") == 1
+    await sender.close()
+
+    assert received == ["hello"]
+
+
+async def test_throttled_posts_are_retried_after_retry_after(slack):
+    url, statuses, received = slack
+    statuses += [(429, {"Retry-After": "0.05"}), (503, {})]
+    sender = SlackSender(url, backoff_base=0.01)
+
+    start = asyncio.get_running_loop().time()
+    await sender.send("hello")
+    elapsed = asyncio.get_running_loop().time() - start
+    await sender.close()
+
+    assert received == ["hello"] * 3
+    assert sender.retried == 2
+    assert elapsed >= 0.05
+
+
+async def test_retry_after_is_capped(slack):
+    url, statuses, received = slack
+    statuses.append((429, {"Retry-After": "3600"}))
+    sender = SlackSender(url, backoff_base=0.01, backoff_cap=0.05)
+
+    await asyncio.wait_for(sender.send("hello"), timeout=5)
+    await sender.close()
+
+    assert received == ["hello"] * 2
+
+
+async def test_client_errors_are_not_retried(slack):
+    url, statuses, received = slack
+    statuses.append((400, {}))
+    sender = SlackSender(url, backoff_base=0.01)
+
+    with pytest.raises(SlackError) as exc_info:
+        await sender.send("hello")
+    await sender.close()
+
+    assert exc_info.value.status == 400
+    assert len(received) == 1
+
+
+async def test_retries_give_up(slack):
+    url, statuses, _ = slack
+    statuses += [(500, {})] * 3
+    sender = SlackSender(url, max_retries=2, backoff_base=0.01)
+
+    with pytest.raises(SlackError):
+        await sender.send("hello")
+    await sender.close()
+
+
+async def test_failure_alerts_are_coalesced_into_a_digest(slack):
+    url, _, received = slack
+    sender = SlackSender(url, digest_window=0.05)
+
+    results = await asyncio.gather(
+        *(sender.send(f"CI Failure Alert {n}") for n in range(3)),
+        sender.send("deployed"),
+    )
+    await sender.close()
+
+    assert results == [3, 3, 3, 1]
+    assert len(received) == 2
+    assert "deployed" in received
+    digest = next(text for text in received if "3 CI failure alerts" in text)
+    assert all(f"CI Failure Alert {n}" in digest for n in range(3))
+    assert sender.coalesced == 2
+
+
+async def test_other_coalesced_messages_get_a_neutral_header(slack):
+    url, _, received = slack
+    sender = SlackSender(url, digest_window=0.05)
+
+    await asyncio.gather(
+        sender.send("deployed api", coalesce=True),
+        sender.send("deployed web", coalesce=True),
+    )
+    await sender.close()
+
+    (digest,) = received
+    assert digest.startswith("*2 notifications*")
+    assert "CI failure" not in digest
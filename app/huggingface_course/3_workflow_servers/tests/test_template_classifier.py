@@ -0,0 +1,48 @@
+from git_objects import ChangeSet, Commit, FileChange
+from template_classifier import FALLBACK_TEMPLATE, TemplateClassifier
+
+
+def change_set(paths: list[str], subjects: list[str] = (), status: str = "M") -> ChangeSet:
+    return ChangeSet(
+        "repo",
+        "base",
+        "head",
+        "base",
+        files=[FileChange(status, path, "100644", "100644", "a", "b", 5, 5) for path in paths],
+        commits=[Commit(f"{n:040x}", [], 0, subject) for n, subject in enumerate(subjects)],
+    )
+
+
+def test_conventional_commit_prefix_wins():
+    ranking = TemplateClassifier().rank(change_set(["src/app.py"], ["fix(api): handle empty body"]))
+
+    assert ranking[0].filename == "bug.md"
+    assert "commit prefix 'fix:'" in ranking[0].signals
+
+
+def test_changed_paths_score_their_template():
+    ranking = TemplateClassifier().rank(change_set(["README.md", "docs/guide.rst"]))
+
+    assert ranking[0].filename == "docs.md"
+
+
+def test_summary_alone_is_enough():
+    ranking = TemplateClassifier().rank(None, "Optimize the cache to cut latency")
+
+    assert ranking[0].filename == "performance.md"
+
+
+def test_no_signals_falls_back():
+    ranking = TemplateClassifier().rank(None, "")
+
+    assert ranking[0].filename == FALLBACK_TEMPLATE
+    assert ranking[0].signals == ["no signals; defaulting"]
+
+
+def test_ranking_is_deterministic():
+    changes = change_set(["src/a.py", "tests/test_a.py"], ["Add tests for a"])
+
+    first = TemplateClassifier().rank(changes, "tests")
+    second = TemplateClassifier().rank(changes, "tests")
+
+    assert [(s.filename, s.score) for s in first] == [(s.filename, s.score) for s in second]
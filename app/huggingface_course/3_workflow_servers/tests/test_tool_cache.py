@@ -0,0 +1,42 @@
+from tool_cache import ToolCache
+
+
+def test_key_depends_on_every_part():
+    assert ToolCache.key("tool", "a", 1) == ToolCache.key("tool", "a", 1)
+    assert ToolCache.key("tool", "a", 1) != ToolCache.key("tool", "a", 2)
+    assert ToolCache.key("tool", "a").startswith("tool:")
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ToolCache(max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    assert cache.stats()["hits"] == 3
+    assert cache.stats()["misses"] == 1
+
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    path = str(tmp_path / "cache" / "results.sqlite3")
+    ToolCache(path=path).set("key", '{"ok": true}')
+
+    restarted = ToolCache(path=path)
+
+    assert restarted.get("key") == '{"ok": true}'
+    assert restarted.stats()["entries"] == 1
+
+
+def test_disk_tier_is_bounded(tmp_path):
+    cache = ToolCache(max_entries=1, path=str(tmp_path / "results.sqlite3"))
+    for n in range(40):
+        cache.set(f"key{n}", str(n))
+
+    (count,) = cache._db.execute("SELECT COUNT(*) FROM results").fetchone()
+
+    assert count == 16
@@ -0,0 +1,60 @@
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+import webhook_server
+from event_log import Backpressure
+
+
+class FakeLog:
+    def __init__(self, error: Exception | None = None):
+        self.error = error
+        self.events = []
+
+    async def append(self, event):
+        if self.error:
+            raise self.error
+        self.events.append(event)
+        return True
+
+
+@pytest.fixture
+async def client():
+    app = web.Application()
+    app.router.add_post("/webhook/github", webhook_server.handle_webhook)
+    async with TestClient(TestServer(app)) as client:
+        yield client
+
+
+async def post(client, log, monkeypatch, **kwargs):
+    monkeypatch.setattr(webhook_server, "events_log", log)
+    return await client.post("/webhook/github", headers={"X-GitHub-Event": "workflow_job"}, **kwargs)
+
+
+async def test_durable_event_is_received(client, monkeypatch):
+    log = FakeLog()
+
+    response = await post(client, log, monkeypatch, json={"action": "completed"})
+
+    assert response.status == 200
+    assert [(e["event_type"], e["action"]) for e in log.events] == [("workflow_job", "completed")]
+
+
+async def test_malformed_payload_is_a_client_error(client, monkeypatch):
+    response = await post(client, FakeLog(), monkeypatch, data=b"not json")
+
+    assert response.status == 400
+
+
+async def test_storage_failure_is_a_server_error(client, monkeypatch):
+    response = await post(client, FakeLog(OSError("disk full")), monkeypatch, json={})
+
+    assert response.status == 500
+    assert "disk full" in (await response.json())["error"]
+
+
+async def test_backpressure_asks_the_sender_to_retry(client, monkeypatch):
+    response = await post(client, FakeLog(Backpressure("busy")), monkeypatch, json={})
+
+    assert response.status == 503
+    assert response.headers["Retry-After"] == "1"
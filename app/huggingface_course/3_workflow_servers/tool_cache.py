@@ -0,0 +1,99 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+
+class ToolCache:
+    """LRU of tool results keyed by whatever their output depends on.
+
+    Callers build keys from resolved inputs (commit SHAs, file mtimes,
+    arguments), never from mutable names like branch names, so entries never
+    need invalidating: when an input moves, the key changes. Values are the
+    JSON strings the tools return. With ``path`` set, entries are also written
+    to a SQLite file so they survive restarts; the in-memory tier is checked
+    first and refilled from disk on a hit.
+    """
+
+    def __init__(self, max_entries: int = 256, path: str | None = None):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._db = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, used_at REAL NOT NULL"
+                ") WITHOUT ROWID"
+            )
+
+    @staticmethod
+    def key(namespace: str, *parts) -> str:
+        encoded = json.dumps([namespace, *parts], sort_keys=True, default=str)
+        return f"{namespace}:{hashlib.sha256(encoded.encode()).hexdigest()}"
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            value = self._load(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, value)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._remember(key, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, value, used_at) VALUES (?, ?, ?)",
+                    (key, value, time.time()),
+                )
+                self._trim_disk()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk": self._db is not None,
+        }
+
+    def _remember(self, key: str, value: str) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load(self, key: str) -> str | None:
+        if self._db is None:
+            return None
+        row = self._db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self._db.execute("UPDATE results SET used_at = ? WHERE key = ?", (time.time(), key))
+        return row[0]
+
+    def _trim_disk(self) -> None:
+        # The disk tier may hold more than memory, but not without bound
+        self._db.execute(
+            "DELETE FROM results WHERE key NOT IN "
+            "(SELECT key FROM results ORDER BY used_at DESC LIMIT ?)",
+            (self.max_entries * 16,),
+        )
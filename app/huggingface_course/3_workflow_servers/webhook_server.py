@@ -1,16 +1,37 @@
 #!/usr/bin/env python3
 """
 Simple webhook server for GitHub Actions events.
-Stores events in a JSON file that the MCP server can read.
+Stores events in a SQLite event store that the MCP server can read.
 """
 
-import json
+import os
 from datetime import datetime
 from pathlib import Path
 from aiohttp import web
 
-# File to store events
+from event_channel import EventPublisher
+from event_log import Backpressure, EventLog
+from event_store import EventStore
+
+HOST = os.getenv("WEBHOOK_HOST", "localhost")
+PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+
+# Legacy JSON history, imported into the store on first start
 EVENTS_FILE = Path(__file__).parent / "github_events.json"
+events_store = EventStore()
+events_store.import_json(EVENTS_FILE)
+
+# Durable, group-committed ingestion in front of the store
+events_log = EventLog(
+    events_store,
+    commit_interval=float(os.getenv("EVENTS_COMMIT_INTERVAL_SECONDS", "0.002")),
+    max_pending=int(os.getenv("EVENTS_MAX_PENDING", "10000")),
+    ack_timeout=float(os.getenv("EVENTS_ACK_TIMEOUT_SECONDS", "0.5")),
+)
+
+# Pushes committed events to the MCP server so it doesn't have to poll
+events_publisher = EventPublisher()
+events_log.listeners.append(events_publisher.publish)
 
 async def handle_webhook(request):
     """Handle incoming GitHub webhook"""
@@ -26,31 +47,41 @@ async def handle_webhook(request):
             "repository": data.get("repository", {}).get("full_name"),
             "sender": data.get("sender", {}).get("login")
         }
-        
-        # Load existing events
-        events = []
-        if EVENTS_FILE.exists():
-            with open(EVENTS_FILE, 'r') as f:
-                events = json.load(f)
-        
-        # Add new event and keep last 100
-        events.append(event)
-        events = events[-100:]
-        
-        # Save events
-        with open(EVENTS_FILE, 'w') as f:
-            json.dump(events, f, indent=2)
-        
-        return web.json_response({"status": "received"})
     except Exception as e:
         return web.json_response({"error": str(e)}, status=400)
 
+    try:
+        # Ack once the event is fsynced to the log, or queued if that takes too long
+        if await events_log.append(event):
+            return web.json_response({"status": "received"})
+        return web.json_response({"status": "queued"}, status=202)
+    except Backpressure as e:
+        return web.json_response({"error": str(e)}, status=503, headers={"Retry-After": "1"})
+    except Exception as e:
+        # The log could not write the event; a server-side failure the sender can retry
+        return web.json_response({"error": f"Could not store event: {e}"}, status=500)
+
+async def handle_stats(request):
+    """Ingestion counters, used by the benchmark"""
+    return web.json_response(events_log.stats())
+
+async def start_log(app):
+    await events_log.start()
+    await events_publisher.start()
+
+async def stop_log(app):
+    await events_publisher.stop()
+    await events_log.stop()
+
 # Create app and add route
 app = web.Application()
 app.router.add_post('/webhook/github', handle_webhook)
+app.router.add_get('/webhook/stats', handle_stats)
+app.on_startup.append(start_log)
+app.on_cleanup.append(stop_log)
 
 if __name__ == '__main__':
-    print("🚀 Starting webhook server on http://localhost:8080")
-    print("📝 Events will be saved to:", EVENTS_FILE)
-    print("🔗 Webhook URL: http://localhost:8080/webhook/github")
-    web.run_app(app, host='localhost', port=8080)
+    print(f"🚀 Starting webhook server on http://{HOST}:{PORT}")
+    print("📝 Events will be saved to:", events_store.path)
+    print(f"🔗 Webhook URL: http://{HOST}:{PORT}/webhook/github")
+    web.run_app(app, host=HOST, port=PORT)
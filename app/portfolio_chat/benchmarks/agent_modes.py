@@ -0,0 +1,90 @@
+"""Compare LLM calls, tokens and latency per query for each agent mode.
+
+Run from app/portfolio_chat with the usual .env (or pointed at fake upstreams):
+
+    uv run python -m benchmarks.agent_modes --queries "Who is Yuri?" "What stack does he use?"
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from langchain_openai import OpenAIEmbeddings
+
+from clients import ClientRegistry
+from embedding_cache import CachedEmbeddings
+from main import init_agent
+from tracing import StageTracer
+
+DEFAULT_QUERIES = [
+    "Who is Yuri?",
+    "How many years of experience does he have with Python?",
+    "What stack does he use?",
+    "Which projects has he worked on?",
+    "Tell me a joke",
+]
+
+
+async def run_mode(mode: str, queries: list[str], repeat: int) -> list[dict]:
+    clients = ClientRegistry()
+    embedding_model = "text-embedding-3-small"
+    embeddings = CachedEmbeddings(
+        OpenAIEmbeddings(
+            model=embedding_model,
+            check_embedding_ctx_length=False,
+            http_client=clients.openai_sync,
+            http_async_client=clients.openai_async,
+        ),
+        model=embedding_model,
+        path=os.getenv("EMBEDDING_CACHE_PATH", "./.cache/embeddings.sqlite3"),
+    )
+    index = clients.pinecone_index("yuri-data")
+    await clients.warm_up(index)
+    agent = await asyncio.to_thread(init_agent, index, embeddings, clients, mode)
+
+    rows = []
+    try:
+        for query in queries:
+            for _ in range(repeat):
+                tracer = StageTracer()
+                start = time.perf_counter()
+                await agent.ainvoke({"input": query}, config={"callbacks": [tracer]})
+                rows.append(
+                    {
+                        "query": query,
+                        "latency": time.perf_counter() - start,
+                        "llm_calls": tracer.counts.get("llm", 0),
+                        "tokens": tracer.prompt_tokens + tracer.completion_tokens,
+                    }
+                )
+    finally:
+        await clients.aclose()
+    return rows
+
+
+def summarize(mode: str, rows: list[dict]) -> None:
+    latencies = sorted(row["latency"] for row in rows)
+    print(
+        f"{mode:>6} | queries={len(rows):>3}"
+        f" | llm calls/query={statistics.mean(r['llm_calls'] for r in rows):.2f}"
+        f" | tokens/query={statistics.mean(r['tokens'] for r in rows):.0f}"
+        f" | p50={latencies[len(latencies) // 2] * 1000:.0f}ms"
+        f" | max={latencies[-1] * 1000:.0f}ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", nargs="+", default=DEFAULT_QUERIES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--modes", nargs="+", default=["json", "native"])
+    args = parser.parse_args()
+
+    for mode in args.modes:
+        summarize(mode, await run_mode(mode, args.queries, args.repeat))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,306 @@
+"""Local stand-ins for OpenAI, Pinecone and Telegram with configurable latency.
+
+Each upstream listens on its own port and sleeps for a log-normally
+distributed time (median and sigma per upstream) before answering, so the
+app can be load tested offline:
+
+    uv run python -m benchmarks.fake_upstreams --openai-latency 400:0.4
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import time
+
+import numpy as np
+from aiohttp import web
+
+EMBEDDING_DIM = 1536
+CORPUS = [
+    "Yuri is a software engineer with around 6 years of experience with Python.",
+    "Yuri works mostly with Python, FastAPI, Go, TypeScript and AWS.",
+    "Yuri's projects include a RAG portfolio assistant and MCP servers.",
+    "Yuri writes blog posts about AI agents and developer tooling.",
+    "Yuri's work setup is documented at https://yuribarsotti.tech/setup.",
+]
+
+
+class Latency:
+    def __init__(self, spec: str):
+        median_ms, _, sigma = spec.partition(":")
+        self.median = float(median_ms) / 1000
+        self.sigma = float(sigma or 0)
+
+    async def wait(self) -> None:
+        if self.median > 0:
+            await asyncio.sleep(random.lognormvariate(0, self.sigma) * self.median)
+
+
+def fake_embedding(text: str) -> np.ndarray:
+    seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(EMBEDDING_DIM)
+    return (vector / np.linalg.norm(vector)).astype(np.float32)
+
+
+def openai_app(latency: Latency, stream_token_delay: float) -> web.Application:
+    async def models(request: web.Request) -> web.Response:
+        return web.json_response({"object": "list", "data": []})
+
+    async def embeddings(request: web.Request) -> web.Response:
+        body = await request.json()
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        await latency.wait()
+        data = []
+        for i, text in enumerate(inputs):
+            vector = fake_embedding(json.dumps(text))
+            if body.get("encoding_format") == "base64":
+                embedding = base64.b64encode(vector.tobytes()).decode()
+            else:
+                embedding = vector.tolist()
+            data.append({"object": "embedding", "index": i, "embedding": embedding})
+        return web.json_response(
+            {
+                "object": "list",
+                "data": data,
+                "model": body.get("model"),
+                "usage": {"prompt_tokens": len(inputs), "total_tokens": len(inputs)},
+            }
+        )
+
+    async def chat_completions(request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        content, tool_calls = _next_turn(body)
+        usage = {"prompt_tokens": 50 * len(body["messages"]), "completion_tokens": 40}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        finish_reason = "tool_calls" if tool_calls else "stop"
+        await latency.wait()
+
+        base = {
+            "id": "chatcmpl-fake",
+            "created": int(time.time()),
+            "model": body.get("model"),
+        }
+        if not body.get("stream"):
+            message = {
+                "role": "assistant",
+                "content": content,
+                "tool_calls": tool_calls,
+            }
+            return web.json_response(
+                {
+                    **base,
+                    "object": "chat.completion",
+                    "choices": [
+                        {"index": 0, "message": message, "finish_reason": finish_reason}
+                    ],
+                    "usage": usage,
+                }
+            )
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+
+        async def send(choices: list, **extra) -> None:
+            chunk = {
+                **base,
+                "object": "chat.completion.chunk",
+                "choices": choices,
+                **extra,
+            }
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+
+        if tool_calls:
+            call = tool_calls[0]
+            delta = {"role": "assistant", "tool_calls": [{"index": 0, **call}]}
+            await send([{"index": 0, "delta": delta, "finish_reason": None}])
+        else:
+            for i, token in enumerate(_tokens(content)):
+                delta = {"content": token, **({"role": "assistant"} if i == 0 else {})}
+                await send([{"index": 0, "delta": delta, "finish_reason": None}])
+                if stream_token_delay:
+                    await asyncio.sleep(stream_token_delay)
+        await send([{"index": 0, "delta": {}, "finish_reason": finish_reason}])
+        if (body.get("stream_options") or {}).get("include_usage"):
+            await send([], usage=usage)
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_get("/v1/models", models)
+    app.router.add_post("/v1/embeddings", embeddings)
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    return app
+
+
+def _next_turn(body: dict) -> tuple[str | None, list | None]:
+    """Search once, then answer: JSON blobs for the ReAct agent, tool calls otherwise."""
+    messages = body["messages"]
+    question = next(
+        (m["content"] for m in reversed(messages) if m["role"] == "user"), ""
+    )
+    if isinstance(question, list):
+        question = " ".join(part.get("text", "") for part in question)
+
+    if body.get("tools"):
+        if any(m["role"] == "tool" for m in messages):
+            return "Yuri has around 6 years of experience with Python 🐍", None
+        arguments = json.dumps({"input": question[:200]})
+        call = {
+            "id": "call_fake",
+            "type": "function",
+            "function": {"name": "contextual_search", "arguments": arguments},
+        }
+        return None, [call]
+
+    if "Observation" in question:
+        blob = {
+            "action": "Final Answer",
+            "action_input": "Yuri has around 6 years of experience with Python 🐍",
+        }
+    else:
+        blob = {"action": "contextual_search", "action_input": "Yuri experience"}
+    return f"Action:\n```\n{json.dumps(blob, ensure_ascii=False)}\n```", None
+
+
+def _tokens(text: str) -> list[str]:
+    return [text[i : i + 4] for i in range(0, len(text), 4)]
+
+
+def pinecone_app(latency: Latency) -> web.Application:
+    ids = [f"doc-{i}" for i in range(len(CORPUS))]
+    vectors = {
+        doc_id: {
+            "id": doc_id,
+            "values": fake_embedding(json.dumps(text)).tolist(),
+            "metadata": {"text": text},
+        }
+        for doc_id, text in zip(ids, CORPUS)
+    }
+    matrix = np.stack([fake_embedding(json.dumps(text)) for text in CORPUS])
+
+    async def describe_index_stats(request: web.Request) -> web.Response:
+        await latency.wait()
+        return web.json_response(
+            {
+                "namespaces": {"": {"vectorCount": len(ids)}},
+                "dimension": EMBEDDING_DIM,
+                "indexFullness": 0.0,
+                "totalVectorCount": len(ids),
+            }
+        )
+
+    async def list_vectors(request: web.Request) -> web.Response:
+        await latency.wait()
+        return web.json_response(
+            {
+                "vectors": [{"id": doc_id} for doc_id in ids],
+                "namespace": "",
+                "usage": {"readUnits": 1},
+            }
+        )
+
+    async def fetch(request: web.Request) -> web.Response:
+        await latency.wait()
+        wanted = request.query.getall("ids", [])
+        return web.json_response(
+            {
+                "vectors": {i: vectors[i] for i in wanted if i in vectors},
+                "namespace": "",
+                "usage": {"readUnits": 1},
+            }
+        )
+
+    async def query(request: web.Request) -> web.Response:
+        body = await request.json()
+        await latency.wait()
+        scores = matrix @ np.asarray(body["vector"], dtype=np.float32)
+        top = np.argsort(-scores)[: body.get("topK", 3)]
+        matches = [
+            {
+                "id": ids[i],
+                "score": float(scores[i]),
+                "values": [],
+                "metadata": vectors[ids[i]]["metadata"],
+            }
+            for i in top
+        ]
+        return web.json_response({"matches": matches, "namespace": ""})
+
+    app = web.Application()
+    app.router.add_post("/describe_index_stats", describe_index_stats)
+    app.router.add_get("/vectors/list", list_vectors)
+    app.router.add_get("/vectors/fetch", fetch)
+    app.router.add_post("/query", query)
+    return app
+
+
+def telegram_app(latency: Latency) -> web.Application:
+    sent = 0
+
+    async def get_me(request: web.Request) -> web.Response:
+        await latency.wait()
+        user = {"id": 1, "is_bot": True, "first_name": "Fake", "username": "fake_bot"}
+        return web.json_response({"ok": True, "result": user})
+
+    async def send_message(request: web.Request) -> web.Response:
+        nonlocal sent
+        if request.content_type == "application/json":
+            body = await request.json()
+        else:
+            body = await request.post()
+        await latency.wait()
+        sent += 1
+        message = {
+            "message_id": sent,
+            "date": int(time.time()),
+            "chat": {"id": int(body.get("chat_id") or 1), "type": "private"},
+            "text": body.get("text", ""),
+        }
+        return web.json_response({"ok": True, "result": message})
+
+    app = web.Application()
+    app.router.add_post("/bot{token}/getMe", get_me)
+    app.router.add_post("/bot{token}/sendMessage", send_message)
+    return app
+
+
+async def serve(args: argparse.Namespace) -> None:
+    apps = {
+        args.openai_port: openai_app(
+            Latency(args.openai_latency), args.stream_token_delay
+        ),
+        args.pinecone_port: pinecone_app(Latency(args.pinecone_latency)),
+        args.telegram_port: telegram_app(Latency(args.telegram_latency)),
+    }
+    for port, app in apps.items():
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, args.host, port).start()
+    print(f"fake upstreams listening on {args.host} ports {list(apps)}", flush=True)
+    await asyncio.Event().wait()
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--openai-port", type=int, default=18001)
+    parser.add_argument("--pinecone-port", type=int, default=18002)
+    parser.add_argument("--telegram-port", type=int, default=18003)
+    parser.add_argument("--openai-latency", default="300:0.3", help="median_ms:sigma")
+    parser.add_argument("--pinecone-latency", default="80:0.3", help="median_ms:sigma")
+    parser.add_argument("--telegram-latency", default="150:0.3", help="median_ms:sigma")
+    parser.add_argument(
+        "--stream-token-delay",
+        type=float,
+        default=0.005,
+        help="seconds between streamed tokens",
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(serve(parse_args()))
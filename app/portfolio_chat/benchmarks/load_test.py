@@ -0,0 +1,225 @@
+"""Offline load test for /chat against fake upstreams.
+
+Starts benchmarks.fake_upstreams and the app (uvicorn) as subprocesses,
+waits for /ready, then drives /chat at each concurrency level and reports
+RPS, latency percentiles and the app's event-loop lag (scraped from /metrics):
+
+    uv run python -m benchmarks.load_test --concurrency 1 8 32 --duration 20
+    uv run python -m benchmarks.load_test --max-p95-ms 1500  # non-zero exit on regression
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+APP_DIR = Path(__file__).resolve().parent.parent
+API_KEY = "bench"
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def histogram(metrics: str, name: str) -> tuple[dict[float, float], float, float]:
+    buckets, total, count = {}, 0.0, 0.0
+    for line in metrics.splitlines():
+        if line.startswith(f"{name}_bucket"):
+            le = line.split('le="', 1)[1].split('"', 1)[0]
+            buckets[float(le)] = float(line.rsplit(" ", 1)[1])
+        elif line.startswith(f"{name}_sum"):
+            total = float(line.rsplit(" ", 1)[1])
+        elif line.startswith(f"{name}_count"):
+            count = float(line.rsplit(" ", 1)[1])
+    return buckets, total, count
+
+
+def loop_lag(before: str, after: str) -> dict:
+    name = "portfolio_chat_event_loop_lag_seconds"
+    b_buckets, b_sum, b_count = histogram(before, name)
+    a_buckets, a_sum, a_count = histogram(after, name)
+    samples = a_count - b_count
+    if samples <= 0:
+        return {"mean_ms": float("nan"), "p99_ms": float("nan")}
+    p99 = float("inf")
+    for le in sorted(a_buckets):
+        if a_buckets[le] - b_buckets.get(le, 0) >= 0.99 * samples:
+            p99 = le
+            break
+    return {"mean_ms": (a_sum - b_sum) / samples * 1000, "p99_ms": p99 * 1000}
+
+
+async def run_level(
+    client: httpx.AsyncClient, concurrency: int, duration: float, stream: bool
+) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    counter = itertools.count()
+    deadline = time.perf_counter() + duration
+    path = "/chat/stream" if stream else "/chat"
+
+    async def worker() -> None:
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            # Unique queries keep the semantic cache from short-circuiting the agent.
+            query = f"What does Yuri do? #{next(counter)}"
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, json={"query": query})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+            except httpx.HTTPError:
+                errors += 1
+
+    before = (await client.get("/metrics/")).text
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    after = (await client.get("/metrics/")).text
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "loop_lag": loop_lag(before, after),
+    }
+
+
+def app_env(args: argparse.Namespace, workdir: str) -> dict:
+    return {
+        **os.environ,
+        "API_KEY": API_KEY,
+        "OPENAI_API_KEY": "fake",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{args.openai_port}/v1",
+        "PINECONE_KEY": "fake",
+        "PINECONE_HOST": f"http://127.0.0.1:{args.pinecone_port}",
+        "TELEGRAM_API_KEY": "123456:fake",
+        "TELEGRAM_CHAT_ID": "1",
+        "TELEGRAM_BASE_URL": f"http://127.0.0.1:{args.telegram_port}/bot",
+        "TELEGRAM_OUTBOX_SPILL_PATH": f"{workdir}/outbox.ndjson",
+        "EMBEDDING_CACHE_PATH": f"{workdir}/embeddings.sqlite3",
+        "RATE_LIMIT": "100000/second",
+        "RATE_LIMIT_STORAGE_URI": f"sqlite://{workdir}/ratelimit.sqlite3",
+        "MAX_CONCURRENT_AGENT_RUNS": str(args.max_concurrent_runs),
+        "AGENT_QUEUE_TIMEOUT_SECONDS": "60",
+        "AGENT_MODE": args.agent_mode,
+        "LANGSMITH_TRACING": "false",
+    }
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 60) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if (await client.get("/ready")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError("app did not become ready")
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--stream", action="store_true", help="drive /chat/stream")
+    parser.add_argument("--agent-mode", default="json", choices=["json", "native"])
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--max-concurrent-runs", type=int, default=256)
+    parser.add_argument("--port", type=int, default=18000)
+    parser.add_argument("--openai-port", type=int, default=18001)
+    parser.add_argument("--pinecone-port", type=int, default=18002)
+    parser.add_argument("--telegram-port", type=int, default=18003)
+    parser.add_argument("--openai-latency", default="300:0.3")
+    parser.add_argument("--pinecone-latency", default="80:0.3")
+    parser.add_argument("--telegram-latency", default="150:0.3")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--max-p95-ms", type=float, help="fail if any level exceeds this")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="portfolio-chat-bench-")
+    fakes = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.fake_upstreams",
+            f"--openai-port={args.openai_port}",
+            f"--pinecone-port={args.pinecone_port}",
+            f"--telegram-port={args.telegram_port}",
+            f"--openai-latency={args.openai_latency}",
+            f"--pinecone-latency={args.pinecone_latency}",
+            f"--telegram-latency={args.telegram_latency}",
+        ],
+        cwd=APP_DIR,
+    )
+    app = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--port",
+            str(args.port),
+            "--workers",
+            str(args.workers),
+            "--log-level",
+            "warning",
+        ],
+        cwd=APP_DIR,
+        env=app_env(args, workdir),
+    )
+
+    results = []
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{args.port}",
+            headers={"x-key": API_KEY},
+            timeout=120,
+            limits=httpx.Limits(max_connections=max(args.concurrency) + 8),
+        ) as client:
+            await wait_ready(client)
+            for concurrency in args.concurrency:
+                result = await run_level(client, concurrency, args.duration, args.stream)
+                results.append(result)
+                print(
+                    f"c={result['concurrency']:>4} rps={result['rps']:>7.1f}"
+                    f" p50={result['p50_ms']:>7.0f}ms p95={result['p95_ms']:>7.0f}ms"
+                    f" p99={result['p99_ms']:>7.0f}ms errors={result['errors']}"
+                    f" loop_lag mean={result['loop_lag']['mean_ms']:.1f}ms"
+                    f" p99<={result['loop_lag']['p99_ms']:.0f}ms",
+                    flush=True,
+                )
+    finally:
+        app.terminate()
+        app.wait()
+        fakes.terminate()
+        fakes.wait()
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+    if args.max_p95_ms is not None and any(
+        r["p95_ms"] > args.max_p95_ms or r["errors"] for r in results
+    ):
+        print(f"regression: p95 above {args.max_p95_ms}ms or errors present")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
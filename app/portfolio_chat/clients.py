@@ -0,0 +1,104 @@
+import asyncio
+import os
+import time
+
+import httpx
+from pinecone import Pinecone
+from telegram import Bot
+from telegram.request import HTTPXRequest
+
+
+class ClientRegistry:
+    """Long-lived, keep-alive clients for every upstream the app talks to.
+
+    Built once in the lifespan handler and shared by the LLM, embeddings,
+    retriever and Telegram outbox so connections (and TLS sessions) are reused.
+    ``warm_up`` opens a connection to each upstream with a cheap request and
+    records the outcome, which ``health`` reports for the readiness probe.
+    Upstreams in ``NON_CRITICAL`` are reported but do not gate readiness:
+    Telegram only receives logs, and the outbox spills them while it is down.
+    """
+
+    NON_CRITICAL = frozenset({"telegram"})
+
+    def __init__(self, pool_size: int = 20, timeout: float = 30.0):
+        limits = httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+            keepalive_expiry=120,
+        )
+        self.openai_base_url = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+        self.openai_async = httpx.AsyncClient(limits=limits, timeout=timeout)
+        self.openai_sync = httpx.Client(limits=limits, timeout=timeout)
+
+        self.pinecone = Pinecone(api_key=os.getenv("PINECONE_KEY"))
+
+        self.telegram = Bot(
+            token=os.getenv("TELEGRAM_API_KEY"),
+            base_url=os.getenv("TELEGRAM_BASE_URL", "https://api.telegram.org/bot"),
+            request=HTTPXRequest(connection_pool_size=pool_size),
+        )
+
+        self._health: dict[str, dict] = {}
+
+    def pinecone_index(self, name: str):
+        host = os.getenv("PINECONE_HOST")
+        return self.pinecone.Index(name, host=host) if host else self.pinecone.Index(name)
+
+    async def warm_up(self, index) -> None:
+        openai_headers = {"Authorization": f"Bearer {os.getenv('OPENAI_API_KEY')}"}
+        await asyncio.gather(
+            self._probe(
+                "openai",
+                self.openai_async.get(
+                    f"{self.openai_base_url}/models", headers=openai_headers
+                ),
+            ),
+            self._probe(
+                "openai_sync",
+                asyncio.to_thread(
+                    self.openai_sync.get,
+                    f"{self.openai_base_url}/models",
+                    headers=openai_headers,
+                ),
+            ),
+            self._probe("pinecone", asyncio.to_thread(index.describe_index_stats)),
+            self._probe("telegram", self.telegram.initialize()),
+        )
+
+    def health(self) -> dict[str, dict]:
+        health = dict(self._health)
+        for name, client in (
+            ("openai", self.openai_async),
+            ("openai_sync", self.openai_sync),
+        ):
+            if client.is_closed:
+                health[name] = {"ready": False, "error": "client closed"}
+        return health
+
+    def ready(self) -> bool:
+        health = self.health()
+        return bool(health) and all(
+            upstream["ready"]
+            for name, upstream in health.items()
+            if name not in self.NON_CRITICAL
+        )
+
+    async def aclose(self) -> None:
+        await asyncio.gather(
+            self.openai_async.aclose(),
+            asyncio.to_thread(self.openai_sync.close),
+            self.telegram.shutdown(),
+            return_exceptions=True,
+        )
+
+    async def _probe(self, name: str, request) -> None:
+        start = time.perf_counter()
+        try:
+            response = await request
+            if isinstance(response, httpx.Response):
+                response.raise_for_status()
+            self._health[name] = {"ready": True, "error": None}
+        except Exception as e:
+            self._health[name] = {"ready": False, "error": str(e)}
+        self._health[name]["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
@@ -0,0 +1,157 @@
+import asyncio
+import sqlite3
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from semantic_cache import normalize_query
+
+
+class CachedEmbeddings(Embeddings):
+    """Memoizes embeddings on disk and coalesces concurrent misses into batches.
+
+    Vectors are stored as float32 blobs in SQLite keyed by (model, normalized
+    text), so they survive restarts; the text sent upstream is the caller's,
+    not the normalized key. Cache misses arriving within ``batch_window``
+    seconds of each other, from threads or coroutines, are sent upstream as a
+    single ``embed_documents`` call.
+    """
+
+    def __init__(
+        self,
+        underlying: Embeddings,
+        model: str,
+        path: str,
+        batch_window: float = 0.01,
+        max_batch_size: int = 64,
+    ):
+        self.underlying = underlying
+        self.model = model
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, text TEXT NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, text)) WITHOUT ROWID"
+        )
+        self._db_lock = threading.Lock()
+
+        self._batch_lock = threading.Lock()
+        self._pending: dict[str, Future] = {}
+        self._batch: list[tuple[str, str]] = []
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys = [normalize_query(text) for text in texts]
+        futures = self._submit(keys, texts, self._load(keys))
+        return [future.result() for future in futures]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys = [normalize_query(text) for text in texts]
+        # SQLite reads block; keep them off the event loop
+        cached = await asyncio.to_thread(self._load, keys)
+        futures = self._submit(keys, texts, cached)
+        return list(await asyncio.gather(*map(asyncio.wrap_future, futures)))
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return (await self.aembed_documents([text]))[0]
+
+    def _submit(
+        self, keys: list[str], texts: list[str], cached: list[list[float] | None]
+    ) -> list[Future]:
+        futures = []
+        for key, text, vector in zip(keys, texts, cached):
+            if vector is not None:
+                future: Future = Future()
+                future.set_result(vector)
+            else:
+                future = self._enqueue(key, text)
+            futures.append(future)
+        return futures
+
+    def _enqueue(self, key: str, text: str) -> Future:
+        with self._batch_lock:
+            if key in self._pending:
+                return self._pending[key]
+            future: Future = Future()
+            self._pending[key] = future
+            self._batch.append((key, text))
+            if len(self._batch) >= self.max_batch_size:
+                batch, self._batch = self._batch, []
+                threading.Thread(target=self._flush, args=(batch,), daemon=True).start()
+            elif len(self._batch) == 1:
+                timer = threading.Timer(self.batch_window, self._flush_window)
+                timer.daemon = True
+                timer.start()
+        return future
+
+    def _flush_window(self) -> None:
+        with self._batch_lock:
+            batch, self._batch = self._batch, []
+        if batch:
+            self._flush(batch)
+
+    def _flush(self, batch: list[tuple[str, str]]) -> None:
+        keys = [key for key, _ in batch]
+        try:
+            vectors = self.underlying.embed_documents([text for _, text in batch])
+        except Exception as e:
+            with self._batch_lock:
+                futures = [self._pending.pop(key) for key in keys]
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        try:
+            self._save(keys, vectors)
+        except Exception as e:
+            # The vectors are already paid for; only the disk copy is lost
+            print(f"[Embedding Cache Error] could not save {len(keys)} vectors: {e}")
+
+        with self._batch_lock:
+            futures = [self._pending.pop(key) for key in keys]
+        for future, vector in zip(futures, vectors):
+            future.set_result(vector)
+
+    def _load(self, keys: list[str]) -> list[list[float] | None]:
+        with self._db_lock:
+            rows = [
+                self._db.execute(
+                    "SELECT vector FROM embeddings WHERE model = ? AND text = ?",
+                    (self.model, key),
+                ).fetchone()
+                for key in keys
+            ]
+        return [
+            None if row is None else np.frombuffer(row[0], dtype=np.float32).tolist()
+            for row in rows
+        ]
+
+    def _save(self, keys: list[str], vectors: list[list[float]]) -> None:
+        rows = [
+            (self.model, key, np.asarray(vector, dtype=np.float32).tobytes())
+            for key, vector in zip(keys, vectors)
+        ]
+        with self._db_lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, text, vector) VALUES (?, ?, ?)",
+                    rows,
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                # A failed COMMIT can leave the transaction open too
+                if self._db.in_transaction:
+                    self._db.execute("ROLLBACK")
+                raise
@@ -0,0 +1,141 @@
+import asyncio
+from dataclasses import dataclass, field
+
+import numpy as np
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+
+@dataclass
+class _Snapshot:
+    documents: list[Document] = field(default_factory=list)
+    vectors: np.ndarray | None = None
+    hnsw: object | None = None
+
+
+class LocalVectorIndex:
+    """In-process copy of a Pinecone index, searched with NumPy or HNSW.
+
+    ``refresh`` builds a new snapshot off to the side and swaps it in with a
+    single assignment, so searches never block on (or observe) a refresh.
+    Corpora above ``hnsw_min_size`` use an HNSW graph when ``hnswlib`` is
+    installed; smaller ones use an exact matrix product.
+    """
+
+    def __init__(
+        self,
+        index,
+        namespace: str = "",
+        text_key: str = "text",
+        hnsw_min_size: int = 20_000,
+    ):
+        self.index = index
+        self.namespace = namespace
+        self.text_key = text_key
+        self.hnsw_min_size = hnsw_min_size
+        self._snapshot = _Snapshot()
+
+    def __len__(self) -> int:
+        return len(self._snapshot.documents)
+
+    def refresh(self) -> None:
+        documents: list[Document] = []
+        vectors: list[list[float]] = []
+        for ids in self.index.list(namespace=self.namespace):
+            fetched = self.index.fetch(ids=ids, namespace=self.namespace)
+            for vector in fetched.vectors.values():
+                metadata = dict(vector.metadata or {})
+                if self.text_key not in metadata:
+                    continue
+                text = metadata.pop(self.text_key)
+                documents.append(
+                    Document(id=vector.id, page_content=text, metadata=metadata)
+                )
+                vectors.append(vector.values)
+
+        if not documents:
+            self._snapshot = _Snapshot()
+            return
+
+        matrix = _unit_rows(np.asarray(vectors, dtype=np.float32))
+        hnsw = None
+        if hnswlib is not None and len(documents) >= self.hnsw_min_size:
+            hnsw = hnswlib.Index(space="cosine", dim=matrix.shape[1])
+            hnsw.init_index(max_elements=len(documents), ef_construction=200, M=16)
+            hnsw.add_items(matrix, np.arange(len(documents)))
+            hnsw.set_ef(64)
+        self._snapshot = _Snapshot(documents=documents, vectors=matrix, hnsw=hnsw)
+
+    def search(self, embedding: list[float], k: int) -> list[tuple[Document, float]]:
+        """Return the top ``k`` documents with Pinecone-style cosine scores."""
+        snapshot = self._snapshot
+        if snapshot.vectors is None:
+            return []
+
+        query = _unit_rows(np.asarray(embedding, dtype=np.float32)[None, :])[0]
+        k = min(k, len(snapshot.documents))
+        if snapshot.hnsw is not None:
+            labels, distances = snapshot.hnsw.knn_query(query, k=k)
+            rows, scores = labels[0], 1.0 - distances[0]
+        else:
+            similarities = snapshot.vectors @ query
+            rows = np.argpartition(-similarities, k - 1)[:k]
+            rows = rows[np.argsort(-similarities[rows])]
+            scores = similarities[rows]
+        return [
+            (snapshot.documents[row], float(score)) for row, score in zip(rows, scores)
+        ]
+
+
+class LocalRetriever(BaseRetriever):
+    """Drop-in for ``as_retriever(search_type="similarity_score_threshold")``."""
+
+    index: LocalVectorIndex
+    embeddings: Embeddings
+    k: int = 4
+    score_threshold: float = 0.0
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        return self._select(self.embeddings.embed_query(query))
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        return self._select(await self.embeddings.aembed_query(query))
+
+    def _select(self, embedding: list[float]) -> list[Document]:
+        # Same relevance mapping as PineconeVectorStore for cosine indexes.
+        return [
+            doc
+            for doc, score in self.index.search(embedding, self.k)
+            if (score + 1) / 2 >= self.score_threshold
+        ]
+
+
+async def refresh_periodically(index: LocalVectorIndex, interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(index.refresh)
+        except Exception as e:
+            print(f"[Local Index Refresh Error] {e}")
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
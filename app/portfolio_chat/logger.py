@@ -1,12 +1,171 @@
+import asyncio
+import json
 import os
-from datetime import datetime
-from telegram import Bot
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
 
 from dotenv import load_dotenv
+from telegram import Bot
+from telegram.error import BadRequest, RetryAfter, TelegramError
+
+from tracing import record
 
 load_dotenv()
 
-telegram_bot = Bot(token=os.getenv("TELEGRAM_API_KEY"))
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+
+
+class TelegramOutbox:
+    """Bounded queue drained by a background worker that batches Telegram messages.
+
+    Producers never wait on Telegram: ``put`` only enqueues. Every
+    ``flush_interval`` seconds the worker joins queued messages into as few
+    Telegram messages as fit, retrying with exponential backoff. When the queue
+    is full, a batch keeps failing or the worker is stopped part way through
+    one, messages are appended to ``spill_path`` and re-enqueued on the next
+    start; without a spill path they are dropped.
+    """
+
+    def __init__(
+        self,
+        chat_id: str | None,
+        max_queue: int = 1000,
+        flush_interval: float = 5.0,
+        max_retries: int = 5,
+        spill_path: str | None = None,
+    ):
+        self.bot: Bot | None = None
+        self.chat_id = chat_id
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.spill_path = Path(spill_path) if spill_path else None
+
+        self._queue: asyncio.Queue[str] = asyncio.Queue(maxsize=max_queue)
+        self._worker: asyncio.Task | None = None
+
+        self.sent = 0
+        self.dropped = 0
+        self.spilled = 0
+
+    def put(self, text: str) -> None:
+        try:
+            self._queue.put_nowait(text)
+        except asyncio.QueueFull:
+            self._spill([text])
+
+    async def start(self, bot: Bot) -> None:
+        self.bot = bot
+        if self.spill_path and self.spill_path.exists():
+            lines = self.spill_path.read_text(encoding="utf-8").splitlines()
+            self.spill_path.unlink()
+            for line in lines:
+                self.put(json.loads(line))
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        if self._worker is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._worker.cancel()
+        await asyncio.gather(self._worker, return_exceptions=True)
+        self._worker = None
+
+        pending = []
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        self._spill(pending)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            # Taken off the queue but not sent yet; spilled if the batch cannot finish
+            unsent = batch
+            try:
+                deadline = loop.time() + self.flush_interval
+                while (timeout := deadline - loop.time()) > 0:
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                unsent = _pack(batch)
+                while unsent:
+                    await self._deliver(unsent[0])
+                    unsent.pop(0)
+            except asyncio.CancelledError:
+                self._spill(unsent)
+                raise
+            except Exception as e:
+                print(f"[Telegram Log Error] {e}")
+                self._spill(unsent)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _deliver(self, text: str) -> None:
+        parse_mode = "Markdown"
+        for attempt in range(self.max_retries):
+            start = time.perf_counter()
+            try:
+                await self.bot.send_message(
+                    chat_id=self.chat_id, text=text, parse_mode=parse_mode
+                )
+                record("telegram", time.perf_counter() - start)
+                self.sent += 1
+                return
+            except RetryAfter as e:
+                delay = e.retry_after
+                if isinstance(delay, timedelta):
+                    delay = delay.total_seconds()
+            except BadRequest as e:
+                print(f"[Telegram Log Error] {e}")
+                if parse_mode is None:
+                    self.dropped += 1
+                    return
+                # Usually a Markdown entity broken by user input; send it plain.
+                parse_mode = None
+                continue
+            except TelegramError as e:
+                print(f"[Telegram Log Error] {e}")
+                delay = 2**attempt
+            await asyncio.sleep(delay)
+        self._spill([text])
+
+    def _spill(self, messages: list[str]) -> None:
+        if not messages:
+            return
+        if self.spill_path is None:
+            self.dropped += len(messages)
+            return
+        self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.spill_path, "a", encoding="utf-8") as f:
+            for message in messages:
+                f.write(json.dumps(message) + "\n")
+        self.spilled += len(messages)
+
+
+def _pack(messages: list[str]) -> list[str]:
+    packed: list[str] = []
+    for message in messages:
+        message = message[:TELEGRAM_MAX_MESSAGE_LENGTH]
+        if packed and len(packed[-1]) + 2 + len(message) <= TELEGRAM_MAX_MESSAGE_LENGTH:
+            packed[-1] += "\n\n" + message
+        else:
+            packed.append(message)
+    return packed
+
+
+outbox = TelegramOutbox(
+    chat_id=os.getenv("TELEGRAM_CHAT_ID"),
+    max_queue=int(os.getenv("TELEGRAM_OUTBOX_MAX_QUEUE", "1000")),
+    flush_interval=float(os.getenv("TELEGRAM_OUTBOX_FLUSH_SECONDS", "5")),
+    spill_path=os.getenv("TELEGRAM_OUTBOX_SPILL_PATH", "./.cache/telegram_outbox.ndjson"),
+)
 
 
 def _format_message(user_input: str, ia_output: str) -> str:
@@ -19,11 +178,5 @@ def _format_message(user_input: str, ia_output: str) -> str:
     )
 
 
-async def log_to_telegram(user_input: str, ia_output: str):
-    try:
-        message = _format_message(user_input, ia_output)
-        await telegram_bot.send_message(
-            chat_id=os.getenv("TELEGRAM_CHAT_ID"), text=message, parse_mode="Markdown"
-        )
-    except Exception as e:
-        print(f"[Telegram Log Error] {e}")
+def log_to_telegram(user_input: str, ia_output: str):
+    outbox.put(_format_message(user_input, ia_output))
@@ -1,5 +1,9 @@
 import asyncio
 import os
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from dataclasses import asdict
 
 from dotenv import load_dotenv
 from fastapi import Depends, FastAPI, Header, HTTPException, Request
@@ -10,28 +14,91 @@ from langchain.agents.format_scratchpad import format_log_to_str
 from langchain.agents.output_parsers import JSONAgentOutputParser
 from langchain.tools.render import render_text_description_and_args
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables import Runnable, RunnablePassthrough
 from langchain_core.tools import tool
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain_pinecone import PineconeVectorStore
-from pinecone import Pinecone
+from prometheus_client import make_asgi_app
 from pydantic import BaseModel, Field
 from slowapi import Limiter
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
 from slowapi.util import get_remote_address
-from starlette.responses import JSONResponse
-from telegram import Bot
-
-from logger import log_to_telegram
+from starlette.responses import JSONResponse, StreamingResponse
+
+from clients import ClientRegistry
+from embedding_cache import CachedEmbeddings
+from local_index import LocalRetriever, LocalVectorIndex, refresh_periodically
+from logger import log_to_telegram, outbox
+from native_agent import create_native_agent
+from rate_limit import AdmissionController
+from semantic_cache import SemanticCache
+from streaming import sse, stream_agent
+from tracing import StageTracer, monitor_event_loop_lag, recent_spans
 
 load_dotenv()
 
-app = FastAPI()
+# "json" runs the ReAct JSON-blob executor, "native" uses OpenAI tool calling.
+AGENT_MODE = os.getenv("AGENT_MODE", "json")
+JSON_FORMAT_MARKER = "You have access to the following tools"
 
 header_scheme = APIKeyHeader(name="x-key")
-agent: AgentExecutor
-telegram_bot = Bot(token=os.getenv("TELEGRAM_API_KEY"))
+agent: Runnable | None = None
+response_cache: SemanticCache
+clients: ClientRegistry
+local_index: LocalVectorIndex | None = None
+background_tasks: set[asyncio.Task] = set()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global agent, clients, response_cache
+    clients = ClientRegistry(pool_size=int(os.getenv("HTTP_POOL_SIZE", "20")))
+    await outbox.start(clients.telegram)
+
+    embedding_model = "text-embedding-3-small"
+    embeddings = CachedEmbeddings(
+        OpenAIEmbeddings(
+            model=embedding_model,
+            # Queries are short: skip client-side tiktoken chunking (and its download).
+            check_embedding_ctx_length=False,
+            http_client=clients.openai_sync,
+            http_async_client=clients.openai_async,
+        ),
+        model=embedding_model,
+        path=os.getenv("EMBEDDING_CACHE_PATH", "./.cache/embeddings.sqlite3"),
+        batch_window=float(os.getenv("EMBEDDING_BATCH_WINDOW_SECONDS", "0.01")),
+    )
+    index = clients.pinecone_index("yuri-data")
+    await clients.warm_up(index)
+    agent = await asyncio.to_thread(init_agent, index, embeddings, clients)
+    response_cache = SemanticCache(
+        embeddings,
+        similarity_threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92")),
+        ttl_seconds=float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "3600")),
+        max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "512")),
+    )
+    background_tasks.add(asyncio.create_task(monitor_event_loop_lag()))
+    if local_index is not None:
+        interval = float(os.getenv("LOCAL_INDEX_REFRESH_SECONDS", "900"))
+        task = asyncio.create_task(refresh_periodically(local_index, interval))
+        background_tasks.add(task)
+
+    yield
+
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    background_tasks.clear()
+    await outbox.stop()
+    await clients.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
+app.mount("/metrics", make_asgi_app())
+
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() == "true"
 
 
 class Message(BaseModel):
@@ -49,27 +116,44 @@ async def send_message(name: str, message: str) -> str:
         f"👤 *Name*: `{name}`\n\n"
         f"💬 *Message*:\n`{message}`\n\n"
     )
-    asyncio.create_task(
-        telegram_bot.send_message(
-            chat_id=os.getenv("TELEGRAM_CHAT_ID"), text=final_msg, parse_mode="Markdown"
-        )
-    )
+    outbox.put(final_msg)
     return "Message sent successfully!"
 
 
-def init_agent() -> AgentExecutor:
-    index_name = "yuri-data"
+def init_retriever(
+    index, embeddings: CachedEmbeddings, k: int, score_threshold: float
+) -> BaseRetriever:
+    global local_index
+
+    if os.getenv("RETRIEVER_BACKEND", "local") == "local":
+        try:
+            local_index = LocalVectorIndex(index)
+            local_index.refresh()
+            return LocalRetriever(
+                index=local_index,
+                embeddings=embeddings,
+                k=k,
+                score_threshold=score_threshold,
+            )
+        except Exception as e:
+            local_index = None
+            print(f"[Local Index Error] falling back to Pinecone: {e}")
 
-    pc = Pinecone(api_key=os.getenv("PINECONE_KEY"))
-    index = pc.Index(index_name)
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
     vector_store = PineconeVectorStore(index=index, embedding=embeddings)
-
-    retriever = vector_store.as_retriever(
+    return vector_store.as_retriever(
         search_type="similarity_score_threshold",
-        search_kwargs={"k": 3, "score_threshold": 0.5},
+        search_kwargs={"k": k, "score_threshold": score_threshold},
     )
 
+
+def init_agent(
+    index,
+    embeddings: CachedEmbeddings,
+    clients: ClientRegistry,
+    mode: str = AGENT_MODE,
+) -> Runnable:
+    retriever = init_retriever(index, embeddings, k=3, score_threshold=0.5)
+
     with open(
         "./prompts/system_prompt.txt", "r", encoding="utf-8"
     ) as llm_instructions_f:
@@ -86,6 +170,23 @@ def init_agent() -> AgentExecutor:
 
     all_tools = [send_message, contextual_search]
 
+    llm = ChatOpenAI(
+        model="gpt-4.1-nano",
+        temperature=0.3,
+        max_tokens=150,
+        max_retries=2,
+        stream_usage=True,
+        openai_api_key=os.getenv("OPENAI_API_KEY"),
+        http_client=clients.openai_sync,
+        http_async_client=clients.openai_async,
+    )
+
+    if mode == "native":
+        persona = system_instructions.split(JSON_FORMAT_MARKER)[0]
+        return create_native_agent(
+            llm, all_tools, persona.strip(), search_tool=contextual_search
+        )
+
     hooman_prompt = """{input}
     {agent_scratchpad}
     (reminder to always respond in a JSON blob)
@@ -105,14 +206,6 @@ def init_agent() -> AgentExecutor:
         tool_names=", ".join([t.name for t in all_tools]),
     )
 
-    llm = ChatOpenAI(
-        model="gpt-4.1-nano",
-        temperature=0.3,
-        max_tokens=150,
-        max_retries=2,
-        openai_api_key=os.getenv("OPENAI_API_KEY"),
-    )
-
     chain = (
         RunnablePassthrough.assign(
             agent_scratchpad=lambda x: format_log_to_str(x["intermediate_steps"]),
@@ -126,7 +219,7 @@ def init_agent() -> AgentExecutor:
         agent=chain,
         tools=all_tools,
         handle_parsing_errors=True,
-        verbose=True,
+        return_intermediate_steps=True,
         # memory=memory,
     )
 
@@ -143,7 +236,19 @@ def verify_token(x_key: str = Header(None)):
     return True
 
 
-limiter = Limiter(key_func=get_remote_address)
+RATE_LIMIT = os.getenv("RATE_LIMIT", "12/minute")
+
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=os.getenv(
+        "RATE_LIMIT_STORAGE_URI",
+        f"sqlite://{tempfile.gettempdir()}/portfolio_chat_ratelimit.sqlite3",
+    ),
+)
+admission = AdmissionController(
+    max_concurrent=int(os.getenv("MAX_CONCURRENT_AGENT_RUNS", "8")),
+    queue_timeout=float(os.getenv("AGENT_QUEUE_TIMEOUT_SECONDS", "2")),
+)
 app.state.limiter = limiter
 app.add_exception_handler(
     RateLimitExceeded,
@@ -166,15 +271,117 @@ app.add_middleware(
 )
 
 
-@app.on_event("startup")
-async def startup_event():
-    global agent
-    agent = init_agent()
+def traced_response(content: dict, tracer: StageTracer) -> JSONResponse:
+    headers = {"Server-Timing": tracer.server_timing()} if SERVER_TIMING else None
+    return JSONResponse(content=content, headers=headers)
+
+
+def is_cacheable(result: dict) -> bool:
+    # Answers that triggered a side effect (e.g. messaging Yuri) must run again.
+    return all(
+        action.tool != send_message.name
+        for action, _ in result.get("intermediate_steps", [])
+    )
 
 
 @app.post("/chat", dependencies=[Depends(verify_token)])
-@limiter.limit("12/minute")
+@limiter.limit(RATE_LIMIT)
 async def chat(request: Request, q: Question):
-    result = await agent.ainvoke({"input": q.query})
-    await log_to_telegram(q.query, result["output"])
-    return {"response": result["output"]}
+    tracer = StageTracer()
+    start = time.perf_counter()
+    cached = await response_cache.lookup(q.query)
+    tracer.add("cache_lookup", time.perf_counter() - start)
+    if cached.answer is not None:
+        return traced_response({"response": cached.answer}, tracer)
+
+    async with admission.slot():
+        start = time.perf_counter()
+        result = await agent.ainvoke(
+            {"input": q.query}, config={"callbacks": [tracer]}
+        )
+        tracer.add("agent", time.perf_counter() - start)
+    if is_cacheable(result):
+        response_cache.store(cached, result["output"])
+    log_to_telegram(q.query, result["output"])
+    return traced_response({"response": result["output"]}, tracer)
+
+
+@app.post("/chat/stream", dependencies=[Depends(verify_token)])
+@limiter.limit(RATE_LIMIT)
+async def chat_stream(request: Request, q: Question):
+    tracer = StageTracer()
+    start = time.perf_counter()
+    cached = await response_cache.lookup(q.query)
+    tracer.add("cache_lookup", time.perf_counter() - start)
+    if cached.answer is not None:
+        return StreamingResponse(
+            iter([sse("done", {"response": cached.answer})]),
+            media_type="text/event-stream",
+        )
+
+    async def event_stream():
+        # Taken here rather than before the response: a body that never starts
+        # (client gone before the first send) would never release it.
+        try:
+            await admission.acquire()
+        except HTTPException as e:
+            yield sse("error", {"detail": e.detail})
+            return
+
+        result = None
+        start = time.perf_counter()
+        try:
+            async for event, data in stream_agent(
+                agent,
+                {"input": q.query},
+                config={"callbacks": [tracer]},
+                json_answer=AGENT_MODE == "json",
+            ):
+                if event == "result":
+                    result = data
+                else:
+                    yield sse(event, data)
+        except Exception as e:
+            yield sse("error", {"detail": str(e)})
+            return
+        finally:
+            admission.release()
+            tracer.add("agent", time.perf_counter() - start)
+
+        if result is None:
+            yield sse("error", {"detail": "Agent finished without a result"})
+            return
+        yield sse("done", {"response": result["output"]})
+        if is_cacheable(result):
+            response_cache.store(cached, result["output"])
+        log_to_telegram(q.query, result["output"])
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/ready")
+async def ready():
+    upstreams = clients.health()
+    is_ready = agent is not None and clients.ready()
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={"ready": is_ready, "upstreams": upstreams},
+    )
+
+
+@app.get("/cache/stats", dependencies=[Depends(verify_token)])
+async def cache_stats():
+    return response_cache.stats()
+
+
+@app.get("/debug/spans", dependencies=[Depends(verify_token)])
+async def debug_spans(limit: int = 200, stage: str | None = None):
+    """Most recent stage spans of this worker, oldest first."""
+    spans = [
+        span for span in recent_spans.snapshot() if stage is None or span.stage == stage
+    ]
+    return {"spans": [asdict(span) for span in spans[-limit:]] if limit > 0 else []}
@@ -0,0 +1,113 @@
+import asyncio
+import re
+
+from langchain_core.agents import AgentAction
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+from langchain_core.tools import BaseTool
+
+from semantic_cache import normalize_query
+
+# Queries that are chit-chat, jokes or a request to message Yuri do not need the
+# knowledge base; everything else is assumed to be a question about Yuri.
+NO_RETRIEVAL = re.compile(
+    r"^\s*(hi|hello|hey|thanks|thank you|ok|okay|bye)\b[\s!.?]*$"
+    r"|\b(joke|send (a |him a )?message|contact him|message to yuri)\b",
+    re.IGNORECASE,
+)
+
+
+def needs_retrieval(query: str) -> bool:
+    return not NO_RETRIEVAL.search(query)
+
+
+def _searches_for(args: dict, query: str) -> bool:
+    # Search tools take a single query string; the model may rephrase it.
+    values = list(args.values())
+    return (
+        len(values) == 1
+        and isinstance(values[0], str)
+        and normalize_query(values[0]) == normalize_query(query)
+    )
+
+
+def _discard(task: asyncio.Task) -> None:
+    if task.done() and not task.cancelled():
+        task.exception()  # retrieved so a failed prefetch is not reported as unhandled
+    task.cancel()
+
+
+def create_native_agent(
+    llm: BaseChatModel,
+    tools: list[BaseTool],
+    system_prompt: str,
+    search_tool: BaseTool,
+    max_iterations: int = 5,
+) -> Runnable:
+    """Agent loop over the model's native tool calling.
+
+    Tool calls from one model turn run concurrently, and for retrieval-worthy
+    queries ``search_tool`` is started on the raw question alongside the first
+    model call. A first-turn search for that same question is answered from
+    it; a rephrased search, or a failed prefetch, runs the tool as usual.
+    Returns the same ``output``/``intermediate_steps`` shape as AgentExecutor.
+    """
+    llm_with_tools = llm.bind_tools(tools)
+    tools_by_name = {t.name: t for t in tools}
+
+    async def run(inputs: dict, config: RunnableConfig) -> dict:
+        query = inputs["input"]
+        prefetch = None
+        if needs_retrieval(query):
+            prefetch = asyncio.create_task(search_tool.ainvoke(query, config))
+
+        async def call_tool(call: dict) -> str:
+            nonlocal prefetch
+            if (
+                call["name"] == search_tool.name
+                and prefetch is not None
+                and _searches_for(call["args"], query)
+            ):
+                task, prefetch = prefetch, None
+                try:
+                    return await task
+                except Exception as e:
+                    print(f"[Prefetch Error] searching again: {e}")
+            tool = tools_by_name.get(call["name"])
+            if tool is None:
+                return f"{call['name']} is not a valid tool."
+            return await tool.ainvoke(call["args"], config)
+
+        messages = [SystemMessage(system_prompt), HumanMessage(query)]
+        steps = []
+        try:
+            for _ in range(max_iterations):
+                response = await llm_with_tools.ainvoke(messages, config)
+                messages.append(response)
+                if not response.tool_calls:
+                    return {"output": response.content, "intermediate_steps": steps}
+
+                observations = await asyncio.gather(
+                    *(call_tool(call) for call in response.tool_calls)
+                )
+                for call, observation in zip(response.tool_calls, observations):
+                    messages.append(
+                        ToolMessage(str(observation), tool_call_id=call["id"])
+                    )
+                    steps.append(
+                        (AgentAction(call["name"], call["args"], log=""), observation)
+                    )
+                # Only the first turn races the model; later searches are explicit.
+                if prefetch is not None:
+                    _discard(prefetch)
+                    prefetch = None
+            return {
+                "output": "Agent stopped due to iteration limit.",
+                "intermediate_steps": steps,
+            }
+        finally:
+            if prefetch is not None:
+                _discard(prefetch)
+
+    return RunnableLambda(run, name="NativeToolAgent")
@@ -0,0 +1,132 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException
+from limits.storage import Storage
+
+
+class SQLiteStorage(Storage):
+    """Fixed-window rate limit counters shared by every worker process on a host.
+
+    Registered with ``limits`` under the ``sqlite://`` scheme, e.g.
+    ``sqlite:///dev/shm/portfolio_chat_ratelimit.sqlite3``; placing the file on
+    tmpfs keeps the counters in shared memory. Each increment is a single
+    atomic UPSERT, so concurrent workers never lose updates.
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.path = uri.split("://", 1)[1]
+        self._local = threading.local()
+        self._incr_count = 0
+        with self._connection() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS counters ("
+                "key TEXT PRIMARY KEY, value INTEGER NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        now = time.time()
+        self._incr_count += 1
+        with self._connection() as db:
+            if self._incr_count % 1000 == 0:
+                db.execute("DELETE FROM counters WHERE expires_at <= ?", (now,))
+            (value,) = db.execute(
+                "INSERT INTO counters (key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET "
+                "value = CASE WHEN expires_at <= ? THEN excluded.value "
+                "ELSE value + excluded.value END, "
+                "expires_at = CASE WHEN expires_at <= ? THEN excluded.expires_at "
+                "ELSE expires_at END "
+                "RETURNING value",
+                (key, amount, now + expiry, now, now),
+            ).fetchone()
+        return value
+
+    def get(self, key: str) -> int:
+        row = (
+            self._connection()
+            .execute(
+                "SELECT value FROM counters WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            )
+            .fetchone()
+        )
+        return row[0] if row else 0
+
+    def get_expiry(self, key: str) -> float:
+        row = (
+            self._connection()
+            .execute("SELECT expires_at FROM counters WHERE key = ?", (key,))
+            .fetchone()
+        )
+        return row[0] if row else time.time()
+
+    def check(self) -> bool:
+        try:
+            self._connection().execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> int | None:
+        with self._connection() as db:
+            return db.execute("DELETE FROM counters").rowcount
+
+    def clear(self, key: str) -> None:
+        with self._connection() as db:
+            db.execute("DELETE FROM counters WHERE key = ?", (key,))
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=5)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=OFF")
+            self._local.db = db
+        return db
+
+
+class AdmissionController:
+    """Caps concurrent agent runs in this worker.
+
+    Requests wait up to ``queue_timeout`` seconds for a slot and are then
+    rejected with a 429, so a burst turns into fast failures instead of a pile
+    of in-flight OpenAI calls.
+    """
+
+    def __init__(self, max_concurrent: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.in_flight = 0
+        self.rejected = 0
+
+    async def acquire(self) -> None:
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise HTTPException(status_code=429, detail="Too many concurrent requests")
+        self.in_flight += 1
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
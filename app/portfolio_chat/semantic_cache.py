@@ -0,0 +1,153 @@
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+def normalize_query(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().casefold()
+
+
+@dataclass
+class CacheLookup:
+    key: str
+    vector: np.ndarray | None
+    answer: str | None = None
+
+
+@dataclass
+class _Entry:
+    slot: int
+    answer: str
+    expires_at: float
+
+
+class SemanticCache:
+    """In-process cache of agent answers, matched by query embedding similarity.
+
+    Exact (normalized) repeats are answered from a dict without embedding the
+    query; everything else is embedded once and compared against the cached
+    questions with a single dot product over a preallocated matrix.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        similarity_threshold: float = 0.92,
+        ttl_seconds: float = 3600,
+        max_entries: int = 512,
+    ):
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._slot_keys: list[str | None] = [None] * max_entries
+        self._free_slots = list(range(max_entries - 1, -1, -1))
+        self._vectors: np.ndarray | None = None
+        self._live = np.zeros(max_entries, dtype=bool)
+        self._expires_at = np.zeros(max_entries, dtype=np.float64)
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    async def lookup(self, query: str) -> CacheLookup:
+        key = normalize_query(query)
+
+        entry = self._get_live(key)
+        if entry is not None:
+            self.exact_hits += 1
+            return CacheLookup(key=key, vector=None, answer=entry.answer)
+
+        vector = _unit(await self.embeddings.aembed_query(query))
+        match = self._nearest(vector)
+        if match is not None:
+            entry = self._get_live(match)
+            if entry is not None:
+                self.semantic_hits += 1
+                return CacheLookup(key=key, vector=vector, answer=entry.answer)
+
+        self.misses += 1
+        return CacheLookup(key=key, vector=vector)
+
+    def store(self, lookup: CacheLookup, answer: str) -> None:
+        if lookup.vector is None:
+            return
+
+        if lookup.key in self._entries:
+            self._evict(lookup.key)
+        if not self._free_slots:
+            self._evict_expired()
+        if not self._free_slots:
+            self._evict(next(iter(self._entries)))
+
+        if self._vectors is None:
+            self._vectors = np.zeros(
+                (self.max_entries, lookup.vector.shape[0]), dtype=np.float32
+            )
+
+        slot = self._free_slots.pop()
+        expires_at = time.monotonic() + self.ttl_seconds
+        self._vectors[slot] = lookup.vector
+        self._live[slot] = True
+        self._expires_at[slot] = expires_at
+        self._slot_keys[slot] = lookup.key
+        self._entries[lookup.key] = _Entry(slot=slot, answer=answer, expires_at=expires_at)
+
+    def stats(self) -> dict:
+        hits = self.exact_hits + self.semantic_hits
+        total = hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "similarity_threshold": self.similarity_threshold,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": hits,
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": hits / total if total else 0.0,
+        }
+
+    def _get_live(self, key: str) -> _Entry | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._evict(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _nearest(self, vector: np.ndarray) -> str | None:
+        if self._vectors is None or not self._entries:
+            return None
+        scores = self._vectors @ vector
+        # Expired slots are left in place until evicted; they must not shadow a live match
+        scores[~self._live | (self._expires_at <= time.monotonic())] = -np.inf
+        slot = int(np.argmax(scores))
+        if scores[slot] < self.similarity_threshold:
+            return None
+        return self._slot_keys[slot]
+
+    def _evict(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._live[entry.slot] = False
+        self._slot_keys[entry.slot] = None
+        self._free_slots.append(entry.slot)
+
+    def _evict_expired(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, e in self._entries.items() if e.expires_at <= now]:
+            self._evict(key)
+
+
+def _unit(vector: list[float]) -> np.ndarray:
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    return array / norm if norm else array
@@ -0,0 +1,108 @@
+import json
+import re
+from typing import AsyncIterator
+
+from langchain_core.runnables import Runnable, RunnableConfig
+
+FINAL_ANSWER = re.compile(r'"action"\s*:\s*"Final Answer"')
+ACTION_INPUT = re.compile(r'"action_input"\s*:\s*"')
+JSON_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+
+class FinalAnswerExtractor:
+    """Pulls the ``action_input`` string of a Final Answer blob out of a token stream.
+
+    The JSON agent only knows it is answering once ``"action": "Final Answer"``
+    has been generated, so tokens are buffered until then and the string value
+    is decoded incrementally as it arrives.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos: int | None = None
+        self._done = False
+
+    def feed(self, text: str) -> str:
+        if self._done:
+            return ""
+        self._buffer += text
+        if self._pos is None:
+            action = FINAL_ANSWER.search(self._buffer)
+            if action is None:
+                return ""
+            start = ACTION_INPUT.search(self._buffer, action.end())
+            if start is None:
+                return ""
+            self._pos = start.end()
+        return self._drain()
+
+    def _drain(self) -> str:
+        out = []
+        buffer, pos = self._buffer, self._pos
+        while pos < len(buffer):
+            char = buffer[pos]
+            if char == '"':
+                self._done = True
+                break
+            if char != "\\":
+                out.append(char)
+                pos += 1
+                continue
+            if pos + 1 >= len(buffer):
+                break
+            escape = buffer[pos + 1]
+            if escape == "u":
+                if pos + 6 > len(buffer):
+                    break
+                out.append(chr(int(buffer[pos + 2 : pos + 6], 16)))
+                pos += 6
+            else:
+                out.append(JSON_ESCAPES.get(escape, escape))
+                pos += 2
+        self._pos = pos
+        return "".join(out)
+
+
+def sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def stream_agent(
+    agent: Runnable,
+    inputs: dict,
+    config: RunnableConfig | None = None,
+    json_answer: bool = True,
+) -> AsyncIterator[tuple[str, dict]]:
+    """Translate the executor's event stream into (event, data) pairs.
+
+    Emits ``tool_start``/``tool_end`` for each tool call, ``token`` for every
+    final-answer delta and a closing ``result`` carrying the executor output.
+    With ``json_answer=False`` (native tool calling) model text is the answer
+    itself and is forwarded as is.
+    """
+    extractors: dict[str, FinalAnswerExtractor] = {}
+
+    async for event in agent.astream_events(inputs, config, version="v2"):
+        kind = event["event"]
+        if kind == "on_chat_model_stream":
+            delta = event["data"]["chunk"].content
+            if json_answer:
+                extractor = extractors.setdefault(event["run_id"], FinalAnswerExtractor())
+                delta = extractor.feed(delta)
+            if delta:
+                yield "token", {"text": delta}
+        elif kind == "on_tool_start":
+            yield "tool_start", {"tool": event["name"], "input": event["data"].get("input")}
+        elif kind == "on_tool_end":
+            yield "tool_end", {"tool": event["name"], "output": str(event["data"].get("output"))}
+        elif kind == "on_chain_end" and not event["parent_ids"]:
+            yield "result", event["data"]["output"]
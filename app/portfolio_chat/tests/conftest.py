@@ -0,0 +1,6 @@
+import os
+
+# main.py reads these at import time
+os.environ.setdefault("API_KEY", "test-key")
+os.environ.setdefault("RATE_LIMIT", "1000/minute")
+os.environ.setdefault("RATE_LIMIT_STORAGE_URI", "memory://")
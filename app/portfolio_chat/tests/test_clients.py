@@ -0,0 +1,90 @@
+import httpx
+import pytest
+
+from clients import ClientRegistry
+
+
+class FakeIndex:
+    def __init__(self, error: Exception | None = None):
+        self.error = error
+
+    def describe_index_stats(self):
+        if self.error:
+            raise self.error
+        return {"total_vector_count": 3}
+
+
+class FakeBot:
+    def __init__(self, error: Exception | None = None):
+        self.error = error
+
+    async def initialize(self):
+        if self.error:
+            raise self.error
+
+    async def shutdown(self):
+        pass
+
+
+@pytest.fixture
+async def registry(monkeypatch):
+    monkeypatch.setenv("PINECONE_KEY", "test")
+    monkeypatch.setenv("TELEGRAM_API_KEY", "1:test")
+    registry = ClientRegistry()
+    await registry.aclose()
+
+    def models(request):
+        return httpx.Response(200, json={"data": []})
+
+    registry.openai_async = httpx.AsyncClient(transport=httpx.MockTransport(models))
+    registry.openai_sync = httpx.Client(transport=httpx.MockTransport(models))
+    registry.telegram = FakeBot()
+    yield registry
+    await registry.aclose()
+
+
+async def test_not_ready_before_warm_up(registry):
+    assert not registry.ready()
+
+
+async def test_ready_when_every_upstream_answers(registry):
+    await registry.warm_up(FakeIndex())
+
+    assert registry.ready()
+    assert set(registry.health()) == {"openai", "openai_sync", "pinecone", "telegram"}
+
+
+async def test_telegram_outage_does_not_fail_readiness(registry):
+    registry.telegram = FakeBot(RuntimeError("telegram down"))
+
+    await registry.warm_up(FakeIndex())
+
+    assert registry.ready()
+    assert registry.health()["telegram"]["ready"] is False
+    assert registry.health()["telegram"]["error"] == "telegram down"
+
+
+async def test_critical_outage_fails_readiness(registry):
+    await registry.warm_up(FakeIndex(RuntimeError("pinecone down")))
+
+    assert not registry.ready()
+    assert registry.health()["pinecone"]["error"] == "pinecone down"
+
+
+async def test_openai_error_status_fails_readiness(registry):
+    registry.openai_async = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(401))
+    )
+
+    await registry.warm_up(FakeIndex())
+
+    assert not registry.ready()
+    assert registry.health()["openai"]["ready"] is False
+
+
+async def test_closed_client_fails_readiness(registry):
+    await registry.warm_up(FakeIndex())
+    await registry.openai_async.aclose()
+
+    assert not registry.ready()
+    assert registry.health()["openai"] == {"ready": False, "error": "client closed"}
@@ -0,0 +1,129 @@
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from embedding_cache import CachedEmbeddings
+
+
+class RecordingEmbeddings(Embeddings):
+    def __init__(self, fail: bool = False):
+        self.batches: list[list[str]] = []
+        self.fail = fail
+        self.lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self.lock:
+            self.batches.append(list(texts))
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+@pytest.fixture
+def make_cache(tmp_path):
+    caches = []
+
+    def make(underlying, **kwargs):
+        cache = CachedEmbeddings(
+            underlying, model="test-model", path=str(tmp_path / "embeddings.sqlite3"), **kwargs
+        )
+        caches.append(cache)
+        return cache
+
+    yield make
+    for cache in caches:
+        cache._db.close()
+
+
+def test_upstream_sees_the_original_text(make_cache):
+    underlying = RecordingEmbeddings()
+    cache = make_cache(underlying)
+
+    vector = cache.embed_query("  What  is Yuri's STACK? ")
+
+    assert underlying.batches == [["  What  is Yuri's STACK? "]]
+    assert vector == [25.0, 1.0]
+
+
+def test_normalized_repeat_is_served_from_disk(make_cache):
+    underlying = RecordingEmbeddings()
+    make_cache(underlying).embed_query("What is Yuri's stack?")
+
+    # A new instance only has the SQLite file to go on
+    vector = make_cache(underlying).embed_query("what is   yuri's STACK?")
+
+    assert underlying.batches == [["What is Yuri's stack?"]]
+    assert vector == [21.0, 1.0]
+
+
+async def test_concurrent_misses_share_one_batch(make_cache):
+    underlying = RecordingEmbeddings()
+    cache = make_cache(underlying, batch_window=0.05)
+
+    vectors = await asyncio.gather(
+        cache.aembed_query("first"),
+        cache.aembed_query("second one"),
+        cache.aembed_query("FIRST"),
+    )
+
+    assert underlying.batches == [["first", "second one"]]
+    assert vectors == [[5.0, 1.0], [10.0, 1.0], [5.0, 1.0]]
+
+
+async def test_full_batch_is_sent_without_waiting(make_cache):
+    underlying = RecordingEmbeddings()
+    cache = make_cache(underlying, batch_window=60, max_batch_size=2)
+
+    vectors = await asyncio.wait_for(cache.aembed_documents(["a", "bb"]), timeout=5)
+
+    assert vectors == [[1.0, 1.0], [2.0, 1.0]]
+
+
+async def test_upstream_failure_reaches_every_waiter(make_cache):
+    cache = make_cache(RecordingEmbeddings(fail=True))
+
+    results = await asyncio.gather(
+        cache.aembed_query("one"), cache.aembed_query("two"), return_exceptions=True
+    )
+
+    assert [str(result) for result in results] == ["upstream down", "upstream down"]
+    # Nothing is left pending, so the next call retries upstream
+    assert cache._pending == {}
+
+
+def test_failed_save_rolls_back(make_cache):
+    cache = make_cache(RecordingEmbeddings())
+    cache._db.execute(
+        "CREATE TRIGGER reject BEFORE INSERT ON embeddings WHEN NEW.text = 'bad' "
+        "BEGIN SELECT RAISE(ABORT, 'rejected'); END"
+    )
+
+    with pytest.raises(sqlite3.IntegrityError):
+        cache._save(["good", "bad"], [[1.0], [2.0]])
+
+    assert not cache._db.in_transaction
+    assert cache._load(["good", "bad"]) == [None, None]
+    cache._save(["good"], [[1.0]])
+    assert cache._load(["good"]) == [[1.0]]
+
+
+async def test_failed_save_still_answers_the_waiters(make_cache, capsys):
+    underlying = RecordingEmbeddings()
+    cache = make_cache(underlying)
+    cache._db.execute(
+        "CREATE TRIGGER reject BEFORE INSERT ON embeddings "
+        "BEGIN SELECT RAISE(ABORT, 'disk full'); END"
+    )
+
+    vectors = await asyncio.gather(cache.aembed_query("one"), cache.aembed_query("three"))
+
+    assert vectors == [[3.0, 1.0], [5.0, 1.0]]
+    assert "[Embedding Cache Error]" in capsys.readouterr().out
+    assert cache._pending == {}
+    assert cache._load(["one"]) == [None]
@@ -0,0 +1,113 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from local_index import LocalRetriever, LocalVectorIndex
+
+
+class FakePineconeIndex:
+    """Pages of ids from ``list`` and vectors from ``fetch``, like the Pinecone client."""
+
+    def __init__(self, records: dict[str, tuple[list[float], dict]], page_size: int = 2):
+        self.records = records
+        self.page_size = page_size
+
+    def list(self, namespace=""):
+        ids = list(self.records)
+        for start in range(0, len(ids), self.page_size):
+            yield ids[start : start + self.page_size]
+
+    def fetch(self, ids, namespace=""):
+        return SimpleNamespace(
+            vectors={
+                id: SimpleNamespace(id=id, values=self.records[id][0], metadata=self.records[id][1])
+                for id in ids
+            }
+        )
+
+
+class FixedEmbeddings(Embeddings):
+    def __init__(self, vector):
+        self.vector = vector
+
+    def embed_documents(self, texts):
+        return [self.vector for _ in texts]
+
+    def embed_query(self, text):
+        return self.vector
+
+
+RECORDS = {
+    "python": ([1.0, 0.0, 0.0], {"text": "Python backend work", "source": "cv"}),
+    "react": ([0.0, 2.0, 0.0], {"text": "React frontends"}),
+    "mixed": ([1.0, 1.0, 0.0], {"text": "Full stack"}),
+    "untexted": ([1.0, 0.0, 0.0], {"source": "no text key"}),
+    "opposite": ([-1.0, 0.0, 0.0], {"text": "Nothing in common"}),
+}
+
+
+@pytest.fixture
+def index():
+    index = LocalVectorIndex(FakePineconeIndex(RECORDS))
+    index.refresh()
+    return index
+
+
+def test_refresh_copies_documents_with_text(index):
+    assert len(index) == 4
+    (doc, _), *_ = index.search([1.0, 0.0, 0.0], k=1)
+    assert doc.id == "python"
+    assert doc.page_content == "Python backend work"
+    assert doc.metadata == {"source": "cv"}
+
+
+def test_search_ranks_by_cosine_score(index):
+    results = index.search([2.0, 0.0, 0.0], k=3)
+
+    assert [doc.id for doc, _ in results] == ["python", "mixed", "react"]
+    assert [round(score, 4) for _, score in results] == [1.0, round(1 / np.sqrt(2), 4), 0.0]
+
+
+def test_k_larger_than_the_corpus(index):
+    assert len(index.search([0.0, 1.0, 0.0], k=50)) == 4
+
+
+def test_empty_index_returns_nothing():
+    index = LocalVectorIndex(FakePineconeIndex({}))
+    index.refresh()
+
+    assert len(index) == 0
+    assert index.search([1.0, 0.0, 0.0], k=3) == []
+
+
+def test_refresh_swaps_in_the_new_corpus(index):
+    index.index = FakePineconeIndex({"react": RECORDS["react"]})
+    index.refresh()
+
+    assert [doc.id for doc, _ in index.search([1.0, 0.0, 0.0], k=3)] == ["react"]
+
+
+async def test_retriever_applies_the_pinecone_score_threshold(index):
+    # (score + 1) / 2 >= 0.5 keeps everything not pointing away from the query
+    retriever = LocalRetriever(
+        index=index, embeddings=FixedEmbeddings([1.0, 0.0, 0.0]), k=4, score_threshold=0.5
+    )
+
+    sync_ids = [doc.id for doc in retriever.invoke("python?")]
+    async_ids = [doc.id for doc in await retriever.ainvoke("python?")]
+
+    assert sync_ids == async_ids == ["python", "mixed", "react"]
+
+
+def test_hnsw_matches_exact_search():
+    pytest.importorskip("hnswlib")
+    exact = LocalVectorIndex(FakePineconeIndex(RECORDS))
+    approximate = LocalVectorIndex(FakePineconeIndex(RECORDS), hnsw_min_size=1)
+    exact.refresh()
+    approximate.refresh()
+
+    assert approximate._snapshot.hnsw is not None
+    ranked = [doc.id for doc, _ in approximate.search([1.0, 0.2, 0.0], k=2)]
+    assert ranked == [doc.id for doc, _ in exact.search([1.0, 0.2, 0.0], k=2)]
@@ -0,0 +1,153 @@
+import asyncio
+import json
+
+import pytest
+from telegram.error import BadRequest, NetworkError, RetryAfter
+
+import logger
+from logger import TELEGRAM_MAX_MESSAGE_LENGTH, TelegramOutbox, _pack
+
+
+class FakeBot:
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.sent: list[tuple[str, str | None]] = []
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        if self.failures:
+            raise self.failures.pop(0)
+        self.sent.append((text, parse_mode))
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    real_sleep = asyncio.sleep
+
+    async def sleep(delay):
+        delays.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(logger.asyncio, "sleep", sleep)
+    return delays
+
+
+def make_outbox(tmp_path, **kwargs):
+    kwargs.setdefault("spill_path", str(tmp_path / "spill.ndjson"))
+    return TelegramOutbox(chat_id="42", flush_interval=0.01, **kwargs)
+
+
+async def test_queued_messages_go_out_as_one_batch(tmp_path):
+    outbox = make_outbox(tmp_path)
+    bot = FakeBot()
+    await outbox.start(bot)
+
+    outbox.put("first")
+    outbox.put("second")
+    await outbox.stop()
+
+    assert bot.sent == [("first\n\nsecond", "Markdown")]
+    assert outbox.sent == 1
+
+
+def test_pack_splits_at_the_telegram_limit():
+    long = "x" * (TELEGRAM_MAX_MESSAGE_LENGTH - 4)
+
+    packed = _pack(["a", "b", long, "y" * (TELEGRAM_MAX_MESSAGE_LENGTH + 5)])
+
+    assert packed == ["a\n\nb", long, "y" * TELEGRAM_MAX_MESSAGE_LENGTH]
+
+
+async def test_bad_markdown_is_resent_plain(tmp_path, sleeps):
+    outbox = make_outbox(tmp_path)
+    bot = FakeBot([BadRequest("Can't parse entities")])
+    await outbox.start(bot)
+
+    outbox.put("`unbalanced")
+    await outbox.stop()
+
+    assert bot.sent == [("`unbalanced", None)]
+    assert sleeps == []
+
+
+async def test_retry_after_is_honoured(tmp_path, sleeps):
+    outbox = make_outbox(tmp_path)
+    bot = FakeBot([RetryAfter(3)])
+    await outbox.start(bot)
+
+    outbox.put("hello")
+    await outbox.stop()
+
+    assert bot.sent == [("hello", "Markdown")]
+    assert sleeps == [3]
+
+
+async def test_failing_batch_is_spilled_and_replayed_on_start(tmp_path, sleeps):
+    outbox = make_outbox(tmp_path, max_retries=3)
+    await outbox.start(FakeBot([NetworkError("down")] * 3))
+
+    outbox.put("kept")
+    await outbox.stop()
+
+    assert sleeps == [1, 2, 4]
+    assert [json.loads(line) for line in (tmp_path / "spill.ndjson").read_text().splitlines()] == [
+        "kept"
+    ]
+
+    bot = FakeBot()
+    await outbox.start(bot)
+    await outbox.stop()
+
+    assert bot.sent == [("kept", "Markdown")]
+    assert not (tmp_path / "spill.ndjson").exists()
+
+
+async def test_full_queue_spills_without_blocking(tmp_path):
+    outbox = make_outbox(tmp_path, max_queue=1)
+
+    outbox.put("queued")
+    outbox.put("overflow")
+
+    assert outbox.spilled == 1
+    assert (tmp_path / "spill.ndjson").read_text() == '"overflow"\n'
+
+
+async def test_without_spill_path_overflow_is_dropped(tmp_path):
+    outbox = make_outbox(tmp_path, max_queue=1, spill_path=None)
+
+    outbox.put("queued")
+    outbox.put("overflow")
+
+    assert outbox.dropped == 1
+
+
+async def test_unexpected_error_spills_the_batch_and_keeps_the_worker(tmp_path):
+    outbox = make_outbox(tmp_path)
+    bot = FakeBot([ValueError("bad chat id")])
+    await outbox.start(bot)
+
+    outbox.put("lost?")
+    await asyncio.wait_for(outbox._queue.join(), timeout=1)
+    outbox.put("next")
+    await outbox.stop()
+
+    assert (tmp_path / "spill.ndjson").read_text() == '"lost?"\n'
+    assert bot.sent == [("next", "Markdown")]
+
+
+async def test_stop_spills_the_batch_in_flight(tmp_path):
+    outbox = make_outbox(tmp_path)
+    sending = asyncio.Event()
+
+    class HangingBot:
+        async def send_message(self, chat_id, text, parse_mode=None):
+            sending.set()
+            await asyncio.Event().wait()
+
+    await outbox.start(HangingBot())
+    outbox.put("first")
+    outbox.put("second")
+    await sending.wait()
+    await outbox.stop(timeout=0.01)
+
+    assert (tmp_path / "spill.ndjson").read_text() == '"first\\n\\nsecond"\n'
@@ -0,0 +1,123 @@
+import inspect
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from langchain_core.embeddings import Embeddings
+
+import main
+from rate_limit import AdmissionController
+from semantic_cache import SemanticCache
+from test_streaming import FakeAgent, parse_sse, token
+from tracing import RingBuffer, Span
+
+
+class ConstantEmbeddings(Embeddings):
+    def embed_documents(self, texts):
+        return [[1.0, 0.0] for _ in texts]
+
+    def embed_query(self, text):
+        return [1.0, 0.0]
+
+
+def result(output):
+    return {"event": "on_chain_end", "parent_ids": [], "data": {"output": {"output": output}}}
+
+
+@pytest.fixture
+def app_state(monkeypatch):
+    logged = []
+    state = SimpleNamespace(
+        admission=AdmissionController(max_concurrent=1, queue_timeout=0.05),
+        cache=SemanticCache(ConstantEmbeddings()),
+        logged=logged,
+    )
+    monkeypatch.setattr(main, "admission", state.admission)
+    monkeypatch.setattr(main, "response_cache", state.cache, raising=False)
+    monkeypatch.setattr(main, "AGENT_MODE", "native")
+    monkeypatch.setattr(main, "log_to_telegram", lambda query, answer: logged.append(answer))
+    return state
+
+
+async def post_stream(query="What is your stack?"):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/chat/stream", json={"query": query}, headers={"x-key": "test-key"}
+        )
+    return response, parse_sse(response.text)
+
+
+async def test_stream_ends_with_done_and_caches_the_answer(app_state, monkeypatch):
+    monkeypatch.setattr(main, "agent", FakeAgent([token("Pyth"), token("on"), result("Python")]))
+
+    response, events = await post_stream()
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert events == [
+        ("token", {"text": "Pyth"}),
+        ("token", {"text": "on"}),
+        ("done", {"response": "Python"}),
+    ]
+    assert app_state.logged == ["Python"]
+    assert app_state.admission.in_flight == 0
+
+    # The repeat is answered from the cache without running the agent
+    monkeypatch.setattr(main, "agent", None)
+    _, events = await post_stream()
+    assert events == [("done", {"response": "Python"})]
+
+
+async def test_run_without_result_sends_an_error(app_state, monkeypatch):
+    monkeypatch.setattr(main, "agent", FakeAgent([token("partial")]))
+
+    _, events = await post_stream()
+
+    assert events == [
+        ("token", {"text": "partial"}),
+        ("error", {"detail": "Agent finished without a result"}),
+    ]
+    assert app_state.logged == []
+    assert app_state.admission.in_flight == 0
+
+
+async def test_busy_worker_rejects_in_the_stream(app_state, monkeypatch):
+    monkeypatch.setattr(main, "agent", FakeAgent([result("Python")]))
+    await app_state.admission.acquire()
+
+    _, events = await post_stream()
+
+    assert events == [("error", {"detail": "Too many concurrent requests"})]
+    assert app_state.admission.rejected == 1
+
+
+async def test_unstarted_stream_holds_no_slot(app_state, monkeypatch):
+    monkeypatch.setattr(main, "agent", FakeAgent([result("Python")]))
+    request = SimpleNamespace()
+    chat_stream = inspect.unwrap(main.chat_stream)
+
+    # The client goes away before the body is iterated
+    response = await chat_stream(request, main.Question(query="What is your stack?"))
+    await response.body_iterator.aclose()
+
+    assert app_state.admission.in_flight == 0
+
+
+async def test_debug_spans_lists_recent_spans(monkeypatch):
+    spans = RingBuffer()
+    for stage, started_at in [("llm", 2.0), ("tool:contextual_search", 1.0), ("llm", 3.0)]:
+        spans.append(Span(stage=stage, started_at=started_at, duration=0.5, prompt_tokens=7))
+    monkeypatch.setattr(main, "recent_spans", spans)
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        unauthorized = await client.get("/debug/spans")
+        llm = await client.get("/debug/spans", params={"stage": "llm", "limit": 1}, headers={"x-key": "test-key"})
+        everything = await client.get("/debug/spans", headers={"x-key": "test-key"})
+
+    assert unauthorized.status_code == 401
+    assert llm.json() == {
+        "spans": [
+            {"stage": "llm", "started_at": 3.0, "duration": 0.5, "prompt_tokens": 7, "completion_tokens": 0}
+        ]
+    }
+    assert [span["started_at"] for span in everything.json()["spans"]] == [1.0, 2.0, 3.0]
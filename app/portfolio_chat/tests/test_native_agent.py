@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.tools import tool
+
+from native_agent import create_native_agent, needs_retrieval
+
+
+class ScriptedModel:
+    """Answers each turn with the next scripted message and records what it saw."""
+
+    def __init__(self, *turns: AIMessage):
+        self.turns = list(turns)
+        self.seen: list[list] = []
+
+    def bind_tools(self, tools):
+        return self
+
+    async def ainvoke(self, messages, config=None):
+        self.seen.append(list(messages))
+        return self.turns.pop(0)
+
+
+def search_call(query: str, id: str = "call-1") -> AIMessage:
+    return AIMessage(
+        "", tool_calls=[{"name": "contextual_search", "args": {"input": query}, "id": id}]
+    )
+
+
+@pytest.fixture
+def searches():
+    return []
+
+
+@pytest.fixture
+def search_tool(searches):
+    @tool
+    async def contextual_search(input: str) -> str:
+        """Search for relevant documents about Yuri."""
+        searches.append(input)
+        if input == "flaky" and searches.count(input) == 1:
+            raise RuntimeError("index unavailable")
+        return f"docs about {input}"
+
+    return contextual_search
+
+
+def make_agent(model, search_tool):
+    return create_native_agent(model, [search_tool], "You are Yuri's assistant.", search_tool)
+
+
+def tool_results(model) -> list[str]:
+    return [m.content for m in model.seen[-1] if isinstance(m, ToolMessage)]
+
+
+def test_small_talk_skips_retrieval():
+    assert not needs_retrieval("Hi!")
+    assert not needs_retrieval("Can you send him a message?")
+    assert needs_retrieval("What did Yuri build with Python?")
+
+
+async def test_matching_search_uses_the_prefetch(search_tool, searches):
+    model = ScriptedModel(search_call("  what is yuri's STACK? "), AIMessage("Python"))
+
+    result = await make_agent(model, search_tool).ainvoke({"input": "What is Yuri's stack?"})
+
+    assert result["output"] == "Python"
+    assert searches == ["What is Yuri's stack?"]
+    assert tool_results(model) == ["docs about What is Yuri's stack?"]
+
+
+async def test_rephrased_search_runs_the_tool(search_tool, searches):
+    model = ScriptedModel(search_call("Yuri programming languages"), AIMessage("Python"))
+
+    await make_agent(model, search_tool).ainvoke({"input": "What is Yuri's stack?"})
+
+    assert tool_results(model) == ["docs about Yuri programming languages"]
+    # The prefetch was started, but its result is not passed off as the rephrased search
+    assert "Yuri programming languages" in searches
+
+
+async def test_failed_prefetch_falls_back_to_a_live_search(search_tool, searches, capsys):
+    model = ScriptedModel(search_call("flaky"), AIMessage("Python"))
+
+    result = await make_agent(model, search_tool).ainvoke({"input": "flaky"})
+
+    assert result["output"] == "Python"
+    assert searches == ["flaky", "flaky"]
+    assert tool_results(model) == ["docs about flaky"]
+    assert "[Prefetch Error]" in capsys.readouterr().out
+
+
+async def test_calls_of_one_turn_run_concurrently():
+    started = asyncio.Event()
+
+    @tool
+    async def lookup(input: str) -> str:
+        """Look something up."""
+        started.set()
+        return "looked up"
+
+    @tool
+    async def contextual_search(input: str) -> str:
+        """Search for relevant documents about Yuri."""
+        # Run in order, this would wait for a call that has not started yet
+        await asyncio.wait_for(started.wait(), timeout=1)
+        return "found"
+
+    model = ScriptedModel(
+        AIMessage(
+            "",
+            tool_calls=[
+                {"name": "contextual_search", "args": {"input": "x"}, "id": "a"},
+                {"name": "lookup", "args": {"input": "y"}, "id": "b"},
+            ],
+        ),
+        AIMessage("done"),
+    )
+    agent = create_native_agent(model, [contextual_search, lookup], "", contextual_search)
+
+    result = await agent.ainvoke({"input": "hello"})
+
+    assert [observation for _, observation in result["intermediate_steps"]] == ["found", "looked up"]
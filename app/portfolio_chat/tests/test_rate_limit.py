@@ -0,0 +1,115 @@
+import asyncio
+import multiprocessing
+
+import pytest
+from fastapi import HTTPException
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter
+
+import rate_limit
+from rate_limit import AdmissionController, SQLiteStorage
+
+
+@pytest.fixture
+def uri(tmp_path):
+    return f"sqlite://{tmp_path}/ratelimit.sqlite3"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(rate_limit.time, "time", lambda: now[0])
+    return now
+
+
+def _hammer(uri: str, count: int) -> None:
+    storage = SQLiteStorage(uri)
+    for _ in range(count):
+        storage.incr("shared", expiry=60)
+
+
+def test_uri_scheme_selects_the_sqlite_storage(uri):
+    storage = storage_from_string(uri)
+
+    assert isinstance(storage, SQLiteStorage)
+    assert storage.check()
+
+
+def test_limiter_allows_up_to_the_limit(uri):
+    limiter = FixedWindowRateLimiter(storage_from_string(uri))
+    limit = parse("3/minute")
+
+    assert [limiter.hit(limit, "1.2.3.4") for _ in range(4)] == [True, True, True, False]
+    assert limiter.hit(limit, "5.6.7.8")
+
+
+def test_counter_restarts_after_the_window(uri, clock):
+    storage = SQLiteStorage(uri)
+    assert storage.incr("key", expiry=60) == 1
+    assert storage.incr("key", expiry=60, amount=2) == 3
+    assert storage.get_expiry("key") == clock[0] + 60
+
+    clock[0] += 60
+
+    assert storage.get("key") == 0
+    assert storage.incr("key", expiry=60) == 1
+    assert storage.get_expiry("key") == clock[0] + 60
+
+
+def test_counters_are_shared_across_processes(uri):
+    SQLiteStorage(uri)
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=_hammer, args=(uri, 50)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+
+    assert [worker.exitcode for worker in workers] == [0] * 4
+    assert SQLiteStorage(uri).get("shared") == 200
+
+
+def test_clear_and_reset(uri):
+    storage = SQLiteStorage(uri)
+    storage.incr("a", expiry=60)
+    storage.incr("b", expiry=60)
+
+    storage.clear("a")
+    assert (storage.get("a"), storage.get("b")) == (0, 1)
+    assert storage.reset() == 1
+    assert storage.get("b") == 0
+
+
+async def test_admission_caps_concurrent_runs():
+    admission = AdmissionController(max_concurrent=2, queue_timeout=1)
+    running = peak = 0
+
+    async def run():
+        nonlocal running, peak
+        async with admission.slot():
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(run() for _ in range(6)))
+
+    assert peak == 2
+    assert admission.in_flight == 0
+    assert admission.rejected == 0
+
+
+async def test_admission_rejects_after_the_queue_timeout():
+    admission = AdmissionController(max_concurrent=1, queue_timeout=0.01)
+    await admission.acquire()
+
+    with pytest.raises(HTTPException) as error:
+        async with admission.slot():
+            pass
+
+    assert error.value.status_code == 429
+    assert admission.rejected == 1
+    admission.release()
+    async with admission.slot():
+        assert admission.in_flight == 1
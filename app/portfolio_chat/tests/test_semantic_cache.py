@@ -0,0 +1,100 @@
+import time
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from semantic_cache import SemanticCache, normalize_query
+
+VECTORS = {
+    "what is your stack": [1.0, 0.0, 0.0],
+    "which stack do you use": [0.99, 0.1, 0.0],
+    "tell me your stack": [0.95, 0.31, 0.0],
+    "where do you live": [0.0, 1.0, 0.0],
+}
+
+
+class TableEmbeddings(Embeddings):
+    def __init__(self):
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        self.calls += 1
+        return VECTORS.get(text, [0.0, 0.0, 1.0])
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    return now
+
+
+async def test_exact_repeat_skips_the_embedding():
+    embeddings = TableEmbeddings()
+    cache = SemanticCache(embeddings)
+    lookup = await cache.lookup("What is   your stack")
+    cache.store(lookup, "Python")
+
+    hit = await cache.lookup("what is your STACK ")
+
+    assert hit.answer == "Python"
+    assert embeddings.calls == 1
+    assert cache.stats()["exact_hits"] == 1
+
+
+async def test_similar_query_is_a_semantic_hit():
+    cache = SemanticCache(TableEmbeddings())
+    cache.store(await cache.lookup("what is your stack"), "Python")
+
+    hit = await cache.lookup("which stack do you use")
+
+    assert hit.answer == "Python"
+    assert cache.stats()["semantic_hits"] == 1
+
+
+async def test_dissimilar_query_misses():
+    cache = SemanticCache(TableEmbeddings())
+    cache.store(await cache.lookup("what is your stack"), "Python")
+
+    miss = await cache.lookup("where do you live")
+
+    assert miss.answer is None
+    assert miss.key == normalize_query("where do you live")
+    assert cache.stats()["misses"] == 2
+
+
+async def test_expired_entry_does_not_shadow_a_live_match(clock):
+    cache = SemanticCache(TableEmbeddings(), similarity_threshold=0.9, ttl_seconds=10)
+    cache.store(await cache.lookup("what is your stack"), "stale")
+    clock[0] += 5
+    cache.store(await cache.lookup("tell me your stack"), "fresh")
+    clock[0] += 6
+
+    # The expired entry is the closer match, but only the live one may answer
+    hit = await cache.lookup("which stack do you use")
+
+    assert hit.answer == "fresh"
+    assert cache.stats()["semantic_hits"] == 2
+
+
+async def test_nothing_matches_once_everything_expired(clock):
+    cache = SemanticCache(TableEmbeddings(), ttl_seconds=10)
+    cache.store(await cache.lookup("what is your stack"), "Python")
+    clock[0] += 10
+
+    assert (await cache.lookup("which stack do you use")).answer is None
+
+
+async def test_full_cache_evicts_least_recently_used():
+    cache = SemanticCache(TableEmbeddings(), max_entries=2)
+    cache.store(await cache.lookup("what is your stack"), "Python")
+    cache.store(await cache.lookup("where do you live"), "Berlin")
+    await cache.lookup("what is your stack")
+
+    cache.store(await cache.lookup("something else"), "other")
+
+    assert (await cache.lookup("what is your stack")).answer == "Python"
+    assert (await cache.lookup("where do you live")).answer is None
@@ -0,0 +1,95 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from streaming import FinalAnswerExtractor, sse, stream_agent
+
+BLOB = '{"action": "Final Answer", "action_input": "Caf\\u00e9 \\"quoted\\"\\nnext line"}'
+
+
+class FakeAgent:
+    def __init__(self, events):
+        self.events = events
+
+    async def astream_events(self, inputs, config=None, version="v2"):
+        for event in self.events:
+            yield event
+
+
+def token(text, run_id="model-1"):
+    return {
+        "event": "on_chat_model_stream",
+        "run_id": run_id,
+        "data": {"chunk": SimpleNamespace(content=text)},
+    }
+
+
+def parse_sse(text):
+    events = []
+    for frame in text.split("\n\n")[:-1]:
+        (event_line, data_line) = frame.split("\n")
+        events.append((event_line.removeprefix("event: "), json.loads(data_line.removeprefix("data: "))))
+    return events
+
+
+def test_sse_frames_one_single_line_event():
+    frame = sse("token", {"text": "line one\nline two ✓"})
+
+    assert frame == 'event: token\ndata: {"text": "line one\\nline two ✓"}\n\n'
+    assert parse_sse(frame) == [("token", {"text": "line one\nline two ✓"})]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, len(BLOB)])
+def test_extractor_decodes_the_answer_across_chunk_boundaries(size):
+    extractor = FinalAnswerExtractor()
+
+    answer = "".join(extractor.feed(BLOB[i : i + size]) for i in range(0, len(BLOB), size))
+
+    assert answer == json.loads(BLOB)["action_input"]
+
+
+def test_extractor_ignores_tool_calls():
+    extractor = FinalAnswerExtractor()
+
+    assert extractor.feed('{"action": "contextual_search", "action_input": "stack"}') == ""
+
+
+def test_extractor_stops_at_the_closing_quote():
+    extractor = FinalAnswerExtractor()
+
+    assert extractor.feed('{"action": "Final Answer", "action_input": "hi"}') == "hi"
+    assert extractor.feed(' trailing "text"') == ""
+
+
+async def test_stream_agent_translates_executor_events():
+    agent = FakeAgent(
+        [
+            token('{"action": "contextual_search", "action_input": "stack"}', run_id="plan"),
+            {"event": "on_tool_start", "name": "contextual_search", "data": {"input": "stack"}},
+            {"event": "on_tool_end", "name": "contextual_search", "data": {"output": 42}},
+            token('{"action": "Final Answer", ', run_id="answer"),
+            token('"action_input": "Pyt', run_id="answer"),
+            token('hon"}', run_id="answer"),
+            {"event": "on_chain_end", "parent_ids": ["executor"], "data": {"output": {}}},
+            {"event": "on_chain_end", "parent_ids": [], "data": {"output": {"output": "Python"}}},
+        ]
+    )
+
+    events = [item async for item in stream_agent(agent, {"input": "stack?"})]
+
+    assert events == [
+        ("tool_start", {"tool": "contextual_search", "input": "stack"}),
+        ("tool_end", {"tool": "contextual_search", "output": "42"}),
+        ("token", {"text": "Pyt"}),
+        ("token", {"text": "hon"}),
+        ("result", {"output": "Python"}),
+    ]
+
+
+async def test_native_mode_forwards_model_text():
+    agent = FakeAgent([token("Hello"), token(""), token(" there")])
+
+    events = [item async for item in stream_agent(agent, {}, json_answer=False)]
+
+    assert events == [("token", {"text": "Hello"}), ("token", {"text": " there"})]
@@ -0,0 +1,53 @@
+from uuid import uuid4
+
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+import tracing
+from tracing import RingBuffer, Span, StageTracer
+
+
+def span(stage, started_at):
+    return Span(stage=stage, started_at=started_at, duration=0.1)
+
+
+def test_ring_buffer_keeps_the_newest_spans_in_start_order():
+    buffer = RingBuffer(size=3)
+    for started_at in [5, 1, 4, 2, 3]:
+        buffer.append(span("llm", started_at))
+
+    assert [s.started_at for s in buffer.snapshot()] == [2, 3, 4]
+
+
+def test_tracer_times_stages_and_counts_tokens(monkeypatch):
+    buffer = RingBuffer()
+    monkeypatch.setattr(tracing, "recent_spans", buffer)
+    tracer = StageTracer()
+    llm, tool, parser = uuid4(), uuid4(), uuid4()
+
+    tracer.on_chat_model_start({}, [], run_id=llm)
+    message = AIMessage("hi", usage_metadata={"input_tokens": 12, "output_tokens": 3, "total_tokens": 15})
+    tracer.on_llm_end(LLMResult(generations=[[ChatGeneration(message=message)]]), run_id=llm)
+    tracer.on_chain_start({}, {}, run_id=parser, name="JSONAgentOutputParser")
+    tracer.on_chain_end({}, run_id=parser)
+    tracer.on_tool_start({}, "stack", run_id=tool, name="contextual_search")
+    tracer.on_tool_error(RuntimeError(), run_id=tool)
+    # Chains that are not traced leave nothing behind
+    tracer.on_chain_start({}, {}, run_id=uuid4(), name="RunnableSequence")
+
+    assert tracer.counts == {"llm": 1, "parser": 1, "tool:contextual_search": 1}
+    assert (tracer.prompt_tokens, tracer.completion_tokens) == (12, 3)
+    assert [s.stage for s in buffer.snapshot()] == ["llm", "parser", "tool:contextual_search"]
+    assert tracer.server_timing().startswith("llm;dur=")
+    assert "tool_contextual_search;dur=" in tracer.server_timing()
+
+
+def test_parsing_errors_get_their_own_stage(monkeypatch):
+    monkeypatch.setattr(tracing, "recent_spans", RingBuffer())
+    tracer = StageTracer()
+    run_id = uuid4()
+
+    tracer.on_tool_start({}, "bad json", run_id=run_id, name="_Exception")
+    tracer.on_tool_end("retry", run_id=run_id)
+
+    assert tracer.counts == {"tool:parsing_error": 1}
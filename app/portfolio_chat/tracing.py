@@ -0,0 +1,199 @@
+import asyncio
+import itertools
+import time
+from dataclasses import dataclass
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from prometheus_client import Counter, Histogram
+
+STAGE_SECONDS = Histogram(
+    "portfolio_chat_stage_seconds",
+    "Time spent in each stage of a /chat request.",
+    ["stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+LLM_TOKENS = Counter(
+    "portfolio_chat_llm_tokens_total",
+    "Tokens sent to and received from the chat model.",
+    ["kind"],
+)
+EVENT_LOOP_LAG = Histogram(
+    "portfolio_chat_event_loop_lag_seconds",
+    "How late the event loop woke up a periodic probe task.",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+PARSING_ERRORS = Counter(
+    "portfolio_chat_parsing_errors_total",
+    "Agent outputs the JSON parser rejected and the executor sent back to the LLM.",
+)
+
+# Runnables whose timings are worth a stage of their own.
+TRACED_CHAINS = {
+    "ChatPromptTemplate": "prompt",
+    "JSONAgentOutputParser": "parser",
+    "ToolsAgentOutputParser": "parser",
+}
+PARSING_ERROR_TOOL = "_Exception"
+
+
+@dataclass(frozen=True)
+class Span:
+    stage: str
+    started_at: float
+    duration: float
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+class RingBuffer:
+    """Fixed-size buffer of recent spans that writers never lock.
+
+    ``next()`` on an ``itertools.count`` and a single list item assignment are
+    both atomic under the GIL, so concurrent writers each claim a distinct slot.
+    """
+
+    def __init__(self, size: int = 4096):
+        self.size = size
+        self._slots: list[Span | None] = [None] * size
+        self._counter = itertools.count()
+
+    def append(self, span: Span) -> None:
+        self._slots[next(self._counter) % self.size] = span
+
+    def snapshot(self) -> list[Span]:
+        return sorted(
+            (span for span in self._slots if span is not None),
+            key=lambda span: span.started_at,
+        )
+
+
+recent_spans = RingBuffer()
+
+
+def record(
+    stage: str, duration: float, prompt_tokens: int = 0, completion_tokens: int = 0
+) -> None:
+    STAGE_SECONDS.labels(stage).observe(duration)
+    if prompt_tokens or completion_tokens:
+        LLM_TOKENS.labels("prompt").inc(prompt_tokens)
+        LLM_TOKENS.labels("completion").inc(completion_tokens)
+    recent_spans.append(
+        Span(
+            stage=stage,
+            started_at=time.time() - duration,
+            duration=duration,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+        )
+    )
+
+
+class StageTracer(BaseCallbackHandler):
+    """Per-request callback handler that times prompt, LLM, parser, tool and retriever steps.
+
+    Spans go to the shared ring buffer and Prometheus histograms; per-stage
+    totals for this request are kept for the ``Server-Timing`` header.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self.totals: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._starts: dict[UUID, tuple[str, float]] = {}
+
+    def server_timing(self) -> str:
+        return ", ".join(
+            f"{stage.replace(':', '_')};dur={seconds * 1000:.1f}"
+            for stage, seconds in self.totals.items()
+        )
+
+    def on_chain_start(self, serialized, inputs, *, run_id: UUID, **kwargs: Any):
+        stage = TRACED_CHAINS.get(kwargs.get("name") or (serialized or {}).get("name"))
+        if stage:
+            self._start(run_id, stage)
+
+    def on_chain_end(self, outputs, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any):
+        self._start(run_id, "llm")
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any):
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        if not usage and response.generations and response.generations[0]:
+            message = getattr(response.generations[0][0], "message", None)
+            metadata = getattr(message, "usage_metadata", None) or {}
+            usage = {
+                "prompt_tokens": metadata.get("input_tokens", 0),
+                "completion_tokens": metadata.get("output_tokens", 0),
+            }
+        self._end(
+            run_id,
+            prompt_tokens=usage.get("prompt_tokens", 0),
+            completion_tokens=usage.get("completion_tokens", 0),
+        )
+
+    def on_llm_error(self, error, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id)
+
+    def on_tool_start(self, serialized, input_str, *, run_id: UUID, **kwargs: Any):
+        name = kwargs.get("name") or (serialized or {}).get("name", "unknown")
+        if name == PARSING_ERROR_TOOL:
+            PARSING_ERRORS.inc()
+            name = "parsing_error"
+        self._start(run_id, f"tool:{name}")
+
+    def on_tool_end(self, output, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id)
+
+    def on_retriever_start(self, serialized, query, *, run_id: UUID, **kwargs: Any):
+        self._start(run_id, "retriever")
+
+    def on_retriever_end(self, documents, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id)
+
+    def on_retriever_error(self, error, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id)
+
+    def add(
+        self,
+        stage: str,
+        duration: float,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+    ) -> None:
+        record(stage, duration, prompt_tokens, completion_tokens)
+        self.totals[stage] = self.totals.get(stage, 0.0) + duration
+        self.counts[stage] = self.counts.get(stage, 0) + 1
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+
+    def _start(self, run_id: UUID, stage: str) -> None:
+        self._starts[run_id] = (stage, time.perf_counter())
+
+    def _end(self, run_id: UUID, **tokens: int) -> None:
+        started = self._starts.pop(run_id, None)
+        if started is None:
+            return
+        stage, start = started
+        self.add(stage, time.perf_counter() - start, **tokens)
+
+
+async def monitor_event_loop_lag(interval: float = 0.1) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, loop.time() - expected))